@@ -12,7 +12,7 @@ from panda3d.bullet import BulletTriangleMeshShape, BulletTriangleMesh
 from panda3d.core import LPoint3f, Material
 from panda3d.core import TextureStage
 from panda3d.core import Vec3, LQuaternionf, RigidBodyCombiner, \
-    SamplerState, NodePath, Texture
+    SamplerState, NodePath, Texture, TransformState
 from panda3d.core import Vec4
 
 from metaurban.base_class.base_object import BaseObject
@@ -76,6 +76,8 @@ class BaseBlock(BaseObject, PGDrivableAreaProperty, ABC):
         self.sidewalks_farfrom_road = {}
         self.sidewalks_farfrom_road_buffer = {}
         self.valid_region = {}
+        # node path name -> (node path, [(geom, z_pos)]), walkable geometry waiting to be merged into one body
+        self._walkable_geoms = {}
 
         if 'sidewalk_type_texture' not in self.engine.global_config:
             self.engine.global_config['sidewalk_type_texture'] = npy.random.choice([i for i in range(5)])
@@ -730,10 +732,12 @@ class BaseBlock(BaseObject, PGDrivableAreaProperty, ABC):
 
         self.lane_node_path = NodePath(RigidBodyCombiner(self.name + "_lane"))
 
+        self._walkable_geoms = {}
         if skip:  # for debug
             pass
         else:
             self.create_in_world()
+        self._build_walkable_bodies()
 
         self.lane_line_node_path.flattenStrong()
         self.lane_line_node_path.node().collect()
@@ -916,6 +920,39 @@ class BaseBlock(BaseObject, PGDrivableAreaProperty, ABC):
     def bounding_box(self):
         return self._bounding_box
 
+    def _add_walkable_polygon(self, parent_np, polygon, height, z_pos):
+        """
+        Add the render model of one sidewalk-like polygon under parent_np. Its collision geometry is kept and merged
+        with the other polygons of the same node path into one body by _build_walkable_bodies
+        """
+        np = make_polygon_model(polygon, height)
+        np.reparentTo(parent_np)
+        np.setPos(0, 0, z_pos)
+        self._node_path_list.append(np)
+        geoms = self._walkable_geoms.setdefault(parent_np.getName(), (parent_np, []))[1]
+        geoms.append((np.node().getGeom(0), float(z_pos)))
+
+    def _build_walkable_bodies(self):
+        """
+        Create one static triangle mesh body per node path for all polygons added by _add_walkable_polygon, instead of
+        one body per polygon, which keeps the number of bodies in the dynamic world small
+        """
+        for parent_np, geoms in self._walkable_geoms.values():
+            mesh = BulletTriangleMesh()
+            for geom, z_pos in geoms:
+                mesh.addGeom(geom, True, TransformState.makePos(Vec3(0, 0, z_pos)))
+
+            body_node = BaseRigidBodyNode(None, MetaUrbanType.BOUNDARY_SIDEWALK)
+            body_node.setKinematic(False)
+            body_node.setStatic(True)
+            body_np = parent_np.attachNewNode(body_node)
+            self._node_path_list.append(body_np)
+
+            body_node.addShape(BulletTriangleMeshShape(mesh, dynamic=False))
+            self.dynamic_nodes.append(body_node)
+            body_node.setIntoCollideMask(CollisionGroup.Sidewalk)
+        self._walkable_geoms = {}
+
     def _construct_sidewalk(self):
         """
         Construct the sidewalk with collision shape
@@ -937,26 +974,7 @@ class BaseBlock(BaseObject, PGDrivableAreaProperty, ABC):
                         scale = 1.
                     z_pos = height / 2 * scale
 
-                    np = make_polygon_model(polygon, height * scale)
-                    np.reparentTo(self.sidewalk_node_path)
-                    np.setPos(0, 0, z_pos)
-
-                    body_node = BaseRigidBodyNode(None, MetaUrbanType.BOUNDARY_SIDEWALK)
-                    body_node.setKinematic(False)
-                    body_node.setStatic(True)
-                    body_np = self.sidewalk_node_path.attachNewNode(body_node)
-                    body_np.setPos(0, 0, z_pos)
-                    self._node_path_list.append(body_np)
-
-                    geom = np.node().getGeom(0)
-                    mesh = BulletTriangleMesh()
-                    mesh.addGeom(geom)
-                    shape = BulletTriangleMeshShape(mesh, dynamic=False)
-
-                    body_node.addShape(shape)
-                    self.dynamic_nodes.append(body_node)
-                    body_node.setIntoCollideMask(CollisionGroup.Sidewalk)
-                    self._node_path_list.append(np)
+                    self._add_walkable_polygon(self.sidewalk_node_path, polygon, height * scale, z_pos)
                 for polygon in polygons[int(len(polygons) // 2):]:
                     height = sidewalk.get("height", None)
                     if height is None:
@@ -968,26 +986,7 @@ class BaseBlock(BaseObject, PGDrivableAreaProperty, ABC):
                         scale = 1.
                     z_pos = height / 2 * scale
 
-                    np = make_polygon_model(polygon, height * scale)
-                    np.reparentTo(self.sidewalk_node_path)
-                    np.setPos(0, 0, z_pos)
-
-                    body_node = BaseRigidBodyNode(None, MetaUrbanType.BOUNDARY_SIDEWALK)
-                    body_node.setKinematic(False)
-                    body_node.setStatic(True)
-                    body_np = self.sidewalk_node_path.attachNewNode(body_node)
-                    body_np.setPos(0, 0, z_pos)
-                    self._node_path_list.append(body_np)
-
-                    geom = np.node().getGeom(0)
-                    mesh = BulletTriangleMesh()
-                    mesh.addGeom(geom)
-                    shape = BulletTriangleMeshShape(mesh, dynamic=False)
-
-                    body_node.addShape(shape)
-                    self.dynamic_nodes.append(body_node)
-                    body_node.setIntoCollideMask(CollisionGroup.Sidewalk)
-                    self._node_path_list.append(np)
+                    self._add_walkable_polygon(self.sidewalk_node_path, polygon, height * scale, z_pos)
             if self.engine.global_config['test_slope_system']:
                 for _, valid_region in enumerate(self.slo_s):
                     polygons = TerrainProperty.clip_polygon(valid_region)
@@ -995,26 +994,7 @@ class BaseBlock(BaseObject, PGDrivableAreaProperty, ABC):
                         height = 0.3 + 200 * 0.001 + 200 * 0.005 + idx * 0.01
                         z_pos = height / 2
 
-                        np = make_polygon_model(polygon, height)
-                        np.reparentTo(self.farfromroad_node_path)
-                        np.setPos(0, 0, z_pos)
-
-                        body_node = BaseRigidBodyNode(None, MetaUrbanType.BOUNDARY_SIDEWALK)
-                        body_node.setKinematic(False)
-                        body_node.setStatic(True)
-                        body_np = self.farfromroad_node_path.attachNewNode(body_node)
-                        body_np.setPos(0, 0, z_pos)
-                        self._node_path_list.append(body_np)
-
-                        geom = np.node().getGeom(0)
-                        mesh = BulletTriangleMesh()
-                        mesh.addGeom(geom)
-                        shape = BulletTriangleMeshShape(mesh, dynamic=False)
-
-                        body_node.addShape(shape)
-                        self.dynamic_nodes.append(body_node)
-                        body_node.setIntoCollideMask(CollisionGroup.Sidewalk)
-                        self._node_path_list.append(np)
+                        self._add_walkable_polygon(self.farfromroad_node_path, polygon, height, z_pos)
             if self.engine.global_config['test_rough_system']:
                 for _, valid_region in enumerate(self.slo_s):
                     polygons = TerrainProperty.clip_polygon(valid_region)
@@ -1022,26 +1002,7 @@ class BaseBlock(BaseObject, PGDrivableAreaProperty, ABC):
                         height = 0.3 + npy.random.uniform(0, 0.04, 1)
                         z_pos = height / 2
 
-                        np = make_polygon_model(polygon, height)
-                        np.reparentTo(self.farfromroad_node_path)
-                        np.setPos(0, 0, z_pos)
-
-                        body_node = BaseRigidBodyNode(None, MetaUrbanType.BOUNDARY_SIDEWALK)
-                        body_node.setKinematic(False)
-                        body_node.setStatic(True)
-                        body_np = self.farfromroad_node_path.attachNewNode(body_node)
-                        body_np.setPos(0, 0, z_pos)
-                        self._node_path_list.append(body_np)
-
-                        geom = np.node().getGeom(0)
-                        mesh = BulletTriangleMesh()
-                        mesh.addGeom(geom)
-                        shape = BulletTriangleMeshShape(mesh, dynamic=False)
-
-                        body_node.addShape(shape)
-                        self.dynamic_nodes.append(body_node)
-                        body_node.setIntoCollideMask(CollisionGroup.Sidewalk)
-                        self._node_path_list.append(np)
+                        self._add_walkable_polygon(self.farfromroad_node_path, polygon, height, z_pos)
 
     def _construct_crosswalk(self):
         """
@@ -1052,29 +1013,28 @@ class BaseBlock(BaseObject, PGDrivableAreaProperty, ABC):
                 if len(crosswalk["polygon"]) == 0:
                     continue
                 polygons = TerrainProperty.clip_polygon(crosswalk["polygon"])
-                if polygons is None:
+                if polygons is None or len(polygons) == 0:
                     continue
+                # one body for all pieces of this crosswalk
+                mesh = BulletTriangleMesh()
                 for polygon in polygons:
                     np = make_polygon_model(polygon, 1.5)
-
-                    body_node = BaseGhostBodyNode(cross_id, MetaUrbanType.CROSSWALK)
-                    body_node.setKinematic(False)
-                    body_node.setStatic(True)
-                    body_np = self.crosswalk_node_path.attachNewNode(body_node)
-                    # A trick allowing collision with sidewalk
-                    body_np.setPos(0, 0, 1.5)
-                    self._node_path_list.append(body_np)
-
-                    geom = np.node().getGeom(0)
-                    mesh = BulletTriangleMesh()
-                    mesh.addGeom(geom)
-                    shape = BulletTriangleMeshShape(mesh, dynamic=False)
-
-                    body_node.addShape(shape)
-                    self.static_nodes.append(body_node)
-                    body_node.setIntoCollideMask(CollisionGroup.Crosswalk)
+                    mesh.addGeom(np.node().getGeom(0))
                     np.removeNode()
 
+                body_node = BaseGhostBodyNode(cross_id, MetaUrbanType.CROSSWALK)
+                body_node.setKinematic(False)
+                body_node.setStatic(True)
+                body_np = self.crosswalk_node_path.attachNewNode(body_node)
+                # A trick allowing collision with sidewalk
+                body_np.setPos(0, 0, 1.5)
+                self._node_path_list.append(body_np)
+
+                shape = BulletTriangleMeshShape(mesh, dynamic=False)
+                body_node.addShape(shape)
+                self.static_nodes.append(body_node)
+                body_node.setIntoCollideMask(CollisionGroup.Crosswalk)
+
     def _construct_nearroadsidewalk(self):
         """
         Construct the sidewalk with collision shape
@@ -1096,26 +1056,7 @@ class BaseBlock(BaseObject, PGDrivableAreaProperty, ABC):
                         scale = 1.
                     z_pos = height / 2 * scale
 
-                    np = make_polygon_model(polygon, height * scale)
-                    np.reparentTo(self.nearroad_node_path)
-                    np.setPos(0, 0, z_pos)
-
-                    body_node = BaseRigidBodyNode(None, MetaUrbanType.BOUNDARY_SIDEWALK)
-                    body_node.setKinematic(False)
-                    body_node.setStatic(True)
-                    body_np = self.nearroad_node_path.attachNewNode(body_node)
-                    body_np.setPos(0, 0, z_pos)
-                    self._node_path_list.append(body_np)
-
-                    geom = np.node().getGeom(0)
-                    mesh = BulletTriangleMesh()
-                    mesh.addGeom(geom)
-                    shape = BulletTriangleMeshShape(mesh, dynamic=False)
-
-                    body_node.addShape(shape)
-                    self.dynamic_nodes.append(body_node)
-                    body_node.setIntoCollideMask(CollisionGroup.Sidewalk)
-                    self._node_path_list.append(np)
+                    self._add_walkable_polygon(self.nearroad_node_path, polygon, height * scale, z_pos)
                 for polygon in polygons[int(len(polygons) // 2):]:
                     height = nearroad_sidewalk.get("height", None)
                     if height is None:
@@ -1127,26 +1068,7 @@ class BaseBlock(BaseObject, PGDrivableAreaProperty, ABC):
                         scale = 1.
                     z_pos = height / 2 * scale
 
-                    np = make_polygon_model(polygon, height * scale)
-                    np.reparentTo(self.nearroad_node_path)
-                    np.setPos(0, 0, z_pos)
-
-                    body_node = BaseRigidBodyNode(None, MetaUrbanType.BOUNDARY_SIDEWALK)
-                    body_node.setKinematic(False)
-                    body_node.setStatic(True)
-                    body_np = self.nearroad_node_path.attachNewNode(body_node)
-                    body_np.setPos(0, 0, z_pos)
-                    self._node_path_list.append(body_np)
-
-                    geom = np.node().getGeom(0)
-                    mesh = BulletTriangleMesh()
-                    mesh.addGeom(geom)
-                    shape = BulletTriangleMeshShape(mesh, dynamic=False)
-
-                    body_node.addShape(shape)
-                    self.dynamic_nodes.append(body_node)
-                    body_node.setIntoCollideMask(CollisionGroup.Sidewalk)
-                    self._node_path_list.append(np)
+                    self._add_walkable_polygon(self.nearroad_node_path, polygon, height * scale, z_pos)
             if self.engine.global_config['test_slope_system']:
                 for _, valid_region in enumerate(self.slo_n):
                     polygons = TerrainProperty.clip_polygon(valid_region)
@@ -1154,26 +1076,7 @@ class BaseBlock(BaseObject, PGDrivableAreaProperty, ABC):
                         height = 0.3 + 200 * 0.001 + idx * 0.005
                         z_pos = height / 2
 
-                        np = make_polygon_model(polygon, height)
-                        np.reparentTo(self.farfromroad_node_path)
-                        np.setPos(0, 0, z_pos)
-
-                        body_node = BaseRigidBodyNode(None, MetaUrbanType.BOUNDARY_SIDEWALK)
-                        body_node.setKinematic(False)
-                        body_node.setStatic(True)
-                        body_np = self.farfromroad_node_path.attachNewNode(body_node)
-                        body_np.setPos(0, 0, z_pos)
-                        self._node_path_list.append(body_np)
-
-                        geom = np.node().getGeom(0)
-                        mesh = BulletTriangleMesh()
-                        mesh.addGeom(geom)
-                        shape = BulletTriangleMeshShape(mesh, dynamic=False)
-
-                        body_node.addShape(shape)
-                        self.dynamic_nodes.append(body_node)
-                        body_node.setIntoCollideMask(CollisionGroup.Sidewalk)
-                        self._node_path_list.append(np)
+                        self._add_walkable_polygon(self.farfromroad_node_path, polygon, height, z_pos)
             if self.engine.global_config['test_rough_system']:
                 for _, valid_region in enumerate(self.slo_n):
                     polygons = TerrainProperty.clip_polygon(valid_region)
@@ -1181,26 +1084,7 @@ class BaseBlock(BaseObject, PGDrivableAreaProperty, ABC):
                         height = 0.3 + npy.random.uniform(0, 0.02, 1)
                         z_pos = height / 2
 
-                        np = make_polygon_model(polygon, height)
-                        np.reparentTo(self.farfromroad_node_path)
-                        np.setPos(0, 0, z_pos)
-
-                        body_node = BaseRigidBodyNode(None, MetaUrbanType.BOUNDARY_SIDEWALK)
-                        body_node.setKinematic(False)
-                        body_node.setStatic(True)
-                        body_np = self.farfromroad_node_path.attachNewNode(body_node)
-                        body_np.setPos(0, 0, z_pos)
-                        self._node_path_list.append(body_np)
-
-                        geom = np.node().getGeom(0)
-                        mesh = BulletTriangleMesh()
-                        mesh.addGeom(geom)
-                        shape = BulletTriangleMeshShape(mesh, dynamic=False)
-
-                        body_node.addShape(shape)
-                        self.dynamic_nodes.append(body_node)
-                        body_node.setIntoCollideMask(CollisionGroup.Sidewalk)
-                        self._node_path_list.append(np)
+                        self._add_walkable_polygon(self.farfromroad_node_path, polygon, height, z_pos)
 
     def _construct_farfromroadsidewalk(self):
         """
@@ -1223,26 +1107,7 @@ class BaseBlock(BaseObject, PGDrivableAreaProperty, ABC):
                         scale = 1.
                     z_pos = height / 2 * scale
 
-                    np = make_polygon_model(polygon, height * scale)
-                    np.reparentTo(self.farfromroad_node_path)
-                    np.setPos(0, 0, z_pos)
-
-                    body_node = BaseRigidBodyNode(None, MetaUrbanType.BOUNDARY_SIDEWALK)
-                    body_node.setKinematic(False)
-                    body_node.setStatic(True)
-                    body_np = self.farfromroad_node_path.attachNewNode(body_node)
-                    body_np.setPos(0, 0, z_pos)
-                    self._node_path_list.append(body_np)
-
-                    geom = np.node().getGeom(0)
-                    mesh = BulletTriangleMesh()
-                    mesh.addGeom(geom)
-                    shape = BulletTriangleMeshShape(mesh, dynamic=False)
-
-                    body_node.addShape(shape)
-                    self.dynamic_nodes.append(body_node)
-                    body_node.setIntoCollideMask(CollisionGroup.Sidewalk)
-                    self._node_path_list.append(np)
+                    self._add_walkable_polygon(self.farfromroad_node_path, polygon, height * scale, z_pos)
                 for polygon in polygons[int(len(polygons) // 2):]:
                     height = farfromroad_sidewalk.get("height", None)
                     if height is None:
@@ -1253,26 +1118,7 @@ class BaseBlock(BaseObject, PGDrivableAreaProperty, ABC):
                         scale = 1.
                     z_pos = height / 2 * scale
 
-                    np = make_polygon_model(polygon, height * scale)
-                    np.reparentTo(self.farfromroad_node_path)
-                    np.setPos(0, 0, z_pos)
-
-                    body_node = BaseRigidBodyNode(None, MetaUrbanType.BOUNDARY_SIDEWALK)
-                    body_node.setKinematic(False)
-                    body_node.setStatic(True)
-                    body_np = self.farfromroad_node_path.attachNewNode(body_node)
-                    body_np.setPos(0, 0, z_pos)
-                    self._node_path_list.append(body_np)
-
-                    geom = np.node().getGeom(0)
-                    mesh = BulletTriangleMesh()
-                    mesh.addGeom(geom)
-                    shape = BulletTriangleMeshShape(mesh, dynamic=False)
-
-                    body_node.addShape(shape)
-                    self.dynamic_nodes.append(body_node)
-                    body_node.setIntoCollideMask(CollisionGroup.Sidewalk)
-                    self._node_path_list.append(np)
+                    self._add_walkable_polygon(self.farfromroad_node_path, polygon, height * scale, z_pos)
 
     def _construct_nearroadsidewalk_buffer(self):
         """
@@ -1291,26 +1137,7 @@ class BaseBlock(BaseObject, PGDrivableAreaProperty, ABC):
                         height = PGDrivableAreaProperty.SIDEWALK_THICKNESS
                     scale = 1.
                     z_pos = height / 2 * scale
-                    np = make_polygon_model(polygon, height * scale)
-                    np.reparentTo(self.nearroad_buffer_node_path)
-                    np.setPos(0, 0, z_pos)
-
-                    body_node = BaseRigidBodyNode(None, MetaUrbanType.BOUNDARY_SIDEWALK)
-                    body_node.setKinematic(False)
-                    body_node.setStatic(True)
-                    body_np = self.nearroad_buffer_node_path.attachNewNode(body_node)
-                    body_np.setPos(0, 0, z_pos)
-                    self._node_path_list.append(body_np)
-
-                    geom = np.node().getGeom(0)
-                    mesh = BulletTriangleMesh()
-                    mesh.addGeom(geom)
-                    shape = BulletTriangleMeshShape(mesh, dynamic=False)
-
-                    body_node.addShape(shape)
-                    self.dynamic_nodes.append(body_node)
-                    body_node.setIntoCollideMask(CollisionGroup.Sidewalk)
-                    self._node_path_list.append(np)
+                    self._add_walkable_polygon(self.nearroad_buffer_node_path, polygon, height * scale, z_pos)
             if self.engine.global_config['test_slope_system']:
                 for _, valid_region in enumerate(self.slo_nb):
                     polygons = TerrainProperty.clip_polygon(valid_region)
@@ -1318,26 +1145,7 @@ class BaseBlock(BaseObject, PGDrivableAreaProperty, ABC):
                         height = 0.3 + idx * 0.001
                         z_pos = height / 2
 
-                        np = make_polygon_model(polygon, height)
-                        np.reparentTo(self.farfromroad_node_path)
-                        np.setPos(0, 0, z_pos)
-
-                        body_node = BaseRigidBodyNode(None, MetaUrbanType.BOUNDARY_SIDEWALK)
-                        body_node.setKinematic(False)
-                        body_node.setStatic(True)
-                        body_np = self.farfromroad_node_path.attachNewNode(body_node)
-                        body_np.setPos(0, 0, z_pos)
-                        self._node_path_list.append(body_np)
-
-                        geom = np.node().getGeom(0)
-                        mesh = BulletTriangleMesh()
-                        mesh.addGeom(geom)
-                        shape = BulletTriangleMeshShape(mesh, dynamic=False)
-
-                        body_node.addShape(shape)
-                        self.dynamic_nodes.append(body_node)
-                        body_node.setIntoCollideMask(CollisionGroup.Sidewalk)
-                        self._node_path_list.append(np)
+                        self._add_walkable_polygon(self.farfromroad_node_path, polygon, height, z_pos)
             if self.engine.global_config['test_rough_system']:
                 for _, valid_region in enumerate(self.slo_nb):
                     polygons = TerrainProperty.clip_polygon(valid_region)
@@ -1345,26 +1153,7 @@ class BaseBlock(BaseObject, PGDrivableAreaProperty, ABC):
                         height = 0.3 + npy.random.uniform(0, 0.01, 1)
                         z_pos = height / 2
 
-                        np = make_polygon_model(polygon, height)
-                        np.reparentTo(self.farfromroad_node_path)
-                        np.setPos(0, 0, z_pos)
-
-                        body_node = BaseRigidBodyNode(None, MetaUrbanType.BOUNDARY_SIDEWALK)
-                        body_node.setKinematic(False)
-                        body_node.setStatic(True)
-                        body_np = self.farfromroad_node_path.attachNewNode(body_node)
-                        body_np.setPos(0, 0, z_pos)
-                        self._node_path_list.append(body_np)
-
-                        geom = np.node().getGeom(0)
-                        mesh = BulletTriangleMesh()
-                        mesh.addGeom(geom)
-                        shape = BulletTriangleMeshShape(mesh, dynamic=False)
-
-                        body_node.addShape(shape)
-                        self.dynamic_nodes.append(body_node)
-                        body_node.setIntoCollideMask(CollisionGroup.Sidewalk)
-                        self._node_path_list.append(np)
+                        self._add_walkable_polygon(self.farfromroad_node_path, polygon, height, z_pos)
 
     def _construct_farfromroadsidewalk_buffer(self):
         """
@@ -1387,26 +1176,7 @@ class BaseBlock(BaseObject, PGDrivableAreaProperty, ABC):
                         scale = 1.
                     z_pos = height / 2 * scale
 
-                    np = make_polygon_model(polygon, height * scale)
-                    np.reparentTo(self.farfromroad_buffer_node_path)
-                    np.setPos(0, 0, z_pos)
-
-                    body_node = BaseRigidBodyNode(None, MetaUrbanType.BOUNDARY_SIDEWALK)
-                    body_node.setKinematic(False)
-                    body_node.setStatic(True)
-                    body_np = self.farfromroad_buffer_node_path.attachNewNode(body_node)
-                    body_np.setPos(0, 0, z_pos)
-                    self._node_path_list.append(body_np)
-
-                    geom = np.node().getGeom(0)
-                    mesh = BulletTriangleMesh()
-                    mesh.addGeom(geom)
-                    shape = BulletTriangleMeshShape(mesh, dynamic=False)
-
-                    body_node.addShape(shape)
-                    self.dynamic_nodes.append(body_node)
-                    body_node.setIntoCollideMask(CollisionGroup.Sidewalk)
-                    self._node_path_list.append(np)
+                    self._add_walkable_polygon(self.farfromroad_buffer_node_path, polygon, height * scale, z_pos)
                 for polygon in polygons[int(len(polygons) // 2):]:
                     height = farfromroad_sidewalk.get("height", None)
                     if height is None:
@@ -1418,26 +1188,7 @@ class BaseBlock(BaseObject, PGDrivableAreaProperty, ABC):
                         scale = 1.
                     z_pos = height / 2 * scale
 
-                    np = make_polygon_model(polygon, height * scale)
-                    np.reparentTo(self.farfromroad_buffer_node_path)
-                    np.setPos(0, 0, z_pos)
-
-                    body_node = BaseRigidBodyNode(None, MetaUrbanType.BOUNDARY_SIDEWALK)
-                    body_node.setKinematic(False)
-                    body_node.setStatic(True)
-                    body_np = self.farfromroad_buffer_node_path.attachNewNode(body_node)
-                    body_np.setPos(0, 0, z_pos)
-                    self._node_path_list.append(body_np)
-
-                    geom = np.node().getGeom(0)
-                    mesh = BulletTriangleMesh()
-                    mesh.addGeom(geom)
-                    shape = BulletTriangleMeshShape(mesh, dynamic=False)
-
-                    body_node.addShape(shape)
-                    self.dynamic_nodes.append(body_node)
-                    body_node.setIntoCollideMask(CollisionGroup.Sidewalk)
-                    self._node_path_list.append(np)
+                    self._add_walkable_polygon(self.farfromroad_buffer_node_path, polygon, height * scale, z_pos)
             if self.engine.global_config['test_slope_system']:
                 for _, valid_region in enumerate(self.slo_fb):
                     polygons = TerrainProperty.clip_polygon(valid_region)
@@ -1445,26 +1196,7 @@ class BaseBlock(BaseObject, PGDrivableAreaProperty, ABC):
                         height = 0.3 + 200 * 0.001 + 200 * 0.005 + 200 * 0.01 + 200 * 0.015
                         z_pos = height / 2
 
-                        np = make_polygon_model(polygon, height)
-                        np.reparentTo(self.farfromroad_node_path)
-                        np.setPos(0, 0, z_pos)
-
-                        body_node = BaseRigidBodyNode(None, MetaUrbanType.BOUNDARY_SIDEWALK)
-                        body_node.setKinematic(False)
-                        body_node.setStatic(True)
-                        body_np = self.farfromroad_node_path.attachNewNode(body_node)
-                        body_np.setPos(0, 0, z_pos)
-                        self._node_path_list.append(body_np)
-
-                        geom = np.node().getGeom(0)
-                        mesh = BulletTriangleMesh()
-                        mesh.addGeom(geom)
-                        shape = BulletTriangleMeshShape(mesh, dynamic=False)
-
-                        body_node.addShape(shape)
-                        self.dynamic_nodes.append(body_node)
-                        body_node.setIntoCollideMask(CollisionGroup.Sidewalk)
-                        self._node_path_list.append(np)
+                        self._add_walkable_polygon(self.farfromroad_node_path, polygon, height, z_pos)
             if self.engine.global_config['test_rough_system']:
                 for _, valid_region in enumerate(self.slo_fb):
                     polygons = TerrainProperty.clip_polygon(valid_region)
@@ -1472,26 +1204,7 @@ class BaseBlock(BaseObject, PGDrivableAreaProperty, ABC):
                         height = 0.3 + 200 * 0.001 + 200 * 0.005 + 200 * 0.01 + 200 * 0.015
                         z_pos = height / 2
 
-                        np = make_polygon_model(polygon, height)
-                        np.reparentTo(self.farfromroad_node_path)
-                        np.setPos(0, 0, z_pos)
-
-                        body_node = BaseRigidBodyNode(None, MetaUrbanType.BOUNDARY_SIDEWALK)
-                        body_node.setKinematic(False)
-                        body_node.setStatic(True)
-                        body_np = self.farfromroad_node_path.attachNewNode(body_node)
-                        body_np.setPos(0, 0, z_pos)
-                        self._node_path_list.append(body_np)
-
-                        geom = np.node().getGeom(0)
-                        mesh = BulletTriangleMesh()
-                        mesh.addGeom(geom)
-                        shape = BulletTriangleMeshShape(mesh, dynamic=False)
-
-                        body_node.addShape(shape)
-                        self.dynamic_nodes.append(body_node)
-                        body_node.setIntoCollideMask(CollisionGroup.Sidewalk)
-                        self._node_path_list.append(np)
+                        self._add_walkable_polygon(self.farfromroad_node_path, polygon, height, z_pos)
 
     def _construct_valid_region(self):
         """
@@ -1517,26 +1230,7 @@ class BaseBlock(BaseObject, PGDrivableAreaProperty, ABC):
                         scale = 1.
                     z_pos = height / 2 * scale
 
-                    np = make_polygon_model(polygon, height * scale)
-                    np.reparentTo(self.valid_region_node_path)
-                    np.setPos(0, 0, z_pos)
-
-                    body_node = BaseRigidBodyNode(None, MetaUrbanType.BOUNDARY_SIDEWALK)
-                    body_node.setKinematic(False)
-                    body_node.setStatic(True)
-                    body_np = self.valid_region_node_path.attachNewNode(body_node)
-                    body_np.setPos(0, 0, z_pos)
-                    self._node_path_list.append(body_np)
-
-                    geom = np.node().getGeom(0)
-                    mesh = BulletTriangleMesh()
-                    mesh.addGeom(geom)
-                    shape = BulletTriangleMeshShape(mesh, dynamic=False)
-
-                    body_node.addShape(shape)
-                    self.dynamic_nodes.append(body_node)
-                    body_node.setIntoCollideMask(CollisionGroup.Sidewalk)
-                    self._node_path_list.append(np)
+                    self._add_walkable_polygon(self.valid_region_node_path, polygon, height * scale, z_pos)
 
                 for polygon in polygons[int(len(polygons) // 2):]:
                     height = valid_region.get("height", None)
@@ -1548,26 +1242,7 @@ class BaseBlock(BaseObject, PGDrivableAreaProperty, ABC):
                         scale = 1.
                     z_pos = height / 2 * scale
 
-                    np = make_polygon_model(polygon, height * scale)
-                    np.reparentTo(self.valid_region_node_path)
-                    np.setPos(0, 0, z_pos)
-
-                    body_node = BaseRigidBodyNode(None, MetaUrbanType.BOUNDARY_SIDEWALK)
-                    body_node.setKinematic(False)
-                    body_node.setStatic(True)
-                    body_np = self.valid_region_node_path.attachNewNode(body_node)
-                    body_np.setPos(0, 0, z_pos)
-                    self._node_path_list.append(body_np)
-
-                    geom = np.node().getGeom(0)
-                    mesh = BulletTriangleMesh()
-                    mesh.addGeom(geom)
-                    shape = BulletTriangleMeshShape(mesh, dynamic=False)
-
-                    body_node.addShape(shape)
-                    self.dynamic_nodes.append(body_node)
-                    body_node.setIntoCollideMask(CollisionGroup.Sidewalk)
-                    self._node_path_list.append(np)
+                    self._add_walkable_polygon(self.valid_region_node_path, polygon, height * scale, z_pos)
 
     def _construct_lane(self, lane, lane_index):
         """
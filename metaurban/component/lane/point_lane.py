@@ -63,13 +63,11 @@ class PointLane(AbstractLane, InterpolatingLine):
         end_dir = [math.cos(end_heading), math.sin(end_heading)]
         polygon = []
         longs = np.arange(0, self.length + self.POLYGON_SAMPLE_RATE, self.POLYGON_SAMPLE_RATE)
+        half_widths = np.array([self.width_at(longitude) / 2 for longitude in longs])
+        # both boundaries at once, the right one from start to end and the left one from end to start
+        boundaries = [self.get_points(longs, -half_widths), self.get_points(longs[::-1], half_widths[::-1])]
         for k in range(2):
-            if k == 1:
-                longs = longs[::-1]
-            for t, longitude, in enumerate(longs):
-                lateral = self.width_at(longitude) / 2
-                lateral *= -1 if k == 0 else 1
-                point = self.position(longitude, lateral)
+            for t, point in enumerate(boundaries[k]):
                 if (t == 0 and k == 0) or (t == len(longs) - 1 and k == 1):
                     # control the adding sequence
                     if k == 1:
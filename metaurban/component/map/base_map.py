@@ -14,6 +14,18 @@ from metaurban.utils.shapely_utils.geom import find_longest_edge
 logger = logging.getLogger(__name__)
 
 
+def points_to_pixels(points, center_point, pixels_per_meter, size):
+    """
+    Project 2D points to the pixel coordinates of a (size * size) raster centered at center_point
+    :return: (1, N, 2) int32 array which can be fed to cv2.fillPoly/cv2.polylines directly
+    """
+    points = np.asarray(points, dtype=np.float64)
+    pixels = np.empty((1, len(points), 2))
+    pixels[0, :, 0] = (points[:, 0] - center_point[0]) * pixels_per_meter + size / 2
+    pixels[0, :, 1] = np.trunc((points[:, 1] - center_point[1]) * pixels_per_meter) + size / 2
+    return pixels.astype(np.int32)
+
+
 class BaseMap(BaseRunnable, ABC):
     """
     Base class for Map generation!
@@ -238,32 +250,17 @@ class BaseMap(BaseRunnable, ABC):
             # create an example bounding box polygon
             # for idx in range(len(polygons)):
             for polygon, color in polygons:
-                points = [
-                    [
-                        int((x - center_p[0]) * pixels_per_meter + size / 2),
-                        int((y - center_p[1]) * pixels_per_meter) + size / 2
-                    ] for x, y in polygon
-                ]
-                cv2.fillPoly(mask, np.array([points]).astype(np.int32), color=color)
+                points = points_to_pixels(polygon, center_p, pixels_per_meter, size)
+                cv2.fillPoly(mask, points, color=color)
             for line, color in polylines:
-                points = [
-                    [
-                        int((p[0] - center_p[0]) * pixels_per_meter + size / 2),
-                        int((p[1] - center_p[1]) * pixels_per_meter) + size / 2
-                    ] for p in line
-                ]
+                points = points_to_pixels(line, center_p, pixels_per_meter, size)
                 thickness = yellow_line_thickness if color == MapTerrainSemanticColor.YELLOW else white_line_thickness
-                cv2.polylines(mask, np.array([points]).astype(np.int32), False, color, thickness)
+                cv2.polylines(mask, points, False, color, thickness)
 
             if "crosswalk" in layer:
                 for id, sidewalk in self.crosswalks.items():
                     polygon = sidewalk["polygon"]
-                    points = [
-                        [
-                            int((x - center_p[0]) * pixels_per_meter + size / 2),
-                            int((y - center_p[1]) * pixels_per_meter) + size / 2
-                        ] for x, y in polygon
-                    ]
+                    points = points_to_pixels(polygon, center_p, pixels_per_meter, size)
                     # edges = find_longest_parallel_edges(polygon)
                     # p_1, p_2 = edges[0]
                     p_1, p_2 = find_longest_edge(polygon)[0]
@@ -275,7 +272,7 @@ class BaseMap(BaseRunnable, ABC):
                     angle = np.arctan2(*dir) / np.pi * 180 + 180
                     # normalize to 0.4-0.714
                     angle = int(angle / 2) + color_setting.get_color(MetaUrbanType.CROSSWALK)
-                    cv2.fillPoly(mask, np.array([points]).astype(np.int32), color=angle)
+                    cv2.fillPoly(mask, points, color=angle)
 
             # self._semantic_map = mask
         return mask
@@ -317,13 +314,8 @@ class BaseMap(BaseRunnable, ABC):
                 polygons.append(sidewalk["polygon"])
 
             for polygon in polygons:
-                points = [
-                    [
-                        int((x - center_p[0]) * pixels_per_meter + size / 2),
-                        int((y - center_p[1]) * pixels_per_meter) + size / 2
-                    ] for x, y in polygon
-                ]
-                cv2.fillPoly(mask, np.asarray([points]).astype(np.int32), color=[height])
+                points = points_to_pixels(polygon, center_p, pixels_per_meter, size)
+                cv2.fillPoly(mask, points, color=[height])
             if need_scale:
                 # Define a kernel. A 3x3 rectangle kernel
                 kernel = np.ones(((extension + 1) * pixels_per_meter, (extension + 1) * pixels_per_meter), np.uint8)
@@ -0,0 +1,202 @@
+"""
+Content-addressed on-disk cache of generated PG maps.
+
+An entry is keyed by the map seed, the map config and the global config values the block geometry depends on. It
+stores the block sequence of the map, so the map can be rebuilt with MapGenerateMethod.PG_MAP_FILE instead of searching
+a new one with BIG, together with the final lane and walkable-region polygons and the rasterized walkable mask used by
+the ORCA navigation. A rebuilt map is checked against the stored walkable-region polygons before the cached mask is
+used. Arrays are stored as .npy files and memory-mapped on access, so opening an entry only reads the small metadata
+file.
+
+Layout of an entry:
+    <cache_dir>/<key[:2]>/<key>/
+        meta.pkl                   block sequence and map config, as returned by PGMap.get_meta_data()
+        polygon_vertices.npy       (V, 2) float64 vertices of all polygons
+        polygon_index.pkl          {layer: [(polygon_id, start, end, other fields)]}
+        walkable_mask_<delta>.npy  (H, W, 3) uint8 walkable region mask, written by the navigation
+        mask_translate_<delta>.npy (2, ) translation from map coordinates to mask pixels
+"""
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+
+import numpy as np
+
+from metaurban.version import VERSION
+
+WALKABLE_LAYERS = (
+    "sidewalks", "crosswalks", "sidewalks_near_road", "sidewalks_farfrom_road", "sidewalks_near_road_buffer",
+    "sidewalks_farfrom_road_buffer", "valid_region"
+)
+
+# global config values read by PGBlock when building the block geometry, see PGBlock.__init__
+GEOMETRY_CONFIG_KEYS = ("crswalk_density", "sidewalk_type", "predefined_config")
+
+
+def _layer_polygons(polygons):
+    """
+    :param polygons: polygons of a layer, e.g. PGMap.sidewalks
+    :return: {polygon_id: ((K, 2) float64 vertices, other fields)}, without the polygons that have no vertices
+    """
+    ret = {}
+    for polygon_id, data in polygons.items():
+        if data.get("polygon") is None:
+            continue
+        polygon = np.asarray(data["polygon"], dtype=np.float64).reshape(-1, 2)
+        ret[polygon_id] = (polygon, {k: v for k, v in data.items() if k != "polygon"})
+    return ret
+
+
+def _atomic_save(path, array):
+    tmp_path = "{}.{}.tmp.npy".format(path[:-len(".npy")], os.getpid())
+    np.save(tmp_path, array)
+    os.replace(tmp_path, path)
+
+
+class PGMapCacheEntry:
+    """
+    One cached map. Everything is loaded lazily
+    """
+    def __init__(self, path):
+        self.path = path
+        self.key = os.path.basename(path)
+        self._meta = None
+        self._vertices = None
+        self._index = None
+
+    @property
+    def meta(self):
+        if self._meta is None:
+            with open(os.path.join(self.path, "meta.pkl"), "rb") as file:
+                self._meta = pickle.load(file)
+        return self._meta
+
+    def polygons(self, layer):
+        """
+        Polygons of one layer, in the same format as the attributes of PGMap, e.g. PGMap.sidewalks. Vertices are
+        read-only views of the memory-mapped vertex array
+        :param layer: "lanes" or one of WALKABLE_LAYERS
+        :return: {polygon_id: {"polygon": (K, 2) array, ...}}
+        """
+        if self._index is None:
+            with open(os.path.join(self.path, "polygon_index.pkl"), "rb") as file:
+                self._index = pickle.load(file)
+            self._vertices = np.load(os.path.join(self.path, "polygon_vertices.npy"), mmap_mode="r")
+        ret = {}
+        for polygon_id, start, end, fields in self._index.get(layer, []):
+            ret[polygon_id] = dict(fields, polygon=self._vertices[start:end])
+        return ret
+
+    def matches(self, pg_map):
+        """
+        Whether a map has the walkable-region polygons of this entry, which the cached walkable masks are rasterized
+        from. A map rebuilt from the entry should, unless the block generation changed without a change of the key
+        """
+        for layer in WALKABLE_LAYERS:
+            cached = self.polygons(layer)
+            polygons = _layer_polygons(getattr(pg_map, layer, {}))
+            if cached.keys() != polygons.keys():
+                return False
+            for polygon_id, (polygon, _) in polygons.items():
+                if not np.array_equal(cached[polygon_id]["polygon"], polygon):
+                    return False
+        return True
+
+    def walkable_mask(self, mask_delta):
+        """
+        :return: memory-mapped walkable mask and its translation, or None if the navigation has not stored it yet
+        """
+        mask_path = os.path.join(self.path, "walkable_mask_{}.npy".format(mask_delta))
+        translate_path = os.path.join(self.path, "mask_translate_{}.npy".format(mask_delta))
+        if not (os.path.exists(mask_path) and os.path.exists(translate_path)):
+            return None
+        return np.load(mask_path, mmap_mode="r"), np.load(translate_path)
+
+    def save_walkable_mask(self, mask_delta, walkable_mask, mask_translate):
+        _atomic_save(os.path.join(self.path, "mask_translate_{}.npy".format(mask_delta)), np.asarray(mask_translate))
+        _atomic_save(os.path.join(self.path, "walkable_mask_{}.npy".format(mask_delta)), np.asarray(walkable_mask))
+
+
+class PGMapCache:
+    """
+    Directory of PGMapCacheEntry. Several processes can share one cache directory, entries are written to a temporary
+    directory and renamed into place
+    """
+    def __init__(self, cache_dir):
+        self.cache_dir = os.path.abspath(os.path.expanduser(cache_dir))
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(seed, map_config, global_config=None, random_seed=None):
+        """
+        Content address of a map, changes with the seed, any map config value, the geometry related global config
+        values, the global random seed and the metaurban version
+        :param global_config: engine.global_config, only the values of GEOMETRY_CONFIG_KEYS are used
+        :param random_seed: engine.global_random_seed, with which blocks reseed the random generators
+        """
+        def to_dict(config):
+            return config.get_dict() if hasattr(config, "get_dict") else dict(config)
+
+        global_config = to_dict(global_config or {})
+        geometry_config = {k: global_config.get(k) for k in GEOMETRY_CONFIG_KEYS}
+        content = json.dumps(
+            {
+                "seed": seed,
+                "map_config": to_dict(map_config),
+                "geometry_config": geometry_config,
+                "random_seed": random_seed,
+                "version": VERSION
+            },
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def get(self, key):
+        path = self._path(key)
+        if not os.path.exists(os.path.join(path, "meta.pkl")):
+            return None
+        return PGMapCacheEntry(path)
+
+    def put(self, key, pg_map):
+        """
+        Store a generated map
+        :return: the new PGMapCacheEntry
+        """
+        layers = {"lanes": {str(lane.index): {"polygon": lane.polygon} for lane in pg_map.road_network.get_all_lanes()}}
+        for layer in WALKABLE_LAYERS:
+            layers[layer] = getattr(pg_map, layer, {})
+
+        vertices, index, count = [], {}, 0
+        for layer, polygons in layers.items():
+            index[layer] = []
+            for polygon_id, (polygon, fields) in _layer_polygons(polygons).items():
+                index[layer].append((polygon_id, count, count + len(polygon), fields))
+                vertices.append(polygon)
+                count += len(polygon)
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = tempfile.mkdtemp(prefix=key + ".", dir=os.path.dirname(path))
+        try:
+            np.save(
+                os.path.join(tmp_path, "polygon_vertices.npy"),
+                np.concatenate(vertices) if vertices else np.zeros((0, 2))
+            )
+            with open(os.path.join(tmp_path, "polygon_index.pkl"), "wb") as file:
+                pickle.dump(index, file)
+            with open(os.path.join(tmp_path, "meta.pkl"), "wb") as file:
+                pickle.dump(pg_map.get_meta_data(), file)
+            os.rename(tmp_path, path)
+        except OSError:
+            # another process stored the same map in the meantime
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            if self.get(key) is None:
+                raise
+        return PGMapCacheEntry(path)
@@ -12,6 +12,7 @@ from metaurban.utils.math import panda_vector
 from metaurban.utils.math import wrap_to_pi
 from metaurban.policy.orca_planner import OrcaPlanner
 import metaurban.policy.orca_planner_utils as orca_planner_utils
+import metaurban.policy.mask_processing as mask_processing
 import torch
 import numpy as np
 import os.path as osp
@@ -66,6 +67,10 @@ class ORCATrajectoryNavigation(BaseNavigation):
         vehicle_config=None
     ):
         self.mask_delta = 2
+        # the reference lane is built from position_list once per route, see reference_trajectory
+        self._position_list = []
+        self._reference_trajectory = None
+        self.reference_trajectory_builds = 0  # number of reference lanes built in the current episode
         self.sidewalks = {}
         self.crosswalks = {}
         self.walkable_regions_mask = None
@@ -166,6 +171,7 @@ class ORCATrajectoryNavigation(BaseNavigation):
         import numpy as np
         import cv2
         from shapely.geometry import Polygon
+        self.reference_trajectory_builds = 0
         if 'ref_traj_path' in self.engine.global_config and self.engine.global_config['ref_traj_path'] != '':
             import pickle
             position_list = pickle.load(open(self.engine.global_config['ref_traj_path'], 'rb'))
@@ -216,9 +222,7 @@ class ORCATrajectoryNavigation(BaseNavigation):
 
             positions = points[0]
             speeds = speed[0]
-            self.position_list = []
-            for p in positions:
-                self.position_list.append(self._to_block_coordinate(p[0]))
+            self.position_list = [self._to_block_coordinate(p[0]) for p in positions]
             self.engine.ref_time_length = time_length[0][0]
             self.init_speed = speeds[0][0]
             self.init_position = self._to_block_coordinate(positions[0][0])
@@ -235,14 +239,21 @@ class ORCATrajectoryNavigation(BaseNavigation):
             self.set_route()
 
     @property
-    def reference_trajectory(self):
+    def position_list(self):
+        return self._position_list
 
-        if not hasattr(self, 'position_list'):
-            self.position_list = []
-        elif len(self.position_list) > 0:
-            return self.get_idm_route(self.position_list)
+    @position_list.setter
+    def position_list(self, position_list):
+        # a new route, the reference lane is rebuilt on next access
+        self._position_list = position_list
+        self._reference_trajectory = None
 
-        return self.get_idm_route(self.position_list)
+    @property
+    def reference_trajectory(self):
+        if self._reference_trajectory is None:
+            self._reference_trajectory = self.get_idm_route(self.position_list)
+            self.reference_trajectory_builds += 1
+        return self._reference_trajectory
 
     def _to_block_coordinate(self, point_in_mask: object) -> object:
         point_in_block = point_in_mask - self.mask_translate
@@ -300,57 +311,17 @@ class ORCATrajectoryNavigation(BaseNavigation):
         return starts, goals
 
     def _random_points_new(self, map_mask, num, min_dis=5, generated_position=None):
-        import matplotlib.pyplot as plt
-        from scipy.signal import convolve2d
-        import random
-        from skimage import measure
         h, _ = map_mask.shape
-        import metaurban.policy.orca_planner_utils as orca_planner_utils
-        mylist, h, w = orca_planner_utils.mask_to_2d_list(map_mask)
-        contours = measure.find_contours(mylist, 0.5, positive_orientation='high')
-        flipped_contours = []
-        for contour in contours:
-            contour = orca_planner_utils.find_tuning_point(contour, h)
-            flipped_contours.append(contour)
-        int_points = []
-        for p in flipped_contours:
-            for m in p:
-                int_points.append((int(m[1]), int(m[0])))
-
-        def find_walkable_area(map_mask):
-            # kernel = np.array([[1,1,1,1,1],[1,1,1,1,1],[1,1,0,1,1],[1,1,1,1,1],[1,1,1,1,1]], dtype=np.uint8)
-            kernel = np.array([[1, 1, 1], [1, 0, 1], [1, 1, 1]], dtype=np.uint8)
-            conv_result = convolve2d(map_mask / 255, kernel, mode='same')
-            ct_pts = np.where(conv_result == 8)  #8, 24
-            ct_pts = list(zip(ct_pts[1], ct_pts[0]))
-            # print('Len Before:', len(ct_pts))
-            ct_pts = [c for c in ct_pts if c not in int_points]
-            # print('Len After:', len(ct_pts))
-            # plt.imshow(map_mask, cmap='gray'); plt.scatter([pt[0] for pt in ct_pts], [pt[1] for pt in ct_pts], color='red')
-            # plt.grid(True); plt.show()
-            return ct_pts
-
-        selected_pts = []
-        walkable_pts = find_walkable_area(map_mask)
+        geometry = orca_planner_utils.get_mask_geometry(map_mask)
+
+        walkable_pts = geometry.walkable_points
         if generated_position is not None:
-            dis_to_start = np.linalg.norm(
-                np.array([(x[0], h - 1 - x[1]) for x in walkable_pts]) - generated_position, axis=1
-            )
-            # print(dis_to_start[np.argsort(dis_to_start)[::-1]])
-            walkable_pts = np.array(walkable_pts)[np.argsort(dis_to_start)[::-1]][:int(len(walkable_pts) / 10)].tolist()
-        random.shuffle(walkable_pts)
-        if len(walkable_pts) < num:
-            raise ValueError(" Walkable points are less than spawn number! ")
-        try_time = 0
-        while len(selected_pts) < num:
-            # print(try_time)
-            if try_time > 10000:
-                raise ValueError("Try too many time to get valid humanoid points!")
-            cur_pt = random.choice(walkable_pts)
-            if all(math.dist(cur_pt, selected_pt) >= min_dis for selected_pt in selected_pts):
-                selected_pts.append(cur_pt)
-            try_time += 1
-        selected_pts = [(x[0], h - 1 - x[1]) for x in selected_pts]
+            # keep the 10% of points farthest from the start
+            flipped_pts = np.stack([walkable_pts[:, 0], h - 1 - walkable_pts[:, 1]], axis=1)
+            dis_to_start = np.linalg.norm(flipped_pts - generated_position, axis=1)
+            walkable_pts = walkable_pts[np.argsort(dis_to_start)[::-1]][:int(len(walkable_pts) / 10)]
+        selected_pts = mask_processing.sample_spaced_points(walkable_pts, num, min_dis)
+        selected_pts = [(x, h - 1 - y) for x, y in selected_pts]
         return selected_pts
 
     def _get_walkable_regions(self, current_map):
@@ -405,6 +376,12 @@ class ORCATrajectoryNavigation(BaseNavigation):
             # logger.info("Agents can walk on all regions")
             if hasattr(self.engine, 'walkable_regions_mask'):
                 return self.engine.walkable_regions_mask.copy(), self.engine.walkable_regions_mask
+            # the mask of a map rebuilt from the map cache is rasterized only once
+            cache_entry = getattr(current_map, "cache_entry", None)
+            cached_mask = cache_entry.walkable_mask(self.mask_delta) if cache_entry is not None else None
+            if cached_mask is not None:
+                walkable_regions_mask, self.mask_translate = np.array(cached_mask[0]), cached_mask[1]
+                return walkable_regions_mask.copy(), walkable_regions_mask
 
             self.crosswalks = current_map.crosswalks
             self.sidewalks = current_map.sidewalks
@@ -504,6 +481,8 @@ class ORCATrajectoryNavigation(BaseNavigation):
                 
             walkable_regions_mask = cv2.flip(walkable_regions_mask, 0)  ### flip for orca   ######
             start_end_regions_mask = walkable_regions_mask.copy()
+            if cache_entry is not None:
+                cache_entry.save_walkable_mask(self.mask_delta, walkable_regions_mask, self.mask_translate)
         else:
             # logger.info("Agents are expected to walk on main sidewalks and crosswalks, not all regions")
             self.crosswalks = current_map.crosswalks
@@ -755,6 +734,7 @@ class ORCATrajectoryNavigation(BaseNavigation):
         self.final_lane = None
         self._current_lane = None
         # self.reference_trajectory = None
+        self._reference_trajectory = None
         super(ORCATrajectoryNavigation, self).destroy()
 
     def before_reset(self):
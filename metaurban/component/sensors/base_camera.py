@@ -130,7 +130,12 @@ class BaseCamera(ImageBuffer, BaseSensor):
         self.cam.setHpr(*hpr)
 
     def perceive(
-        self, to_float=True, new_parent_node: Union[NodePath, None] = None, position=None, hpr=None
+        self,
+        to_float=True,
+        new_parent_node: Union[NodePath, None] = None,
+        position=None,
+        hpr=None,
+        out=None
     ) -> np.ndarray:
         """
         When to_float is set to False, the image will be represented by unit8 with component value ranging from [0-255].
@@ -156,6 +161,8 @@ class BaseCamera(ImageBuffer, BaseSensor):
                 have to be set as well. The position and hpr are all 3-dim vector representing:
             position: the relative position to the reparent node
             hpr: the heading/pitch/roll of the sensor
+            out: a preallocated float32 or uint8 array of the image shape, e.g. a slot of a frame stack. When it is set,
+                the image is written into it instead of a new array
 
         Return:
             Array representing the image.
@@ -203,12 +210,20 @@ class BaseCamera(ImageBuffer, BaseSensor):
             self.cam.reparentTo(original_object)
             self.cam.setHpr(original_hpr)
             self.cam.setPos(original_position)
-        return self._format(ret, to_float)
+        return self._format(ret, to_float, out)
 
-    def _format(self, ret, to_float):
+    def _format(self, ret, to_float, out=None):
         """
         Format the image to the desired type, float32 or uint8
         """
+        if out is not None:
+            if self.enable_cuda:
+                out[...] = self._format(ret, to_float)
+            elif to_float:
+                np.divide(ret, 255, out=out)
+            else:
+                out[...] = ret
+            return out
         if not to_float:
             return ret.astype(np.uint8, copy=False, order="C")
         else:
@@ -134,9 +134,7 @@ class DepthCamera(BaseCamera):
         Returns:
 
         """
-        origin_img = self.depth_tex
-        img = np.frombuffer(origin_img.getRamImage().getData(), dtype=np.float32)
-        img = img.reshape((origin_img.getYSize(), origin_img.getXSize(), -1))
+        img = self.ram_image_array(self.depth_tex, dtype=np.float32)
         img = img[..., :self.num_channels]
         assert img.shape[-1] == 1
         img = img[::-1]
@@ -181,11 +179,17 @@ class DepthCamera(BaseCamera):
             self.quad.removeNode()
         super(DepthCamera, self).remove_display_region()
 
-    def _format(self, ret, to_float):
+    def _format(self, ret, to_float, out=None):
         if self.enable_cuda:
-            return super()._format(ret, to_float)
+            return super()._format(ret, to_float, out)
 
         # else
+        if out is not None:
+            if to_float:
+                out[...] = ret
+            else:
+                np.multiply(ret, 255, out=out, casting="unsafe")
+            return out
         if not to_float:
             ret = (ret * 255).astype(np.uint8)
         return ret
@@ -8,9 +8,10 @@ from metaurban.constants import CamMask, CollisionGroup
 from metaurban.engine.asset_loader import AssetLoader
 from metaurban.engine.logger import get_logger
 from metaurban.utils.coordinates_shift import panda_vector
-from metaurban.utils.math import panda_vector, get_laser_end
+from metaurban.utils.math import panda_vector
 
 detect_result = namedtuple("detect_result", "cloud_points detected_objects")
+batch_detect_result = namedtuple("batch_detect_result", "cloud_points hit_ids hit_nodes detected_objects")
 
 logger = get_logger()
 
@@ -24,65 +25,116 @@ def add_cloud_point_vis(
     return laser_index, (point_x, point_y, height), (f * MARK_COLOR0, f * MARK_COLOR1, f * MARK_COLOR2)
 
 
-def perceive(
-    cloud_points, detector_mask, mask, lidar_range, perceive_distance, heading_theta, vehicle_position_x,
-    vehicle_position_y, num_lasers, height, physics_world, extra_filter_node, require_colors, ANGLE_FACTOR, MARK_COLOR0,
-    MARK_COLOR1, MARK_COLOR2
+def get_laser_ends(lidar_range, perceive_distance, heading_thetas, positions):
+    """
+    End points of all lasers of all agents
+    :param lidar_range: (L,) laser angles relative to the agent heading
+    :param perceive_distance: laser length
+    :param heading_thetas: (A,) agent headings
+    :param positions: (A, 2) agent positions
+    :return: (A, L, 2) laser end points
+    """
+    angles = np.asarray(lidar_range)[None, :] + np.asarray(heading_thetas, dtype=float)[:, None]
+    positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+    laser_ends = np.empty(angles.shape + (2, ))
+    laser_ends[..., 0] = perceive_distance * np.cos(angles) + positions[:, 0:1]
+    laser_ends[..., 1] = perceive_distance * np.sin(angles) + positions[:, 1:2]
+    return laser_ends
+
+
+def get_cloud_point_vis(cloud_points, laser_ends, positions, height, ANGLE_FACTOR, MARK_COLOR):
+    """
+    Visualization points of a batch, in the format of add_cloud_point_vis. The hit position of a laser is interpolated
+    with its hit fraction, as bullet does
+    :return: for each agent, a list of (laser_index, point, color)
+    """
+    num_lasers = cloud_points.shape[1]
+    starts = np.asarray(positions, dtype=float).reshape(-1, 1, 2)
+    points = starts + cloud_points[..., None] * (laser_ends - starts)
+    f = np.arange(num_lasers) / num_lasers if ANGLE_FACTOR else np.ones((num_lasers, ))
+    colors = [tuple(c) for c in ((f * 0.9 + 0.1)[:, None] * np.asarray(MARK_COLOR)).tolist()]
+    return [
+        [(laser_index, (x, y, height), colors[laser_index]) for laser_index, (x, y) in enumerate(agent_points)]
+        for agent_points in points.tolist()
+    ]
+
+
+def batch_perceive(
+    cloud_points, hit_ids, laser_ends, positions, height, detector_masks, mask, physics_world, extra_filter_nodes
 ):
+    """
+    Cast the lasers of several agents in one pass. Results are written into the preallocated cloud_points and hit_ids
+    buffers, lasers disabled by the detector mask are skipped and keep hit fraction 1.0 and hit id -1
+    :param cloud_points: (A, L) float buffer for the hit fractions
+    :param hit_ids: (A, L) int buffer for the index of the hit node in the returned hit_nodes, -1 for no hit
+    :param laser_ends: (A, L, 2) laser end points, see get_laser_ends
+    :param positions: (A, 2) agent positions, i.e. the laser start points
+    :param height: laser height
+    :param detector_masks: None, or a list of A (L,) bool arrays or None, lasers to cast for each agent
+    :param mask: collision mask of the rays
+    :param physics_world: bullet world to cast the rays in
+    :param extra_filter_nodes: list of A node sets, hits on these nodes are ignored, e.g. the agent itself
+    :return: list of hit nodes, and for each agent the list of ray results that hit something
+    """
     cloud_points.fill(1.0)
+    hit_ids.fill(-1)
+    hit_nodes = []
+    node_ids = {}
     detected_objects = []
-    colors = []
-    pg_start_position = panda_vector(vehicle_position_x, vehicle_position_y, height)
-
-    for laser_index in range(num_lasers):
-        if (detector_mask is not None) and (not detector_mask[laser_index]):
-            # update vis
-            if require_colors:
-                point_x, point_y = get_laser_end(
-                    lidar_range, perceive_distance, laser_index, heading_theta, vehicle_position_x, vehicle_position_y
-                )
-                point_x, point_y, point_z = panda_vector(point_x, point_y, height)
-                colors.append(
-                    add_cloud_point_vis(
-                        point_x, point_y, height, num_lasers, laser_index, ANGLE_FACTOR, MARK_COLOR0, MARK_COLOR1,
-                        MARK_COLOR2
-                    )
-                )
-            continue
-
-        # # coordinates problem here! take care
-        point_x, point_y = get_laser_end(
-            lidar_range, perceive_distance, laser_index, heading_theta, vehicle_position_x, vehicle_position_y
-        )
-        laser_end = panda_vector(point_x, point_y, height)
-        result = physics_world.rayTestClosest(pg_start_position, laser_end, mask)
-        node = result.getNode()
-        if node in extra_filter_node:
-            # Fall back to all tests.
-            results = physics_world.rayTestAll(pg_start_position, laser_end, mask)
-            hits = results.getHits()
-            hits = sorted(hits, key=lambda ret: ret.getHitFraction())
-            for result in hits:
-                if result.getNode() in extra_filter_node:
+    num_lasers = cloud_points.shape[1]
+    for agent_index, ((start_x, start_y), ends) in enumerate(zip(np.asarray(positions).tolist(), laser_ends.tolist())):
+        start = panda_vector(start_x, start_y, height)
+        detector_mask = detector_masks[agent_index] if detector_masks is not None else None
+        lasers = range(num_lasers) if detector_mask is None else np.flatnonzero(detector_mask).tolist()
+        extra_filter_node = extra_filter_nodes[agent_index]
+        agent_cloud_points = cloud_points[agent_index]
+        agent_hit_ids = hit_ids[agent_index]
+        agent_detected_objects = []
+        for laser_index in lasers:
+            laser_end = panda_vector(ends[laser_index][0], ends[laser_index][1], height)
+            result = physics_world.rayTestClosest(start, laser_end, mask)
+            node = result.getNode()
+            if node in extra_filter_node:
+                # Fall back to all tests.
+                hits = physics_world.rayTestAll(start, laser_end, mask).getHits()
+                result = None
+                for hit in sorted(hits, key=lambda ret: ret.getHitFraction()):
+                    if hit.getNode() not in extra_filter_node:
+                        result = hit
+                        break
+                if result is None:
                     continue
-                detected_objects.append(result)
-                cloud_points[laser_index] = result.getHitFraction()
-                laser_end = result.getHitPos()
-                break
-        else:
-            cloud_points[laser_index] = result.getHitFraction()
-            if result.hasHit():
-                laser_end = result.getHitPos()
+                node = result.getNode()
+            agent_cloud_points[laser_index] = result.getHitFraction()
             if node:
-                detected_objects.append(result)
-        if require_colors:
-            colors.append(
-                add_cloud_point_vis(
-                    laser_end[0], laser_end[1], height, num_lasers, laser_index, ANGLE_FACTOR, MARK_COLOR0, MARK_COLOR1,
-                    MARK_COLOR2
-                )
-            )
-    return cloud_points, detected_objects, colors
+                agent_detected_objects.append(result)
+                if node not in node_ids:
+                    node_ids[node] = len(hit_nodes)
+                    hit_nodes.append(node)
+                agent_hit_ids[laser_index] = node_ids[node]
+        detected_objects.append(agent_detected_objects)
+    return hit_nodes, detected_objects
+
+
+def perceive(
+    cloud_points, detector_mask, mask, lidar_range, perceive_distance, heading_theta, vehicle_position_x,
+    vehicle_position_y, num_lasers, height, physics_world, extra_filter_node, require_colors, ANGLE_FACTOR, MARK_COLOR0,
+    MARK_COLOR1, MARK_COLOR2
+):
+    """
+    Single agent version of batch_perceive
+    """
+    positions = np.array([[vehicle_position_x, vehicle_position_y]], dtype=float)
+    laser_ends = get_laser_ends(lidar_range[:num_lasers], perceive_distance, [heading_theta], positions)
+    batch_cloud_points = cloud_points.reshape(1, num_lasers)
+    _, detected_objects = batch_perceive(
+        batch_cloud_points, np.empty((1, num_lasers), dtype=np.int64), laser_ends, positions, height, [detector_mask],
+        mask, physics_world, [extra_filter_node]
+    )
+    colors = get_cloud_point_vis(
+        batch_cloud_points, laser_ends, positions, height, ANGLE_FACTOR, (MARK_COLOR0, MARK_COLOR1, MARK_COLOR2)
+    )[0] if require_colors else []
+    return cloud_points, detected_objects[0], colors
 
 
 class DistanceDetector(BaseSensor):
@@ -114,6 +166,9 @@ class DistanceDetector(BaseSensor):
         ) if AssetLoader.loader is not None else None
         self.logger.debug("Load Vehicle Module: {}".format(self.__class__.__name__))
         self._current_frame = None
+        # reused output buffers of perceive_batch
+        self._cloud_points_buffer = np.ones((0, 0), dtype=float)
+        self._hit_ids_buffer = np.full((0, 0), -1, dtype=np.int64)
 
     def perceive(
         self,
@@ -143,7 +198,7 @@ class DistanceDetector(BaseSensor):
             height=height,
             physics_world=physics_world,
             extra_filter_node=extra_filter_node if extra_filter_node else set(),
-            require_colors=self.cloud_points_vis is not None,
+            require_colors=show and self.cloud_points_vis is not None,
             ANGLE_FACTOR=self.ANGLE_FACTOR,
             MARK_COLOR0=self.MARK_COLOR[0],
             MARK_COLOR1=self.MARK_COLOR[1],
@@ -151,14 +206,62 @@ class DistanceDetector(BaseSensor):
         )
 
         if show and self.cloud_points_vis is not None:
-            colors = colors + colors[:1]
-            if self._current_frame != self.engine.episode_step:
-                self.cloud_points_vis.reset()
-            self._current_frame = self.engine.episode_step
-            self.cloud_points_vis.draw_lines([[p[1] for p in colors]], [[LVecBase4(*p[-1], 1) for p in colors[1:]]])
+            self._draw_cloud_points(colors)
 
         return detect_result(cloud_points=cloud_points.tolist(), detected_objects=detected_objects)
 
+    def perceive_batch(
+        self, base_vehicles, physics_world, num_lasers, distance, height=None, detector_masks=None, show=False
+    ):
+        """
+        Same as perceive, but for several agents sharing this sensor config at once. All lasers are cast in one pass
+        and written into buffers owned by the sensor, so the returned arrays are overwritten by the next call
+        :param base_vehicles: list of A agents
+        :param detector_masks: None, or a list of A (num_lasers,) bool arrays or None
+        :return: batch_detect_result with (A, num_lasers) cloud_points and hit_ids, the list of hit nodes that hit_ids
+        index into, and for each agent the list of ray results that hit something
+        """
+        height = height or self.DEFAULT_HEIGHT
+        num_agents = len(base_vehicles)
+        if self._cloud_points_buffer.shape != (num_agents, num_lasers):
+            self._cloud_points_buffer = np.ones((num_agents, num_lasers), dtype=float)
+            self._hit_ids_buffer = np.full((num_agents, num_lasers), -1, dtype=np.int64)
+        positions = np.array([v.position for v in base_vehicles], dtype=float).reshape(-1, 2)
+        laser_ends = get_laser_ends(
+            self._get_lidar_range(num_lasers, self.start_phase_offset), distance,
+            [v.heading_theta for v in base_vehicles], positions
+        )
+        hit_nodes, detected_objects = batch_perceive(
+            cloud_points=self._cloud_points_buffer,
+            hit_ids=self._hit_ids_buffer,
+            laser_ends=laser_ends,
+            positions=positions,
+            height=height,
+            detector_masks=detector_masks,
+            mask=self.mask,
+            physics_world=physics_world,
+            extra_filter_nodes=[set(v.dynamic_nodes) for v in base_vehicles]
+        )
+
+        if show and self.cloud_points_vis is not None:
+            for colors in get_cloud_point_vis(self._cloud_points_buffer, laser_ends, positions, height,
+                                              self.ANGLE_FACTOR, self.MARK_COLOR):
+                self._draw_cloud_points(colors)
+
+        return batch_detect_result(
+            cloud_points=self._cloud_points_buffer,
+            hit_ids=self._hit_ids_buffer,
+            hit_nodes=hit_nodes,
+            detected_objects=detected_objects
+        )
+
+    def _draw_cloud_points(self, colors):
+        colors = colors + colors[:1]
+        if self._current_frame != self.engine.episode_step:
+            self.cloud_points_vis.reset()
+        self._current_frame = self.engine.episode_step
+        self.cloud_points_vis.draw_lines([[p[1] for p in colors]], [[LVecBase4(*p[-1], 1) for p in colors[1:]]])
+
     def destroy(self):
         if self.cloud_points_vis:
             self.cloud_points_vis.removeNode()
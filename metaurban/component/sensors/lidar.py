@@ -10,9 +10,48 @@ from metaurban.component.sensors.distance_detector import DistanceDetector
 from metaurban.constants import CamMask, CollisionGroup
 from metaurban.utils.coordinates_shift import panda_vector
 from metaurban.utils.math import norm, clip
+from metaurban.utils.spatial_hash import SpatialHash
 from metaurban.utils.utils import get_object_from_node
 
 
+def get_lidar_mask(position, heading_theta, object_positions, half_spans, num_lasers):
+    """
+    Lasers that can hit any of the given objects, i.e. whose angle is within the angular span of an object seen from
+    position. Same result as marking each object with Lidar._mark_this_range, for all objects at once
+    :param position: 2d position of the lidar
+    :param heading_theta: heading of the lidar
+    :param object_positions: (K, 2) object centers
+    :param half_spans: (K,) radius of a circle around each center covering the object
+    :param num_lasers: number of lasers
+    :return: (num_lasers,) bool mask
+    """
+    object_positions = np.asarray(object_positions, dtype=float).reshape(-1, 2)
+    half_max_span_square = np.asarray(half_spans, dtype=float)**2
+    diff = object_positions - np.asarray(position, dtype=float)[:2]
+    dist_square = diff[:, 0]**2 + diff[:, 1]**2
+    if np.any(dist_square < half_max_span_square):
+        return np.ones((num_lasers, ), dtype=bool)
+    if len(object_positions) == 0 or num_lasers <= 0:
+        return np.zeros((num_lasers, ), dtype=bool)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        span = np.arcsin(np.sqrt(half_max_span_square / dist_square))
+    # relative heading of each object's center when compared to the lidar's heading
+    head_in_1 = np.arctan2(diff[:, 1], diff[:, 0]) - heading_theta
+    small_angle = np.rad2deg(head_in_1 - span) % 360
+    large_angle = np.rad2deg(head_in_1 + span) % 360
+    angle_delta = 360 / num_lasers
+    small_index = np.floor(small_angle / angle_delta)[:, None]
+    large_index = np.ceil(large_angle / angle_delta)[:, None]
+    lasers = np.arange(num_lasers)[None, :]
+    # a span crossing 0 deg, e.g. from 355 to 5, covers both ends of the laser array
+    covered = np.where(
+        (large_angle < small_angle)[:, None], (lasers >= small_index) | (lasers <= large_index),
+        (lasers >= small_index) & (lasers <= large_index)
+    )
+    return covered.any(axis=0)
+
+
 class Lidar(DistanceDetector):
     ANGLE_FACTOR = True
     Lidar_point_cloud_obs_dim = 240
@@ -20,6 +59,12 @@ class Lidar(DistanceDetector):
 
     BROAD_PHASE_EXTRA_DIST = 0
 
+    # default of the lidar_spatial_hash config: find surrounding objects in a spatial hash of the spawned objects
+    # instead of a bullet contact test. The hash finds objects by their center and a covering circle, so it may return
+    # a few more objects than the contact test
+    BROAD_PHASE_SPATIAL_HASH = False
+    SPATIAL_HASH_CELL_SIZE = 20
+
     _disable_detector_mask = False
 
     def __init__(self, engine):
@@ -30,6 +75,13 @@ class Lidar(DistanceDetector):
 
         # lidar can calculate the detector mask by itself
         self.broad_detectors = {}
+        self.broad_phase_spatial_hash = engine.global_config.get("lidar_spatial_hash", self.BROAD_PHASE_SPATIAL_HASH)
+        self._spatial_hash = SpatialHash(self.SPATIAL_HASH_CELL_SIZE)
+        # object id -> (object, static), static objects are not re-inserted until the next episode
+        self._hashed_objects = {}
+        self._spatial_hash_frame = None
+        # agent id -> (perceive arguments, cloud points, detected objects), filled by prefetch
+        self._prefetched = {}
 
     def get_broad_phase_detector(self, radius):
         radius = int(radius)
@@ -56,6 +108,9 @@ class Lidar(DistanceDetector):
         detector_mask: np.ndarray = None,
         show=False
     ):
+        prefetched = self._prefetched.pop(base_vehicle.id, None)
+        if prefetched is not None and detector_mask is None and prefetched[0] == (num_lasers, distance, height):
+            return prefetched[1], prefetched[2]
         res = self._get_lidar_mask(base_vehicle, num_lasers, distance)
         if self.enable_mask:
             lidar_mask = detector_mask or res[0]
@@ -72,6 +127,49 @@ class Lidar(DistanceDetector):
             show=show
         )[0], detected_objects
 
+    def perceive_batch(
+        self, base_vehicles, physics_world, num_lasers, distance, height=None, detector_masks=None, show=False
+    ):
+        """
+        Batched perceive for all agents using this lidar config. The detected_objects of the result are the objects
+        found by each agent's broad phase detector, as in perceive
+        """
+        if self.enable_mask:
+            lidar_masks, surrounding_objects = [], []
+            for index, vehicle in enumerate(base_vehicles):
+                lidar_mask, objs = self._get_lidar_mask(vehicle, num_lasers, distance)
+                if detector_masks is not None and detector_masks[index] is not None:
+                    lidar_mask = detector_masks[index]
+                lidar_masks.append(lidar_mask)
+                surrounding_objects.append(objs)
+        else:
+            lidar_masks = None
+            surrounding_objects = [self.get_surrounding_objects(vehicle, int(distance)) for vehicle in base_vehicles]
+        result = super(Lidar, self).perceive_batch(
+            base_vehicles,
+            physics_world,
+            num_lasers=num_lasers,
+            distance=distance,
+            height=height,
+            detector_masks=lidar_masks,
+            show=show
+        )
+        return result._replace(detected_objects=surrounding_objects)
+
+    def prefetch(self, base_vehicles, physics_world, num_lasers, distance, height=None, show=False):
+        """
+        Perceive for several agents in one perceive_batch call. The next perceive call of each of these agents with the
+        same num_lasers, distance and height returns its part of the batch instead of casting its lasers again
+        """
+        result = self.perceive_batch(
+            base_vehicles, physics_world, num_lasers=num_lasers, distance=distance, height=height, show=show
+        )
+        for vehicle, cloud_points, detected_objects in zip(base_vehicles, result.cloud_points, result.detected_objects):
+            self._prefetched[vehicle.id] = ((num_lasers, distance, height), cloud_points.tolist(), detected_objects)
+
+    def clear_prefetched(self):
+        self._prefetched = {}
+
     @staticmethod
     def get_surrounding_vehicles(detected_objects) -> Set:
         from metaurban.component.vehicle.base_vehicle import BaseVehicle
@@ -138,36 +236,23 @@ class Lidar(DistanceDetector):
         return res
 
     def _get_lidar_mask(self, vehicle, num_lasers, radius):
-        pos1 = vehicle.position
-        head1 = vehicle.heading_theta
-
-        mask = np.zeros((num_lasers, ), dtype=bool)
-        mask.fill(False)
         objs = self.get_surrounding_objects(vehicle, int(radius))
+        positions = [obj.position for obj in objs]
+        half_spans = []
         for obj in objs:
-            pos2 = obj.position
-            length = obj.LENGTH if hasattr(obj, "LENGTH") else vehicle.LENGTH
-            width = obj.WIDTH if hasattr(obj, "WIDTH") else vehicle.WIDTH
-            half_max_span_square = ((length + width) / 2)**2
-            diff = (pos2[0] - pos1[0], pos2[1] - pos1[1])
-            dist_square = diff[0]**2 + diff[1]**2
-            if dist_square < half_max_span_square:
-                mask.fill(True)
-                continue
-
-            span = math.asin(math.sqrt(half_max_span_square / dist_square))
-            # relative heading of v2's center when compared to v1's center
-            relative_head = math.atan2(diff[1], diff[0])
-            head_in_1 = relative_head - head1
-            head_in_1_max = head_in_1 + span
-            head_in_1_min = head_in_1 - span
-            head_1_max = np.rad2deg(head_in_1_max)
-            head_1_min = np.rad2deg(head_in_1_min)
-            mask = self._mark_this_range(head_1_min, head_1_max, mask, num_lasers)
-
+            length = getattr(obj, "LENGTH", vehicle.LENGTH)
+            width = getattr(obj, "WIDTH", vehicle.WIDTH)
+            half_spans.append((length + width) / 2)
+        mask = get_lidar_mask(vehicle.position, vehicle.heading_theta, positions, half_spans, num_lasers)
         return mask, objs
 
     def get_surrounding_objects(self, vehicle, radius=50):
+        if self.broad_phase_spatial_hash:
+            self._update_spatial_hash()
+            keys, _, _ = self._spatial_hash.query(vehicle.position, self.BROAD_PHASE_EXTRA_DIST + int(radius))
+            objs = set(self._hashed_objects[key][0] for key in keys)
+            objs.discard(vehicle)
+            return objs
         broad_detector = self.get_broad_phase_detector(int(radius))
         broad_detector.setPos(panda_vector(vehicle.position))
         physics_world = vehicle.engine.physics_world.dynamic_world
@@ -185,6 +270,39 @@ class Lidar(DistanceDetector):
             objs.remove(vehicle)
         return objs
 
+    def _update_spatial_hash(self):
+        """
+        Bring the spatial hash up to date with the spawned objects, once per engine step. Objects with a static body
+        are inserted once per episode
+        """
+        frame = (self.engine.episode_step, getattr(self.engine, "_episode_start_time", None))
+        if frame == self._spatial_hash_frame:
+            return
+        if self._spatial_hash_frame is None or frame[1] != self._spatial_hash_frame[1]:
+            # new episode, objects may have been reset to new places
+            self._spatial_hash.clear()
+            self._hashed_objects.clear()
+        self._spatial_hash_frame = frame
+
+        objects = self.engine.get_objects()
+        for key in [key for key, (obj, _) in self._hashed_objects.items() if objects.get(key) is not obj]:
+            self._spatial_hash.remove(key)
+            self._hashed_objects.pop(key)
+        for key, obj in objects.items():
+            hashed = self._hashed_objects.get(key)
+            if hashed is not None and hashed[1]:
+                continue
+            if len(obj.dynamic_nodes) == 0:
+                continue
+            if hashed is None:
+                try:
+                    static = obj.body.isStatic()
+                except Exception:
+                    static = False
+                self._hashed_objects[key] = (obj, static)
+            extent = (obj.LENGTH + obj.WIDTH) / 2 if hasattr(obj, "LENGTH") and hasattr(obj, "WIDTH") else 0.0
+            self._spatial_hash.update(key, obj.position, extent)
+
     def _mark_this_range(self, small_angle, large_angle, mask, num_lasers):
         # We use clockwise to determine small and large angle.
         # For example, if you wish to fill 355 deg to 5 deg, then small_angle is 355, large_angle is 5.
@@ -206,6 +324,9 @@ class Lidar(DistanceDetector):
         return mask
 
     def destroy(self):
+        self._spatial_hash.clear()
+        self._hashed_objects.clear()
+        self._prefetched.clear()
         for detector in self.broad_detectors.values():
             self.engine.physics_world.static_world.remove(detector.node())
             detector.removeNode()
@@ -20,6 +20,32 @@ class PointCloudLidar(DepthCamera):
             raise ValueError("LiDAR does not support CUDA acceleration for now. Ask for support if you need it.")
         super(PointCloudLidar, self).__init__(width, height, engine, cuda=False)
         self.ego_centric = ego_centric
+        self._camera_rays = None
+        self._camera_rays_key = None
+
+    def camera_rays(self, camera_intrinsics, height, width):
+        """
+        Rays of the pixels in the camera coordinate system, i.e. the 3D points of unit depth, with the (u, v) pixel grid
+        of simulate_lidar_from_depth(). They are recomputed only when the lens or the image size change
+        :param height: height of the depth image, i.e. depth.shape[0]
+        :param width: width of the depth image, i.e. depth.shape[1]
+        """
+        key = (camera_intrinsics.tobytes(), height, width)
+        if key != self._camera_rays_key:
+            # simulate_lidar_from_depth() transposes the depth image, so its grid has the image width as height
+            self._camera_rays = self.pixel_rays(camera_intrinsics, width, height)
+            self._camera_rays_key = key
+        return self._camera_rays
+
+    @staticmethod
+    def pixel_rays(camera_intrinsics, height, width):
+        """
+        Rays of a (height, width) pixel grid, where height and width are those of the transposed depth image
+        """
+        u, v = np.meshgrid(np.arange(width), np.arange(height))
+        uv_coords = np.stack([u, v, np.ones_like(u)], axis=-1).reshape(-1, 3)
+        rays = (np.linalg.inv(camera_intrinsics) @ uv_coords.T).T
+        return rays[..., [2, 1, 0]]
 
     def get_rgb_array_cpu(self):
         """
@@ -45,11 +71,12 @@ class PointCloudLidar(DepthCamera):
         if not self.ego_centric:
             translation = np.asarray(self.engine.render.get_relative_point(self.cam, Point3(0, 0, 0)))
         z_eye = 2 * n * f / ((f + n) - (2 * depth - 1) * (f - n))
-        points = self.simulate_lidar_from_depth(z_eye.squeeze(-1), intrinsics, translation, rotation_matrix)
+        rays = self.camera_rays(intrinsics, depth.shape[0], depth.shape[1])
+        points = self.simulate_lidar_from_depth(z_eye.squeeze(-1), intrinsics, translation, rotation_matrix, rays)
         return points
 
     @staticmethod
-    def simulate_lidar_from_depth(depth_img, camera_intrinsics, camera_translation, camera_rotation):
+    def simulate_lidar_from_depth(depth_img, camera_intrinsics, camera_translation, camera_rotation, camera_rays=None):
         """
         Simulate LiDAR points in the world coordinate system from a depth image.
 
@@ -58,6 +85,7 @@ class PointCloudLidar(DepthCamera):
             camera_intrinsics (np.ndarray): Camera intrinsic matrix of shape (3, 3).
             camera_translation (np.ndarray): Translation vector of the camera in world coordinates of shape (3,).
             camera_rotation (np.ndarray): Rotation matrix of the camera in world coordinates of shape (3, 3).
+            camera_rays (np.ndarray): Optional pixel rays from pixel_rays(), which are computed if not given.
 
         Returns:
             np.ndarray: LiDAR points in the world coordinate system of shape (N, 3), where N is the number of valid points.
@@ -68,24 +96,16 @@ class PointCloudLidar(DepthCamera):
         depth_img = depth_img[::-1, ::-1]
         height, width = depth_img.shape
 
-        # Create a grid of pixel coordinates (u, v)
-        u, v = np.meshgrid(np.arange(width), np.arange(height))
-        uv_coords = np.stack([u, v, np.ones_like(u)], axis=-1)  # Shape: (H, W, 3)
-
-        # Reshape to (H*W, 3) for easier matrix multiplication
-        uv_coords = uv_coords.reshape(-1, 3)
-
-        # Invert the camera intrinsic matrix to project pixels to camera coordinates
-        K_inv = np.linalg.inv(camera_intrinsics)
+        # Project the pixel grid (u, v) to camera coordinates, with the axes reordered to (z, y, x)
+        if camera_rays is None:
+            camera_rays = PointCloudLidar.pixel_rays(camera_intrinsics, height, width)
 
-        # Compute 3D points in the camera coordinate system
-        cam_coords = (K_inv @ uv_coords.T).T  # Shape: (H*W, 3)
-        cam_coords *= depth_img.reshape(-1)[..., None]  # Scale by depth
+        # Compute 3D points in the camera coordinate system, shape: (H*W, 3)
+        cam_coords = camera_rays * depth_img.reshape(-1)[..., None]  # Scale by depth
 
         # Remove invalid points (e.g., depth = 0)
         # valid_mask = depth_img.flatten() > 0
         # cam_coords = cam_coords[valid_mask]
-        cam_coords = cam_coords[..., [2, 1, 0]]
 
         # Transform points to the world coordinate system
         world_coords = (camera_rotation @ cam_coords.T).T + camera_translation
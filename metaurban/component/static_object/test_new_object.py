@@ -11,6 +11,7 @@ from metaurban.constants import CollisionGroup
 from metaurban.constants import MetaUrbanType
 from metaurban.constants import MetaUrbanType, Semantics
 from metaurban.engine.asset_loader import AssetLoader
+from metaurban.engine.core.model_template_cache import ModelTemplateCache
 from metaurban.engine.engine_utils import get_engine, engine_initialized
 from metaurban.engine.physics_node import BaseRigidBodyNode
 from metaurban.constants import PGDrivableAreaProperty
@@ -21,12 +22,23 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def get_model_template_cache():
+    """
+    The model template cache shared by all sidewalk assets, created with the memory budget in the engine config
+    """
+    if TestObject.model_template_cache is None:
+        budget = get_engine().global_config.get("model_template_cache_size", 512)
+        TestObject.model_template_cache = ModelTemplateCache(budget * 1024 * 1024)
+    return TestObject.model_template_cache
+
+
 class TestObject(TrafficObject):
     """A barrier"""
 
     # HEIGHT = 2.0
     # MASS = 10
     CLASS_NAME = "TestObject"
+    model_template_cache = None
 
     def __init__(
         self, asset_metainfo, position, heading_theta, lane=None, static: bool = False, random_seed=None, name=None
@@ -80,11 +92,9 @@ class TestObject(TrafficObject):
         if self.render:
             # model_file_path1 = AssetLoader.file_path("models", "test", "stop sign-8be31e33b3df4d6db7c75730ff11dfd8.glb")
             model_file_path2 = AssetLoader.file_path("models", "test", self.filename)
-            model = self.loader.loadModel(model_file_path2)
-            model.setH(self.hshift)
-            model.setPos(self.pos0, self.pos1, self.pos2)
-            model.setScale(self.scale)
-            model.reparentTo(self.origin)
+            get_model_template_cache().instance_to(
+                self.loader, self.origin, model_file_path2, self.hshift, (self.pos0, self.pos1, self.pos2), self.scale
+            )
 
     def _create_building_chassis(self):
         shape = BulletBoxShape(Vec3(self.LENGTH / 2, self.WIDTH / 2, self.HEIGHT / 2))
@@ -176,11 +186,9 @@ class TestGLTFObject(TrafficObject):
         if self.render:
             # model_file_path1 = AssetLoader.file_path("models", "test", "stop sign-8be31e33b3df4d6db7c75730ff11dfd8.glb")
             model_file_path2 = AssetLoader.file_path("models", "test", self.foldername, self.filename)
-            model = self.loader.loadModel(model_file_path2)
-            model.setH(self.hshift)
-            model.setPos(self.pos0, self.pos1, self.pos2)
-            model.setScale(self.scale)
-            model.reparentTo(self.origin)
+            get_model_template_cache().instance_to(
+                self.loader, self.origin, model_file_path2, self.hshift, (self.pos0, self.pos1, self.pos2), self.scale
+            )
 
     @property
     def LENGTH(self):
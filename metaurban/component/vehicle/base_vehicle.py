@@ -19,6 +19,7 @@ from metaurban.component.navigation_module.node_network_navigation import NodeNe
 from metaurban.component.pg_space import VehicleParameterSpace, ParameterSpace
 from metaurban.constants import CamMask
 from metaurban.constants import MetaUrbanType, CollisionGroup
+from metaurban.engine.contact_service import ContactType
 from metaurban.constants import Semantics
 from metaurban.engine.asset_loader import AssetLoader
 from metaurban.engine.engine_utils import get_engine, engine_initialized
@@ -702,23 +703,18 @@ class BaseVehicle(BaseObject, BaseVehicleState):
         """
         Check States and filter to update info
         """
-        result_1 = self.engine.physics_world.static_world.contactTest(self.chassis.node(), True)
-        result_2 = self.engine.physics_world.dynamic_world.contactTest(self.chassis.node(), True)
         contacts = set()
-        for contact in result_1.getContacts() + result_2.getContacts():
-            node0 = contact.getNode0()
-            node1 = contact.getNode1()
-            node = node0 if node1.getName() == MetaUrbanType.VEHICLE else node1
+        for code, node in self.engine.contact_service.get_contacts(self.chassis.node()):
             name = node.getName()
-            if name == MetaUrbanType.LINE_SOLID_SINGLE_WHITE:
+            if code == ContactType.LINE_SOLID_SINGLE_WHITE:
                 self.on_white_continuous_line = True
-            elif name == MetaUrbanType.LINE_SOLID_SINGLE_YELLOW:
+            elif code == ContactType.LINE_SOLID_SINGLE_YELLOW:
                 self.on_yellow_continuous_line = True
-            elif name == MetaUrbanType.CROSSWALK:
+            elif code == ContactType.CROSSWALK:
                 self.on_crosswalk = True
-            elif name == MetaUrbanType.LINE_BROKEN_SINGLE_YELLOW or name == MetaUrbanType.LINE_BROKEN_SINGLE_WHITE:
+            elif code == ContactType.LINE_BROKEN:
                 self.on_broken_line = True
-            elif name == MetaUrbanType.TRAFFIC_LIGHT:
+            elif code == ContactType.TRAFFIC_LIGHT:
                 light = get_object_from_node(node)
                 if light.status == MetaUrbanType.LIGHT_GREEN:
                     self.green_light = True
@@ -733,13 +729,13 @@ class BaseVehicle(BaseObject, BaseVehicleState):
                     raise ValueError("Unknown light status: {}".format(light.status))
                 name = light.status
             # they work with the function in collision_callback.py to double-check the collision
-            elif name == MetaUrbanType.VEHICLE:
+            elif code == ContactType.VEHICLE:
                 self.crash_vehicle = True
-            elif name == MetaUrbanType.BUILDING:
+            elif code == ContactType.BUILDING:
                 self.crash_building = True
-            elif MetaUrbanType.is_traffic_object(name):
+            elif code == ContactType.TRAFFIC_OBJECT:
                 self.crash_object = True
-            elif name in [MetaUrbanType.PEDESTRIAN, MetaUrbanType.CYCLIST]:
+            elif code == ContactType.HUMAN:
                 self.crash_human = True
             else:
                 # didn't add
@@ -8,9 +8,11 @@ import numpy as np
 
 from metaurban.base_class.randomizable import Randomizable
 from metaurban.constants import RENDER_MODE_NONE
+from metaurban.engine.contact_service import ContactService
 from metaurban.engine.core.engine_core import EngineCore
 from metaurban.engine.interface import Interface
 from metaurban.engine.logger import get_logger, reset_logger
+from metaurban.engine.scene_cull import SceneCull
 
 from metaurban.pull_asset import pull_asset
 from metaurban.utils import concat_step_infos
@@ -57,6 +59,10 @@ class BaseEngine(EngineCore, Randomizable):
         self.episode_step = 0
         BaseEngine.singleton = self
         self.interface = Interface(self)
+        self.scene_cull = None
+        if self.global_config["cull_scene"]:
+            self.scene_cull = SceneCull(self, self.global_config["cull_distance"], self.global_config["cull_margin"])
+        self.contact_service = ContactService(self.physics_world, self.global_config["contacts_from_manifolds"])
 
         # managers
         self.task_manager = self.taskMgr  # use the inner TaskMgr of Panda3D as metaurban task manager
@@ -311,6 +317,11 @@ class BaseEngine(EngineCore, Randomizable):
         reset_logger()
         step_infos = {}
 
+        # culled elements are restored before the scene is rebuilt
+        if self.scene_cull is not None:
+            self.scene_cull.reset()
+        self.contact_service.reset()
+
         # initialize
         self._episode_start_time = time.time()
         self.episode_step = 0
@@ -433,6 +444,7 @@ class BaseEngine(EngineCore, Randomizable):
                 if name != "record_manager":
                     manager.step()
             self.step_physics_world()
+            self.contact_service.after_physics_step()
 
             # the recording should happen after step physics world
             if "record_manager" in self.managers and i < step_num - 1:
@@ -483,8 +495,9 @@ class BaseEngine(EngineCore, Randomizable):
 
         # Episode_step should be increased before env.step(). I moved it to engine.before_step() now.
 
-        # cull distant blocks
-        # poses = [v.position for v in self.agent_manager.active_agents.values()]
+        # cull distant blocks and objects
+        if self.scene_cull is not None:
+            self.scene_cull.update([v.position for v in self.agents.values()])
         return step_infos
 
     def dump_episode(self, pkl_file_name=None) -> None:
@@ -501,6 +514,9 @@ class BaseEngine(EngineCore, Randomizable):
         Note:
         Instead of calling this func directly, close Engine by using engine_utils.close_engine
         """
+        if self.scene_cull is not None:
+            self.scene_cull.destroy()
+            self.scene_cull = None
         if len(self._managers) > 0:
             for name, manager in self._managers.items():
                 setattr(self, name, None)
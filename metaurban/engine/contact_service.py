@@ -0,0 +1,114 @@
+from metaurban.type import MetaUrbanType
+
+
+class ContactType:
+    """
+    Integer codes of the contacted bodies checked by the state check of agents
+    """
+    NONE = 0
+    LINE_SOLID_SINGLE_WHITE = 1
+    LINE_SOLID_SINGLE_YELLOW = 2
+    CROSSWALK = 3
+    LINE_BROKEN = 4
+    TRAFFIC_LIGHT = 5
+    VEHICLE = 6
+    BUILDING = 7
+    TRAFFIC_OBJECT = 8
+    HUMAN = 9
+
+
+_CONTACT_TYPES = {
+    MetaUrbanType.LINE_SOLID_SINGLE_WHITE: ContactType.LINE_SOLID_SINGLE_WHITE,
+    MetaUrbanType.LINE_SOLID_SINGLE_YELLOW: ContactType.LINE_SOLID_SINGLE_YELLOW,
+    MetaUrbanType.CROSSWALK: ContactType.CROSSWALK,
+    MetaUrbanType.LINE_BROKEN_SINGLE_WHITE: ContactType.LINE_BROKEN,
+    MetaUrbanType.LINE_BROKEN_SINGLE_YELLOW: ContactType.LINE_BROKEN,
+    MetaUrbanType.TRAFFIC_LIGHT: ContactType.TRAFFIC_LIGHT,
+    MetaUrbanType.VEHICLE: ContactType.VEHICLE,
+    MetaUrbanType.BUILDING: ContactType.BUILDING,
+    MetaUrbanType.PEDESTRIAN: ContactType.HUMAN,
+    MetaUrbanType.CYCLIST: ContactType.HUMAN,
+}
+
+
+def contact_type(name):
+    """
+    :param name: name of a physics node, i.e. its MetaUrbanType
+    :return: ContactType code
+    """
+    code = _CONTACT_TYPES.get(name)
+    if code is None:
+        code = ContactType.TRAFFIC_OBJECT if MetaUrbanType.is_traffic_object(name) else ContactType.NONE
+        _CONTACT_TYPES[name] = code
+    return code
+
+
+def _node_key(node):
+    # Physics nodes of objects store themselves as python tag, which identifies the node across python wrappers
+    name = node.getName()
+    return id(node.getPythonTag(name)) if node.hasPythonTag(name) else None
+
+
+class ContactService:
+    """
+    Contacts of the agents, shared by all of them in one step.
+
+    With use_manifolds, the contacts in the dynamic world are read once per physics step from the contact manifolds
+    Bullet built while stepping, instead of running one contactTest per agent. The manifolds are those of the last
+    physics step, so contacts are detected at the pose of the body before the last integration. The static world is not
+    stepped, and bodies of agents only live in the dynamic world, so it is still queried with contactTest per body.
+    Before the first physics step of an episode and for static or kinematic bodies, contactTest is used as well.
+    """
+    def __init__(self, physics_world, use_manifolds=False):
+        self.physics_world = physics_world
+        self.use_manifolds = use_manifolds
+        self._fresh = False
+        self._dynamic_contacts = None
+
+    def after_physics_step(self):
+        self._fresh = True
+        self._dynamic_contacts = None
+
+    def reset(self):
+        self._fresh = False
+        self._dynamic_contacts = None
+
+    def _gather_dynamic_contacts(self):
+        contacts = {}
+        for manifold in self.physics_world.dynamic_world.getManifolds():
+            if not any(manifold.getManifoldPoint(i).getDistance() <= 0 for i in range(manifold.getNumManifoldPoints())):
+                continue
+            node0 = manifold.getNode0()
+            node1 = manifold.getNode1()
+            key0 = _node_key(node0)
+            key1 = _node_key(node1)
+            if key0 is not None:
+                contacts.setdefault(key0, []).append(node1)
+            if key1 is not None:
+                contacts.setdefault(key1, []).append(node0)
+        return contacts
+
+    @staticmethod
+    def _contact_test(world, node, key):
+        ret = []
+        for contact in world.contactTest(node, True).getContacts():
+            node0 = contact.getNode0()
+            ret.append(contact.getNode1() if _node_key(node0) == key else node0)
+        return ret
+
+    def get_contacts(self, node):
+        """
+        Bodies in contact with a body. For each contact, the body other than node is returned, so a pedestrian touching
+        a vehicle gets a VEHICLE contact
+        :param node: physics node, e.g. the chassis of an agent
+        :return: list of (ContactType code, contacted node)
+        """
+        key = _node_key(node)
+        others = self._contact_test(self.physics_world.static_world, node, key)
+        if self.use_manifolds and self._fresh and key is not None and not (node.isStatic() or node.isKinematic()):
+            if self._dynamic_contacts is None:
+                self._dynamic_contacts = self._gather_dynamic_contacts()
+            others += self._dynamic_contacts.get(key, [])
+        else:
+            others += self._contact_test(self.physics_world.dynamic_world, node, key)
+        return [(contact_type(other.getName()), other) for other in others]
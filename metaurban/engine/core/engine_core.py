@@ -443,6 +443,9 @@ class EngineCore(ShowBase.ShowBase):
         gc.collect()
         all_classes = find_all_subclasses(BaseObject)
         for cls in all_classes:
+            if getattr(cls, "model_template_cache", None) is not None:
+                cls.model_template_cache.clear()
+                cls.model_template_cache = None
             if hasattr(cls, "MODEL"):
                 cls.MODEL = None
             elif hasattr(cls, "model_collections"):
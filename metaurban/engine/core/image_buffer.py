@@ -103,12 +103,20 @@ class ImageBuffer:
         Get the rgb array on CPU, which suffers from the latency of moving data from graphics card to memory
         """
         origin_img = self.buffer.getDisplayRegion(1).getScreenshot()
-        img = np.frombuffer(origin_img.getRamImage().getData(), dtype=np.uint8)
-        img = img.reshape((origin_img.getYSize(), origin_img.getXSize(), -1))
+        img = self.ram_image_array(origin_img)
         img = img[..., :self.num_channels]
         img = img[::-1]
         return img
 
+    @staticmethod
+    def ram_image_array(texture, dtype=np.uint8):
+        """
+        View the RAM image of a texture as a (H, W, C) numpy array through a memoryview, without copying it. The array
+        is read-only and keeps the RAM image alive, copy it if it is kept while the texture is re-rendered
+        """
+        img = np.frombuffer(memoryview(texture.getRamImage()), dtype=dtype)
+        return img.reshape((texture.getYSize(), texture.getXSize(), -1))
+
     @staticmethod
     def get_grayscale_array(img, clip=True):
         raise DeprecationWarning("This API is deprecated")
@@ -9,6 +9,7 @@ from panda3d.core import Vec3, Point3, PNMImage, NodePath
 from panda3d.core import WindowProperties
 
 from metaurban.constants import CollisionGroup, CameraTagStateKey, Semantics
+from metaurban.engine.core.image_buffer import ImageBuffer
 from metaurban.engine.engine_utils import get_engine
 from metaurban.utils.coordinates_shift import panda_heading, panda_vector
 from metaurban.utils.cuda import check_cudart_err
@@ -449,7 +450,12 @@ class MainCamera(BaseSensor):
         return True if not self._last_frame_has_mouse and self.has_mouse else False
 
     def perceive(
-        self, to_float=True, new_parent_node: Union[NodePath, None] = None, position=None, hpr=None
+        self,
+        to_float=True,
+        new_parent_node: Union[NodePath, None] = None,
+        position=None,
+        hpr=None,
+        out=None
     ) -> np.ndarray:
         """
         When to_float is set to False, the image will be represented by unit8 with component value ranging from [0-255].
@@ -475,6 +481,8 @@ class MainCamera(BaseSensor):
                 have to be set as well. The position and hpr are all 3-dim vector representing:
             position: the relative position to the reparent node
             hpr: the heading/pitch/roll of the sensor
+            out: a preallocated float32 or uint8 array of the image shape, e.g. a slot of a frame stack. When it is set,
+                the image is written into it instead of a new array
 
         Return:
             Array representing the image.
@@ -510,8 +518,7 @@ class MainCamera(BaseSensor):
             img = self.cuda_rendered_result[..., :-1][..., ::-1][::-1]
         else:
             origin_img = engine.win.getDisplayRegion(1).getScreenshot()
-            img = np.frombuffer(origin_img.getRamImage().getData(), dtype=np.uint8)
-            img = img.reshape((origin_img.getYSize(), origin_img.getXSize(), 4))
+            img = ImageBuffer.ram_image_array(origin_img)
             img = img[::-1]
             img = img[..., :self.num_channels]
 
@@ -521,6 +528,12 @@ class MainCamera(BaseSensor):
             self.camera.setHpr(original_hpr)
             self.camera.setPos(original_position)
 
+        if out is not None:
+            if to_float and not self.enable_cuda:
+                np.divide(img, 255, out=out)
+            else:
+                out[...] = img / 255 if to_float else img
+            return out
         if not to_float:
             return img.astype(np.uint8, copy=False, order="C")
         else:
@@ -0,0 +1,105 @@
+from collections import OrderedDict
+
+from panda3d.core import NodePath
+
+from metaurban.engine.logger import get_logger
+
+logger = get_logger()
+
+
+def estimate_model_bytes(node_path):
+    """
+    Estimate the memory held by a model, i.e. the size of its vertex and index buffers and of its textures
+    """
+    nbytes = 0
+    for geom_np in node_path.findAllMatches("**/+GeomNode"):
+        geom_node = geom_np.node()
+        for i in range(geom_node.getNumGeoms()):
+            geom = geom_node.getGeom(i)
+            vertex_data = geom.getVertexData()
+            for j in range(vertex_data.getNumArrays()):
+                nbytes += vertex_data.getArray(j).getDataSizeBytes()
+            for j in range(geom.getNumPrimitives()):
+                vertices = geom.getPrimitive(j).getVertices()
+                if vertices is not None:
+                    nbytes += vertices.getDataSizeBytes()
+    for texture in node_path.findAllTextures():
+        nbytes += texture.estimateTextureMemory()
+    return nbytes
+
+
+class ModelTemplateCache:
+    """
+    Models loaded once and shared by all objects using them. A template is the model with its asset transform (heading,
+    offset and scale) baked in by flattenStrong, so that objects only instance it with instanceTo instead of loading
+    the model file and building a new scene graph. Templates are evicted in LRU order when the estimated memory of all
+    templates exceeds max_bytes. Objects which instanced an evicted template keep their instance.
+    """
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._templates = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def instance_to(self, loader, parent, model_path, heading=0, pos=(0, 0, 0), scale=1):
+        """
+        Instance the template of a model under parent
+        :param loader: panda3d loader
+        :param parent: NodePath, usually the origin of an object
+        :param model_path: path of the model file
+        :param heading: heading of the model in degree
+        :param pos: offset of the model
+        :param scale: scale of the model
+        :return: NodePath of the instance
+        """
+        key = (model_path, heading, tuple(pos), scale)
+        template = self._templates.get(key)
+        if template is None:
+            self.misses += 1
+            template = self._make_template(loader, model_path, heading, pos, scale)
+            self._insert(key, template)
+        else:
+            self.hits += 1
+            self._templates.move_to_end(key)
+        return template[0].instanceTo(parent)
+
+    @staticmethod
+    def _make_template(loader, model_path, heading, pos, scale):
+        template = NodePath("template")
+        model = loader.loadModel(model_path)
+        model.setH(heading)
+        model.setPos(*pos)
+        model.setScale(scale)
+        model.reparentTo(template)
+        template.flattenStrong()
+        return template, estimate_model_bytes(template)
+
+    def _insert(self, key, template):
+        self._templates[key] = template
+        self._bytes += template[1]
+        while len(self._templates) > 1 and self._bytes > self.max_bytes:
+            _, (evicted, nbytes) = self._templates.popitem(last=False)
+            evicted.removeNode()
+            self._bytes -= nbytes
+            self.evictions += 1
+
+    def stats(self):
+        """
+        :return: dict of hit/miss/eviction counts, number of templates and their estimated memory
+        """
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            templates=len(self._templates),
+            bytes=self._bytes,
+        )
+
+    def clear(self):
+        logger.debug("Model template cache: {}".format(self.stats()))
+        for template, _ in self._templates.values():
+            template.removeNode()
+        self._templates.clear()
+        self._bytes = 0
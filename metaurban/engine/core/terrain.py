@@ -21,6 +21,7 @@ from metaurban.constants import TerrainProperty, CameraTagStateKey
 from metaurban.engine.asset_loader import AssetLoader
 from metaurban.engine.logger import get_logger
 from metaurban.third_party.diamond_square import diamond_square
+from metaurban.utils.raster_cache import RasterCache
 from metaurban.utils.utils import is_win
 
 logger = get_logger()
@@ -61,6 +62,12 @@ class Terrain(BaseObject, ABC):
         self._elevation_texture_ratio = self._terrain_size / self._semantic_map_size  # for shader
         self.origin.setZ(-(self._terrain_offset + 1) / 65536 * self._height_scale * 2)
 
+        # height maps and semantic maps of visited maps
+        self._raster_cache = RasterCache(
+            engine.global_config.get("terrain_cache_size", 0) * 1024 * 1024,
+            engine.global_config.get("terrain_cache_dir", None)
+        )
+
         self._mesh_terrain = None
         self._mesh_terrain_height = None
         self._mesh_terrain_node = None
@@ -591,9 +598,14 @@ class Terrain(BaseObject, ABC):
 
         """
         if self.engine.current_map:
-            drivable_region = self.engine.current_map.get_height_map(
-                center_point, self._heightmap_size, 1, self._drivable_area_extension
-            )
+            key, persistent = self._raster_key("height_map", center_point, self._drivable_area_extension)
+            drivable_region = self._raster_cache.get(key)
+            if drivable_region is None:
+                drivable_region = self.engine.current_map.get_height_map(
+                    center_point, self._heightmap_size, 1, self._drivable_area_extension
+                )
+                # only 0 and 1 are in the height map
+                drivable_region = self._raster_cache.put(key, drivable_region.astype(np.uint8), persistent)
         else:
             drivable_region = np.ones((self._heightmap_size, self._heightmap_size, 1))
         return drivable_region
@@ -608,15 +620,19 @@ class Terrain(BaseObject, ABC):
         if self.engine.global_config["show_crosswalk"]:
             layer.append("crosswalk")
         if self.engine.current_map:
-            semantics = self.engine.current_map.get_semantic_map(
-                center_point,
-                size=self._semantic_map_size,
-                pixels_per_meter=self._semantic_map_pixel_per_meter,
-                white_line_thickness=2,
-                yellow_line_thickness=3,
-                # 1 when map_region_size == 2048, 2 for others
-                layer=layer
-            )
+            key, persistent = self._raster_key("semantic_map", center_point, self._semantic_map_pixel_per_meter, layer)
+            semantics = self._raster_cache.get(key)
+            if semantics is None:
+                semantics = self.engine.current_map.get_semantic_map(
+                    center_point,
+                    size=self._semantic_map_size,
+                    pixels_per_meter=self._semantic_map_pixel_per_meter,
+                    white_line_thickness=2,
+                    yellow_line_thickness=3,
+                    # 1 when map_region_size == 2048, 2 for others
+                    layer=layer
+                )
+                semantics = self._raster_cache.put(key, semantics, persistent)
         else:
             logger.warning("Can not find map. Generate a square terrain")
             size = self._semantic_map_size * self._semantic_map_pixel_per_meter
@@ -624,6 +640,21 @@ class Terrain(BaseObject, ABC):
             semantics = np.ones((size, size, 1), dtype=np.uint8) * lane_color  # use lane color
         return semantics
 
+    def _raster_key(self, raster, center_point, *params):
+        """
+        Key of a raster of the current map in the raster cache. Maps from the map cache are identified by their content,
+        so their rasters can be saved to disk, other maps by their object id
+        :return: key, whether the raster can be saved to disk
+        """
+        current_map = self.engine.current_map
+        cache_entry = getattr(current_map, "cache_entry", None)
+        map_key = cache_entry.key if cache_entry is not None else current_map.id
+        key = RasterCache.make_key(
+            raster, map_key, self._semantic_map_size, tuple(float(v) for v in center_point[:2]),
+            *[tuple(p) if isinstance(p, list) else p for p in params]
+        )
+        return key, cache_entry is not None
+
     @staticmethod
     def make_render_state(engine, vert, frag):
         """
@@ -649,6 +680,7 @@ class Terrain(BaseObject, ABC):
         Clean all terrain related stuff
         """
         super(Terrain, self).destroy()
+        self._raster_cache.clear()
         if self.render:
             self.heightfield_tex.clearImage()
             self.semantic_tex.clearImage()
@@ -1,162 +1,151 @@
 import logging
-from typing import List
+import math
 
-from metaurban.utils.math import norm
+from metaurban.utils.spatial_hash import SpatialHash
 
 logger = logging.getLogger(__name__)
 
 
 class SceneCull:
     """
-    Used to cull distant rendering object in metaurban to improve rendering efficiency
+    Distance based culling of map blocks and spawned objects. Elements far from every agent are hidden and their
+    dynamic physics bodies are removed from the bullet world, so render and physics cost scale with what is around the
+    agents instead of with the whole scene. Elements are found through spatial hashes, static objects are indexed once
+    per episode, and moving ones are re-bucketed only when they cross a cell border.
+
+    An element is culled when it is farther than cull_distance + cull_margin from all agents, and restored when it comes
+    within cull_distance of any agent, so elements close to the border do not flap between the two states.
     """
-    raise DeprecationWarning
-    # Visualization cull
-    LOD_MAP_VIS_DIST = 300  # highly related to the render efficiency !
-    LOD_VEHICLE_VIS_DIST = 500
-    LOD_OBJECT_VIS_DIST = 500
-
-    # Physics world cull, which can save the time used to do collision detection
-    LOD_MAP_PHYSICS_DIST = 50
-    LOD_VEHICLE_PHYSICS_DIST = 100000
-    LOD_OBJECT_PHYSICS_DIST = 100000
-
-    @classmethod
-    def cull_distant_blocks(cls, engine, blocks: list, poses: List[tuple], max_distance=None):
-        # A distance based LOD rendering
-        for block in blocks:
-            if not cls.all_out_of_bounding_box(block.bounding_box, poses, cls.LOD_MAP_VIS_DIST):
-                if not block.origin.hasParent():
-                    block.origin.reparentTo(engine.worldNP)
-            else:
-                if block.origin.hasParent():
-                    block.origin.detachNode()
-            if not cls.all_out_of_bounding_box(block.bounding_box, poses, max_distance or cls.LOD_MAP_PHYSICS_DIST):
-                block.dynamic_nodes.attach_to_physics_world(engine.physics_world.dynamic_world)
-            else:
-                block.dynamic_nodes.detach_from_physics_world(engine.physics_world.dynamic_world)
-
-    @classmethod
-    def cull_distant_traffic_vehicles(cls, engine, vehicles: list, poses: List[tuple], max_distance=None):
-        cls._cull_elements(
-            engine, vehicles, poses, cls.LOD_VEHICLE_VIS_DIST, max_distance or cls.LOD_VEHICLE_PHYSICS_DIST
+    CELL_SIZE = 50
+
+    def __init__(self, engine, cull_distance=100, cull_margin=10):
+        assert cull_distance > 0 and cull_margin >= 0, "cull_distance should be positive, cull_margin non-negative"
+        self.engine = engine
+        self.cull_distance = cull_distance
+        self.cull_margin = cull_margin
+
+        self._block_hash = SpatialHash(self.CELL_SIZE)
+        self._blocks = {}
+        self._culled_blocks = set()
+        self._map = None
+
+        self._object_hash = SpatialHash(self.CELL_SIZE)
+        # object id -> (object, static, cull physics)
+        self._objects = {}
+        self._culled_objects = set()
+
+    def update(self, poses):
+        """
+        Cull or restore elements according to the agent positions
+        :param poses: list of 2d agent positions
+        """
+        self._update_block_index()
+        self._update_object_index(exclude=set(agent.id for agent in self.engine.agents.values()))
+        self._cull(poses, self._block_hash, self._blocks, self._culled_blocks, self._cull_block, self._restore_block)
+        self._cull(
+            poses, self._object_hash, self._objects, self._culled_objects, self._cull_object, self._restore_object
         )
 
-    @classmethod
-    def cull_distant_objects(cls, engine, objects: list, poses: List[tuple], max_distance=None):
-        cls._cull_elements(engine, objects, poses, cls.LOD_OBJECT_VIS_DIST, max_distance or cls.LOD_OBJECT_PHYSICS_DIST)
-
-    @classmethod
-    def _cull_elements(cls, engine, elements: list, poses: List[tuple], vis_distance: float, physics_distance: float):
-        for obj in elements:
-            v_p = obj.position
-            if not cls.all_distance_greater_than(vis_distance, poses, v_p):
-                if not obj.origin.hasParent():
-                    obj.origin.reparentTo(engine.worldNP)
-            else:
-                if obj.origin.hasParent():
-                    obj.origin.detachNode()
-
-            if not cls.all_distance_greater_than(physics_distance, poses, v_p):
-                obj.dynamic_nodes.attach_to_physics_world(engine.physics_world.dynamic_world)
-            else:
-                obj.dynamic_nodes.detach_from_physics_world(engine.physics_world.dynamic_world)
-
-    @staticmethod
-    def all_distance_greater_than(distance, poses, target_pos):
-        v_p = target_pos
+    def _cull(self, poses, spatial_hash, elements, culled, cull_func, restore_func):
+        near, keep = set(), set()
         for pos in poses:
-            if norm(v_p[0] - pos[0], v_p[1] - v_p[1]) < distance:
-                return False
+            near.update(spatial_hash.query(pos, self.cull_distance)[0])
+            keep.update(spatial_hash.query(pos, self.cull_distance + self.cull_margin)[0])
+        for key in culled & near:
+            restore_func(elements[key])
+            culled.discard(key)
+        for key in spatial_hash.keys() - keep - culled:
+            if cull_func(elements[key]):
+                culled.add(key)
+
+    def _update_block_index(self):
+        current_map = self.engine.current_map
+        if current_map is self._map:
+            return
+        self.reset()
+        self._map = current_map
+        if current_map is None:
+            return
+        for index, block in enumerate(current_map.blocks):
+            bounding_box = block.bounding_box
+            if bounding_box is None or any(v is None for v in bounding_box):
+                continue
+            x_min, x_max, y_min, y_max = bounding_box
+            self._blocks[index] = block
+            self._block_hash.update(
+                index, ((x_min + x_max) / 2, (y_min + y_max) / 2),
+                math.hypot(x_max - x_min, y_max - y_min) / 2
+            )
+
+    def _update_object_index(self, exclude):
+        objects = self.engine.get_objects()
+        for key in [key for key, (obj, _, _) in self._objects.items() if objects.get(key) is not obj or key in exclude]:
+            obj = self._objects.pop(key)[0]
+            self._object_hash.remove(key)
+            if key in self._culled_objects:
+                self._culled_objects.discard(key)
+                self._restore_object((obj, False, False))
+        from metaurban.component.vehicle.base_vehicle import BaseVehicle
+        for key, obj in objects.items():
+            indexed = self._objects.get(key)
+            if (indexed is not None and indexed[1]) or key in exclude:
+                continue
+            if indexed is None:
+                try:
+                    static = obj.body.isStatic()
+                except Exception:
+                    static = False
+                # vehicles are driven by the physics engine, so they are only hidden
+                self._objects[key] = (obj, static, not isinstance(obj, BaseVehicle))
+            extent = (obj.LENGTH + obj.WIDTH) / 2 if hasattr(obj, "LENGTH") and hasattr(obj, "WIDTH") else 0.0
+            self._object_hash.update(key, obj.position, extent)
+
+    def _cull_block(self, block):
+        if block.origin is None or block.origin.isHidden():
+            return False
+        block.origin.hide()
+        block.dynamic_nodes.detach_from_physics_world(self.engine.physics_world.dynamic_world)
         return True
 
-    @staticmethod
-    def all_out_of_bounding_box(bounding_box, poses, margin_distance):
-        for pos in poses:
-            if bounding_box[0] - margin_distance < pos[0] < bounding_box[1] + margin_distance and \
-                    bounding_box[2] - margin_distance < pos[1] < bounding_box[3] + margin_distance:
-                return False
-        return True
+    def _restore_block(self, block):
+        if block.origin is not None and not block.origin.isEmpty():
+            block.origin.show()
+            block.dynamic_nodes.attach_to_physics_world(self.engine.physics_world.dynamic_world)
 
-    @staticmethod
-    def out_of_bounding_box(bounding_box, pose, margin_distance):
-        bb2 = [
-            pose[0] - margin_distance, pose[0] + margin_distance, pose[1] - margin_distance, pose[1] + margin_distance
-        ]
-        if bounding_box[0] > bb2[1] or \
-                bounding_box[1] < bb2[0] or \
-                bounding_box[2] > bb2[3] or \
-                bounding_box[3] < bb2[2]:
-            return True
-        else:
+    def _cull_object(self, indexed):
+        obj, _, cull_physics = indexed
+        if obj.origin is None or not obj.is_attached() or obj.origin.isHidden():
             return False
+        obj.origin.hide()
+        if cull_physics:
+            obj.dynamic_nodes.detach_from_physics_world(self.engine.physics_world.dynamic_world)
+        return True
+
+    def _restore_object(self, indexed):
+        obj, _, cull_physics = indexed
+        if obj.origin is None or obj.origin.isEmpty():
+            # destroyed
+            return
+        obj.origin.show()
+        if obj.is_attached():
+            obj.dynamic_nodes.attach_to_physics_world(self.engine.physics_world.dynamic_world)
 
-    @staticmethod
-    def get_iou(bb1, bb2):
-        raise ValueError("not checked")
+    def reset(self):
         """
-        Calculate the Intersection over Union (IoU) of two bounding boxes.
-
-        Parameters
-        ----------
-        bb1 : dict
-            Keys: {'x1', 'x2', 'y1', 'y2'}
-            The (x1, y1) position is at the top left corner,
-            the (x2, y2) position is at the bottom right corner
-        bb2 : dict
-            Keys: {'x1', 'x2', 'y1', 'y2'}
-            The (x, y) position is at the top left corner,
-            the (x2, y2) position is at the bottom right corner
-
-        Returns
-        -------
-        float
-            in [0, 1]
+        Restore all culled elements and forget the index, called before the scene is rebuilt
         """
-        assert bb1['x1'] < bb1['x2']
-        assert bb1['y1'] < bb1['y2']
-        assert bb2['x1'] < bb2['x2']
-        assert bb2['y1'] < bb2['y2']
-
-        # determine the coordinates of the intersection rectangle
-        x_left = max(bb1['x1'], bb2['x1'])
-        y_top = max(bb1['y1'], bb2['y1'])
-        x_right = min(bb1['x2'], bb2['x2'])
-        y_bottom = min(bb1['y2'], bb2['y2'])
-
-        if x_right < x_left or y_bottom < y_top:
-            return 0.0
-
-        # The intersection of two axis-aligned bounding boxes is always an
-        # axis-aligned bounding box
-        intersection_area = (x_right - x_left) * (y_bottom - y_top)
-
-        # compute the area of both AABBs
-        bb1_area = (bb1['x2'] - bb1['x1']) * (bb1['y2'] - bb1['y1'])
-        bb2_area = (bb2['x2'] - bb2['x1']) * (bb2['y2'] - bb2['y1'])
-
-        # compute the intersection over union by taking the intersection
-        # area and dividing it by the sum of prediction + ground-truth
-        # areas - the interesection area
-        iou = intersection_area / float(bb1_area + bb2_area - intersection_area)
-        assert iou >= 0.0
-        assert iou <= 1.0
-        return iou
-
-    @staticmethod
-    def no_overlap(bb1, bb2):
-        assert bb1['x1'] < bb1['x2']
-        assert bb1['y1'] < bb1['y2']
-        assert bb2['x1'] < bb2['x2']
-        assert bb2['y1'] < bb2['y2']
-
-        # determine the coordinates of the intersection rectangle
-        x_left = max(bb1['x1'], bb2['x1'])
-        y_top = max(bb1['y1'], bb2['y1'])
-        x_right = min(bb1['x2'], bb2['x2'])
-        y_bottom = min(bb1['y2'], bb2['y2'])
-
-        if x_right < x_left or y_bottom < y_top:
-            return True
-        else:
-            return False
+        for key in self._culled_blocks:
+            self._restore_block(self._blocks[key])
+        for key in self._culled_objects:
+            self._restore_object(self._objects[key])
+        self._block_hash.clear()
+        self._blocks.clear()
+        self._culled_blocks.clear()
+        self._map = None
+        self._object_hash.clear()
+        self._objects.clear()
+        self._culled_objects.clear()
+
+    def destroy(self):
+        self.reset()
+        self.engine = None
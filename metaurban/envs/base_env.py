@@ -176,6 +176,9 @@ BASE_DEFAULT_CONFIG = dict(
 
     # ===== Sensors =====
     sensors=dict(lidar=(Lidar, ), side_detector=(SideDetector, ), lane_line_detector=(LaneLineDetector, )),
+    # Find the objects around an agent for the lidar in a spatial hash of the spawned objects instead of a bullet
+    # contact test. The hash may find a few more objects near the edge of the lidar range
+    lidar_spatial_hash=False,
 
     # ===== Engine Core config =====
     # If true pop a window to render
@@ -207,8 +210,20 @@ BASE_DEFAULT_CONFIG = dict(
     multi_thread_render_mode="Cull",  # or "Cull/Draw"
     # Model loading optimization. Preload pedestrian for avoiding lagging when creating it for the first time
     preload_models=True,
+    # Memory budget of the shared templates of sidewalk asset models, unit: [MB]. Each model is loaded once and then
+    # instanced, the least recently used templates are evicted beyond the budget
+    model_template_cache_size=512,
     # model compression increasing the launch time
     disable_model_compression=True,
+    # Hide map blocks and objects far from all agents and remove their physics bodies from the dynamic world
+    cull_scene=False,
+    # Elements within this distance to an agent are restored, unit: [m]
+    cull_distance=100,
+    # Elements are culled beyond cull_distance + cull_margin, so those near the border do not flap, unit: [m]
+    cull_margin=10,
+    # Read the contacts of agents in the dynamic world once per step from the contact manifolds of the last physics
+    # step, instead of one contact test per agent. Contacts are then detected one physics step earlier
+    contacts_from_manifolds=False,
 
     # ===== Terrain =====
     # The size of the square map region, which is centered at [0, 0]. The map objects outside it are culled.
@@ -223,6 +238,12 @@ BASE_DEFAULT_CONFIG = dict(
     use_mesh_terrain=False,
     # If set to False, only the center region of the terrain has the physics body
     full_size_mesh=True,
+    # Memory bound of the cache of terrain height maps and semantic maps, unit: [MB]. Rasters of a revisited map are
+    # reused instead of rasterized again. A larger bound is required to cache the semantic map, which has 22 pixels
+    # per meter
+    terrain_cache_size=1024,
+    # Directory to save the terrain rasters of maps from the map cache (see map_cache_dir) across runs, None disables it
+    terrain_cache_dir=None,
     # Whether to show crosswalk
     show_crosswalk=True,
     # Whether to show sidewalk
@@ -258,8 +279,14 @@ BASE_DEFAULT_CONFIG = dict(
     # Please see Documentation: Record and Replay for more details
     # When replay_episode is True, the episode metadata will be recorded
     record_episode=False,
-    # The value should be None or the log data. If it is the later one, the simulator will replay logged scenario
+    # If set, recorded episodes are streamed to compressed columnar files in this directory instead of kept in memory.
+    # The file of the current episode is record_manager.episode_file, see metaurban/utils/episode_record.py
+    record_episode_dir=None,
+    # The value should be None, the log data, or the path of an episode record written with record_episode_dir.
+    # If it is not None, the simulator will replay logged scenario
     replay_episode=None,
+    # Replay an episode record from this env step, without replaying the steps before it
+    replay_start_step=0,
     # When set to True, the replay system will only reconstruct the first frame from the logged scenario metadata
     only_reset_when_replay=False,
     # If True, when creating and replaying object trajectories, use the same ID as in dataset
@@ -583,6 +610,8 @@ class BaseEnv(gym.Env):
         )
         for v_id, v in self.agents.items():
             self.observations[v_id].reset(self, v)
+        self._prefetch_lidar()
+        for v_id, v in self.agents.items():
             obses[v_id] = self.observations[v_id].observe(v)
             _, reward_infos[v_id] = self.reward_function(v_id)
             _, done_infos[v_id] = self.done_function(v_id)
@@ -603,6 +632,25 @@ class BaseEnv(gym.Env):
         data.update(agent_info)
         return data
 
+    def _prefetch_lidar(self):
+        """
+        Cast the lidar lasers of all agents with lidar observations in batches before the observations are computed,
+        agents with the same lidar config share one batch. With a single agent, it perceives as usual
+        """
+        if len(self.agents) < 2 or "lidar" not in self.engine.sensors:
+            return
+        lidar = self.engine.get_sensor("lidar")
+        lidar.clear_prefetched()
+        batches = {}
+        for v_id, v in self.agents.items():
+            lidar_config = v.config["lidar"]
+            if hasattr(self.observations[v_id], "lidar_observe") and lidar_config["num_lasers"] > 0 and \
+                    lidar_config["distance"] > 0:
+                key = (lidar_config["num_lasers"], lidar_config["distance"], v.config["show_lidar"])
+                batches.setdefault(key, []).append(v)
+        for (num_lasers, distance, show), vehicles in batches.items():
+            lidar.prefetch(vehicles, self.engine.physics_world.dynamic_world, num_lasers, distance, show=show)
+
     def _get_step_return(self, actions, engine_info):
         # update obs, dones, rewards, costs, calculate done at first !
         obses = {}
@@ -610,6 +658,7 @@ class BaseEnv(gym.Env):
         cost_infos = {}
         reward_infos = {}
         rewards = {}
+        self._prefetch_lidar()
         for v_id, v in self.agents.items():
             self.episode_lengths[v_id] += 1
             rewards[v_id], reward_infos[v_id] = self.reward_function(v_id)
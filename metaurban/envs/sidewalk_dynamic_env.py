@@ -34,6 +34,8 @@ METAURBAN_DEFAULT_CONFIG = dict(
         "exit_length": 50,
     },
     store_map=True,
+    map_cache_dir=None,  # directory of the on-disk map cache, None disables it
+    map_cache_size=0,  # >0: keep at most this many stored maps alive, others are rebuilt from the map cache
     crswalk_density=0.1,  #####
     spawn_human_num=1,
     show_mid_block_map=False,
@@ -42,6 +44,10 @@ METAURBAN_DEFAULT_CONFIG = dict(
     need_inverse_traffic=False,
     traffic_mode=TrafficMode.Trigger,  # "Respawn", "Trigger"
     random_traffic=False,  # Traffic is randomized at default.
+    orca_planning_workers=0,  # >0: plan ORCA trajectories in worker processes and prefetch the next re-plan
+    orca_replan_horizon=0,  # >0: keep one ORCA simulation per episode, step it this many steps at a time
+    orca_planning_threads=1,  # threads stepping the agents of one ORCA simulation
+    orca_stream_steps=0,  # >0: simulate ORCA plans this many steps at a time, as the trajectory is consumed
     # this will update the vehicle_config and set to traffic
     traffic_vehicle_config=dict(
         show_navi_mark=False,
@@ -34,6 +34,8 @@ metaurban_DEFAULT_CONFIG = dict(
         "exit_length": 50,
     },
     store_map=True,
+    map_cache_dir=None,  # directory of the on-disk map cache, None disables it
+    map_cache_size=0,  # >0: keep at most this many stored maps alive, others are rebuilt from the map cache
     crswalk_density=0.1,  #####
     spawn_human_num=1,
     show_mid_block_map=False,
@@ -9,7 +9,8 @@ from metaurban.component.road_network import Road
 from metaurban.manager.base_manager import BaseManager
 from metaurban.policy.orca_planner import OrcaPlanner
 import metaurban.policy.orca_planner_utils as orca_planner_utils
-from metaurban.policy.get_planning import get_planning
+import metaurban.policy.mask_processing as mask_processing
+from metaurban.policy.get_planning import get_planning, submit_planning, PlanningStream, RecedingHorizonPlanning
 from metaurban.engine.logger import get_logger
 logger = get_logger()
 
@@ -110,6 +111,18 @@ class PGBackgroundSidewalkAssetsManager(BaseManager):
         self.d_robot_num = self.engine.global_config['spawn_drobot_num']
         self.max_actor_num = self.engine.global_config["max_actor_num"]
 
+        # > 0: plan in worker processes and start the next re-plan while the current trajectory is being consumed
+        self.planning_workers = self.engine.global_config.get("orca_planning_workers", 0)
+        self._next_plan = None
+        # > 0: keep one ORCA simulation per episode, advanced this many steps at a time, instead of full re-plans
+        self.replan_horizon = self.engine.global_config.get("orca_replan_horizon", 0)
+        # threads stepping the agents of one ORCA simulation
+        self.planning_threads = self.engine.global_config.get("orca_planning_threads", 1)
+        self._receding_planning = None
+        # > 0: pull plans from the ORCA simulation this many steps at a time, instead of waiting for the whole plan
+        self.stream_steps = self.engine.global_config.get("orca_stream_steps", 0)
+        self._planning_stream = None
+
     def reset(self):
         """
         Generate traffic on map, according to the mode and density
@@ -136,16 +149,28 @@ class PGBackgroundSidewalkAssetsManager(BaseManager):
         self.walkable_regions_mask = self._get_walkable_regions(current_map)
 
         # get walkable region
+        self._cancel_next_plan()
         self.start_points, self.end_points = self.random_start_and_end_points(
             self.walkable_regions_mask[:, :, 0], self.spawn_num + self.d_robot_num
         )
-        time_length, points, speed, early_stop_points = get_planning(
-            [self.start_points], [self.walkable_regions_mask], [self.end_points], [len(self.start_points)], 1
-        )
-        self.points = iter(points[0])
-        self.time_length = time_length[0]
-        self.speeds = iter(speed[0])
-        self.es_points = early_stop_points[0]
+        self._planning_stream = None
+        if self.replan_horizon > 0:
+            self._receding_planning = RecedingHorizonPlanning(
+                self.start_points, self.end_points, self.walkable_regions_mask, self.replan_horizon,
+                self.planning_threads
+            )
+            self._advance_receding_planning()
+        elif self.stream_steps > 0:
+            self._receding_planning = None
+            self._set_stream(self.start_points, self.end_points)
+        else:
+            self._receding_planning = None
+            time_length, points, speed, early_stop_points = get_planning(
+                [self.start_points], [self.walkable_regions_mask], [self.end_points], [len(self.start_points)],
+                1,
+                num_threads=self.planning_threads
+            )
+            self._set_plan(points[0], time_length[0], speed[0], early_stop_points[0])
         # spawn humanoids
         assert self.mode == HumanoidMode.Trigger
         self._create_humanoids_once(current_map, self.spawn_num, self.max_actor_num)
@@ -180,18 +205,21 @@ class PGBackgroundSidewalkAssetsManager(BaseManager):
         try:
             positions, speeds = next(self.points), next(self.speeds)
         except:
-            import copy
-            self.start_points = copy.deepcopy(self.end_points)
-            _, self.end_points = self.random_start_and_end_points(
-                self.walkable_regions_mask[:, :, 0], self.spawn_num + self.d_robot_num
-            )
-            time_length, points, speed, early_stop_points = get_planning(
-                [self.start_points], [self.walkable_regions_mask], [self.end_points], [len(self.start_points)], 1
-            )
-            self.points = iter(points[0])
-            self.time_length = time_length[0]
-            self.speeds = iter(speed[0])
-            self.es_points = early_stop_points[0]
+            if self._receding_planning is not None:
+                self._advance_receding_planning()
+            elif self._planning_stream is not None:
+                if self._planning_stream.done:
+                    self.start_points, self.end_points = self._next_start_and_end_points()
+                    self._set_stream(self.start_points, self.end_points)
+                else:
+                    self._pull_stream()
+            else:
+                if self._next_plan is None:
+                    self._submit_next_plan()
+                self.start_points, self.end_points, future = self._next_plan
+                self._next_plan = None
+                points, time_length, speed, early_stop_points = future.result()
+                self._set_plan(points, time_length, speed, early_stop_points)
             positions, speeds = next(self.points), next(self.speeds)
         for v, pos, speed in zip(self._traffic_humanoids, positions, speeds):
             pos = self._to_block_coordinate(pos)  ####
@@ -211,6 +239,79 @@ class PGBackgroundSidewalkAssetsManager(BaseManager):
 
         return dict()
 
+    def _set_plan(self, points, time_length, speed, early_stop_points):
+        self.points = iter(points)
+        self.time_length = time_length
+        self.speeds = iter(speed)
+        self.es_points = early_stop_points
+        if self.planning_workers > 0:
+            self._submit_next_plan()
+
+    def _next_start_and_end_points(self):
+        """
+        Start and end points of the next re-plan, from the current goals to new random goals
+        """
+        import copy
+        start_points = copy.deepcopy(self.end_points)
+        _, end_points = self.random_start_and_end_points(
+            self.walkable_regions_mask[:, :, 0], self.spawn_num + self.d_robot_num
+        )
+        return start_points, end_points
+
+    def _submit_next_plan(self):
+        """
+        Re-plan from the current goals to new random goals. With planning workers, this runs in the background right
+        after a plan is set, so the result is usually ready once the current trajectory is used up
+        """
+        start_points, end_points = self._next_start_and_end_points()
+        future = submit_planning(
+            start_points, end_points, self.walkable_regions_mask, len(start_points), self.planning_workers,
+            self.planning_threads
+        )
+        self._next_plan = (start_points, end_points, future)
+
+    def _set_stream(self, start_points, end_points):
+        self._planning_stream = PlanningStream(
+            start_points, end_points, self.walkable_regions_mask, len(start_points), self.planning_threads
+        )
+        self._pull_stream()
+
+    def _pull_stream(self):
+        """
+        Simulate the next stream_steps steps of the current plan. Once the plan is complete, its time lengths and end
+        positions are set as with full plans
+        """
+        points, speed = self._planning_stream.pull(self.stream_steps)
+        self.points = iter(points)
+        self.speeds = iter(speed)
+        if self._planning_stream.done:
+            self.time_length = self._planning_stream.time_length()
+            self.es_points = points[-1]
+
+    def _advance_receding_planning(self):
+        """
+        Give agents that arrived a new random goal, then simulate the next replan_horizon steps of all agents
+        """
+        arrived = self._receding_planning.finished_agents()
+        if len(arrived) > 0:
+            goals = self._random_points_new(self.walkable_regions_mask[:, :, 0], len(arrived))
+            accepted = self._receding_planning.set_goals(arrived, goals)
+            for i, goal, ok in zip(arrived, goals, accepted):
+                if ok:
+                    self.end_points[i] = goal
+        points, speed = self._receding_planning.step()
+        self.points = iter(points)
+        self.speeds = iter(speed)
+
+    def _cancel_next_plan(self):
+        if self._next_plan is not None:
+            self._next_plan[2].cancel()
+            self._next_plan = None
+
+    def destroy(self):
+        self._cancel_next_plan()
+        super(PGBackgroundSidewalkAssetsManager, self).destroy()
+
     def _get_walkable_regions(self, current_map):
         self.crosswalks = current_map.crosswalks
         self.sidewalks = current_map.sidewalks
@@ -307,45 +408,10 @@ class PGBackgroundSidewalkAssetsManager(BaseManager):
         return walkable_regions_mask
 
     def _random_points_new(self, map_mask, num, min_dis=5):
-        import matplotlib.pyplot as plt
-        from scipy.signal import convolve2d
-        import random
-        from skimage import measure
         h, _ = map_mask.shape
-        import metaurban.policy.orca_planner_utils as orca_planner_utils
-        mylist, h, w = orca_planner_utils.mask_to_2d_list(map_mask)
-        contours = measure.find_contours(mylist, 0.5, positive_orientation='high')
-        flipped_contours = []
-        for contour in contours:
-            contour = orca_planner_utils.find_tuning_point(contour, h)
-            flipped_contours.append(contour)
-        int_points = []
-        for p in flipped_contours:
-            for m in p:
-                int_points.append((int(m[1]), int(m[0])))
-
-        def find_walkable_area(map_mask):
-            kernel = np.array([[1, 1, 1], [1, 0, 1], [1, 1, 1]], dtype=np.uint8)
-            conv_result = convolve2d(map_mask / 255, kernel, mode='same')
-            ct_pts = np.where(conv_result == 8)  #8, 24
-            ct_pts = list(zip(ct_pts[1], ct_pts[0]))
-            ct_pts = [c for c in ct_pts if c not in int_points]
-            return ct_pts
-
-        selected_pts = []
-        walkable_pts = find_walkable_area(map_mask)
-        random.shuffle(walkable_pts)
-        if len(walkable_pts) < num:
-            raise ValueError(" Walkable points are less than spawn number! ")
-        try_time = 0
-        while len(selected_pts) < num:
-            if try_time > 10000:
-                raise ValueError("Try too many time to get valid humanoid points!")
-            cur_pt = random.choice(walkable_pts)
-            if all(math.dist(cur_pt, selected_pt) >= min_dis for selected_pt in selected_pts):
-                selected_pts.append(cur_pt)
-            try_time += 1
-        selected_pts = [(x[0], h - 1 - x[1]) for x in selected_pts]
+        geometry = orca_planner_utils.get_mask_geometry(map_mask)
+        selected_pts = mask_processing.sample_spaced_points(geometry.walkable_points, num, min_dis)
+        selected_pts = [(x, h - 1 - y) for x, y in selected_pts]
         return selected_pts
 
     def _random_points(self, map_mask, num):
@@ -1,11 +1,17 @@
+import copy
 import pickle
+from collections import OrderedDict
 
 from tqdm import tqdm
 
 from metaurban.component.map.pg_map import PGMap, MapGenerateMethod
+from metaurban.component.map.pg_map_cache import PGMapCache
+from metaurban.engine.logger import get_logger
 from metaurban.manager.base_manager import BaseManager
 from metaurban.utils.utils import get_time_str
 
+logger = get_logger()
+
 
 class PGMapManager(BaseManager):
     """
@@ -22,6 +28,12 @@ class PGMapManager(BaseManager):
         env_num = self.env_num = self.engine.global_config["num_scenarios"]
         self.maps = {_seed: None for _seed in range(start_seed, start_seed + env_num)}
 
+        # on-disk map cache, and the bound on the number of stored maps which are kept alive
+        map_cache_dir = self.engine.global_config.get("map_cache_dir", None)
+        self.map_cache = PGMapCache(map_cache_dir) if map_cache_dir else None
+        self.map_cache_size = self.engine.global_config.get("map_cache_size", 0)
+        self._stored_seeds = OrderedDict()
+
     def spawn_object(self, object_class, *args, **kwargs):
         # Note: Map instance should not be reused / recycled.
         map = self.engine.spawn_object(object_class, auto_fill_random_seed=False, force_spawn=True, *args, **kwargs)
@@ -57,13 +69,56 @@ class PGMapManager(BaseManager):
             map_config = config["map_config"]
             map_config.update({"seed": current_seed})
             map_config = self.add_random_to_map(map_config)
-            map = self.spawn_object(PGMap, map_config=map_config, random_seed=None)
+            map = self.generate_map(current_seed, map_config)
             self.current_map = map
             if self.engine.global_config["store_map"]:
-                self.maps[current_seed] = map
+                self.store_map(current_seed, map)
         else:
             map = self.maps[current_seed]
             self.load_map(map)
+            if current_seed in self._stored_seeds:
+                self._stored_seeds.move_to_end(current_seed)
+
+    def generate_map(self, seed, map_config):
+        """
+        Create the map of a seed. With a map cache, a map generated before is rebuilt from its cached block sequence
+        instead of being searched again by BIG, and new maps are added to the cache. The cached data derived from the
+        map, e.g. the walkable mask, is only used if the rebuilt map has the cached walkable-region polygons
+        """
+        if self.map_cache is None:
+            return self.spawn_object(PGMap, map_config=map_config, random_seed=None)
+        key = self.map_cache.key(seed, map_config, self.engine.global_config, self.engine.global_random_seed)
+        cache_entry = self.map_cache.get(key)
+        if cache_entry is None:
+            map = self.spawn_object(PGMap, map_config=map_config, random_seed=None)
+            cache_entry = self.map_cache.put(key, map)
+        else:
+            map_data = cache_entry.meta
+            cached_config = copy.deepcopy(map_data["map_config"])
+            cached_config[PGMap.GENERATE_TYPE] = MapGenerateMethod.PG_MAP_FILE
+            cached_config[PGMap.GENERATE_CONFIG] = copy.deepcopy(map_data[PGMap.BLOCK_SEQUENCE])
+            map = self.spawn_object(PGMap, map_config=cached_config, random_seed=None)
+            if not cache_entry.matches(map):
+                logger.warning("Map of seed {} differs from its map cache entry {}, which is ignored".format(seed, key))
+                cache_entry = None
+        map.cache_entry = cache_entry
+        return map
+
+    def store_map(self, seed, map):
+        """
+        Keep a map alive for the next visit of its seed. With map_cache_size > 0, the least recently used maps beyond
+        this number are destroyed, and rebuilt when visited again
+        """
+        self.maps[seed] = map
+        self._stored_seeds[seed] = None
+        self._stored_seeds.move_to_end(seed)
+        while 0 < self.map_cache_size < len(self._stored_seeds):
+            evicted_seed, _ = self._stored_seeds.popitem(last=False)
+            evicted = self.maps[evicted_seed]
+            self.maps[evicted_seed] = None
+            if evicted is not None and evicted is not self.current_map:
+                evicted.detach_from_world()
+                evicted.destroy()
 
     def add_random_to_map(self, map_config):
         if self.engine.global_config["random_lane_width"]:
@@ -85,7 +140,7 @@ class PGMapManager(BaseManager):
                 map_config = config["map_config"]
                 map_config.update({"seed": current_seed})
                 map_config = self.add_random_to_map(map_config)
-                map = self.spawn_object(PGMap, map_config=map_config, random_seed=None)
+                map = self.generate_map(current_seed, map_config)
                 self.maps[current_seed] = map
                 map.detach_from_world()
 
@@ -143,3 +198,4 @@ class PGMapManager(BaseManager):
         start_seed = self.start_seed = self.engine.global_config["start_seed"]
         env_num = self.env_num = self.engine.global_config["num_scenarios"]
         self.maps = {_seed: None for _seed in range(start_seed, start_seed + env_num)}
+        self._stored_seeds.clear()
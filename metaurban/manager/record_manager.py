@@ -1,10 +1,12 @@
 import copy
+import os
 from metaurban.utils.utils import get_time_str
 import logging
 
 from metaurban.base_class.base_object import BaseObject
 from metaurban.constants import ObjectState, PolicyState
 from metaurban.manager.base_manager import BaseManager
+from metaurban.utils.episode_record import EpisodeRecordWriter, EpisodeRecordReader
 from metaurban.utils.utils import is_map_related_instance, is_map_related_class
 
 
@@ -47,9 +49,14 @@ class RecordManager(BaseManager):
         # for debug, we don't allow assign the same id to different vehicles
         # previous recycling mechanism will bring such issue, which is fixed now
         self._episode_obj_names = set()
+        # with record_episode_dir, frames are streamed to a columnar episode record instead of kept in episode_info
+        self.episode_writer = None
+        self.episode_file = None
+        self._episode_count = 0
 
     def before_reset(self):
         if self.engine.record_episode:
+            self.close_episode_writer()
             self.episode_info = {}
             self._episode_obj_names = set()
             self.reset_frame = FrameInfo(self.engine.episode_step)
@@ -73,10 +80,33 @@ class RecordManager(BaseManager):
             self.collect_objects_states()
             self.collect_manager_states()
             self.collect_manager_metadata()
+            record_dir = self.engine.global_config.get("record_episode_dir", None)
+            if record_dir:
+                self.open_episode_writer(record_dir)
             self.current_frames = None
             self.reset_frame = None
             self.current_frame_count = 0
 
+    def open_episode_writer(self, record_dir):
+        """
+        Stream the episode to a new file in record_dir, the frames recorded so far are written at once
+        """
+        os.makedirs(record_dir, exist_ok=True)
+        self.episode_file = os.path.join(
+            record_dir, "{}_seed_{}_{}.rec".format(get_time_str(), self.engine.global_seed, self._episode_count)
+        )
+        self._episode_count += 1
+        self.episode_writer = EpisodeRecordWriter(self.episode_file)
+        frames = self.episode_info.pop("frame")
+        self.episode_writer.write_header(self.episode_info)
+        for step_frames in frames:
+            self.episode_writer.add_step(step_frames)
+
+    def close_episode_writer(self):
+        if self.episode_writer is not None:
+            self.episode_writer.close()
+            self.episode_writer = None
+
     def collect_manager_metadata(self):
         assert self.episode_step == 0, "This func can only be called after env.reset() without any env.step() called"
         ret = {}
@@ -115,7 +145,10 @@ class RecordManager(BaseManager):
         if self.engine.record_episode and self.current_frame_count:
             self.step()
             assert len(self.current_frames) == self.engine.global_config["decision_repeat"], "Number of Frame Mismatch!"
-            self.episode_info["frame"].append(self.current_frames)
+            if self.episode_writer is not None:
+                self.episode_writer.add_step(self.current_frames)
+            else:
+                self.episode_info["frame"].append(self.current_frames)
         return {}
 
     def collect_objects_states(self):
@@ -127,14 +160,22 @@ class RecordManager(BaseManager):
                     self.current_frame.policy_info[name] = policy_mapping[name].get_state()
 
         self.current_frame.agents = list(self.engine.agents.keys())
-        self.current_frame._agent_to_object = copy.deepcopy(self.engine.agent_manager._agent_to_object)
-        self.current_frame._object_to_agent = copy.deepcopy(self.engine.agent_manager._object_to_agent)
+        # agent ids and object names are strings, so a shallow copy is enough
+        self.current_frame._agent_to_object = dict(self.engine.agent_manager._agent_to_object)
+        self.current_frame._object_to_agent = dict(self.engine.agent_manager._object_to_agent)
 
     def get_episode_metadata(self):
         assert self.engine.record_episode, "Turn on recording episode and then dump it"
+        if self.episode_writer is not None:
+            self.episode_writer.flush()
+            reader = EpisodeRecordReader(self.episode_file)
+            episode_info = reader.to_episode_info()
+            reader.close()
+            return episode_info
         return copy.deepcopy(self.episode_info)
 
     def destroy(self):
+        self.close_episode_writer()
         self.episode_info = None
 
     def add_spawn_info(self, obj, object_class, kwargs):
@@ -13,6 +13,7 @@ from metaurban.constants import REPLAY_DONE
 from metaurban.manager.base_manager import BaseManager
 from metaurban.obs.state_obs import LidarStateObservation
 from metaurban.utils import recursive_equal
+from metaurban.utils.episode_record import EpisodeRecordReader
 
 
 class ReplayManager(BaseManager):
@@ -21,6 +22,10 @@ class ReplayManager(BaseManager):
     def __init__(self):
         super(ReplayManager, self).__init__()
         self.restore_episode_info = None
+        # reader of an episode record file, see metaurban/utils/episode_record.py
+        self.episode_reader = None
+        self._recorded_steps = None
+        self._num_steps_left = 0
         self.current_map = None
         self.current_frames = None
         self.current_frame = None
@@ -59,8 +64,21 @@ class ReplayManager(BaseManager):
         assert not self.engine.record_episode, "When replay, please set record to False"
         self.record_name_to_current_name = dict()
         self.current_name_to_record_name = dict()
-        self.restore_episode_info = self.engine.global_config["replay_episode"]
-        self.restore_episode_info["frame"].reverse()
+        replay_episode = self.engine.global_config["replay_episode"]
+        start_step = self.engine.global_config.get("replay_start_step", 0)
+        self.close_episode_reader()
+        if isinstance(replay_episode, str):
+            # stream the frames from an episode record, starting from any step
+            self.episode_reader = EpisodeRecordReader(replay_episode)
+            self.restore_episode_info = self.episode_reader.header
+            assert 0 <= start_step < self.episode_reader.num_steps, "replay_start_step is out of the recorded episode"
+            self._recorded_steps = self.episode_reader.steps(start_step)
+            self._num_steps_left = self.episode_reader.num_steps - start_step
+        else:
+            assert start_step == 0, "replay_start_step is only supported when replaying an episode record file"
+            self.restore_episode_info = replay_episode
+            self.restore_episode_info["frame"].reverse()
+            self._num_steps_left = len(self.restore_episode_info["frame"])
         # Since in episode data map data only contains one map, values()[0] is the map_parameters
         map_data = self.restore_episode_info["map_data"]
         assert len(map_data) > 0, "Can not find map info in episode data"
@@ -78,7 +96,12 @@ class ReplayManager(BaseManager):
             self.current_map = self.spawn_object(
                 PGMap, map_config=map_config, auto_fill_random_seed=False, force_spawn=True
             )
-        self.current_frames = self.restore_episode_info["frame"].pop()
+        self.current_frames = self._next_step_frames()
+        if start_step > 0:
+            # start from the last frame of the step, objects spawned in earlier frames are restored directly
+            frame_index = self.episode_reader.step_frame_range(start_step)[1] - 1
+            self.current_frames = self.current_frames[-1:]
+            self.restore_alive_objects(frame_index, self.current_frames[0])
         self.replay_frame()
         if self.engine.only_reset_when_replay:
             # do not replay full trajectory! set state for managers for interaction
@@ -87,6 +110,41 @@ class ReplayManager(BaseManager):
             self.engine.map_manager.current_map = self.current_map
             self.engine.map_manager.maps[self.engine.global_seed] = self.current_map
 
+    def _next_step_frames(self):
+        """
+        Frames of the next recorded env step
+        """
+        self._num_steps_left -= 1
+        if self.episode_reader is not None:
+            return next(self._recorded_steps)
+        return self.restore_episode_info["frame"].pop()
+
+    def restore_alive_objects(self, frame_index, frame):
+        """
+        Spawn the objects which are alive at a frame of an episode record and set their states, without replaying the
+        frames before it
+        """
+        spawned, policy_spawn_infos = self.episode_reader.alive_objects(frame_index)
+        for name, config in spawned.items():
+            self._spawn_recorded_object(name, config, frame)
+        if self.engine.only_reset_when_replay:
+            self.restore_policy_states(policy_spawn_infos)
+        for name in spawned:
+            if name in frame.step_info:
+                obj = self.spawned_objects[self.record_name_to_current_name[name]]
+                obj.before_step()
+                obj.set_state(frame.step_info[name])
+                obj.after_step()
+
+    def _spawn_recorded_object(self, name, config, frame):
+        if config[ObjectState.CLASS] == DefaultVehicle:
+            config[ObjectState.INIT_KWARGS]["vehicle_config"]["use_special_color"] = True
+        obj = self.spawn_object(object_class=config[ObjectState.CLASS], **config[ObjectState.INIT_KWARGS])
+        self.current_name_to_record_name[obj.name] = name
+        self.record_name_to_current_name[name] = obj.name
+        if issubclass(config[ObjectState.CLASS], BaseVehicle):
+            obj.navigation.set_route(frame.step_info[name]["spawn_road"], frame.step_info[name]["destination"][-1])
+
     def restore_policy_states(self, policy_spawn_infos):
         # restore agent policy
         agent_policy = self.engine.agent_manager.agent_policy
@@ -120,16 +178,23 @@ class ReplayManager(BaseManager):
 
     def after_step(self, *args, **kwargs):
         if self.engine.replay_episode and not self.engine.only_reset_when_replay:
-            if len(self.restore_episode_info["frame"]) == 0:
+            if self._num_steps_left == 0:
                 self.replay_done = True
             return self.engine.agent_manager.for_each_active_agents(lambda v: {REPLAY_DONE: self.replay_done})
         else:
             return dict()
 
+    def close_episode_reader(self):
+        if self.episode_reader is not None:
+            self._recorded_steps = None
+            self.episode_reader.close()
+            self.episode_reader = None
+
     def destroy(self):
         self.record_name_to_current_name = dict()
         self.current_name_to_record_name = dict()
         self.restore_episode_info = None
+        self.close_episode_reader()
         self.current_map = None
 
     def replay_frame(self):
@@ -138,25 +203,17 @@ class ReplayManager(BaseManager):
         self.current_frame = self.current_frames.pop()
         # create
         for name, config in self.current_frame.spawn_info.items():
-            if config[ObjectState.CLASS] == DefaultVehicle:
-                config[ObjectState.INIT_KWARGS]["vehicle_config"]["use_special_color"] = True
-            obj = self.spawn_object(object_class=config[ObjectState.CLASS], **config[ObjectState.INIT_KWARGS])
-            self.current_name_to_record_name[obj.name] = name
-            self.record_name_to_current_name[name] = obj.name
-            if issubclass(config[ObjectState.CLASS], BaseVehicle):
-                obj.navigation.set_route(
-                    self.current_frame.step_info[name]["spawn_road"],
-                    self.current_frame.step_info[name]["destination"][-1]
-                )
+            self._spawn_recorded_object(name, config, self.current_frame)
         if self.engine.only_reset_when_replay:
             # for generation policies
             self.restore_policy_states(self.current_frame.policy_spawn_info)
         else:
             # Do not set position, in this mode, or randomness will be introduced!
             for name, state in self.current_frame.step_info.items():
-                self.spawned_objects[self.record_name_to_current_name[name]].before_step()
-                self.spawned_objects[self.record_name_to_current_name[name]].set_state(state)
-                self.spawned_objects[self.record_name_to_current_name[name]].after_step()
+                obj = self.spawned_objects[self.record_name_to_current_name[name]]
+                obj.before_step()
+                obj.set_state(state)
+                obj.after_step()
 
         to_clear = []
         for name in self.current_frame.clear_info:
@@ -195,6 +252,6 @@ class ReplayManager(BaseManager):
     def before_step(self, *args, **kwargs) -> dict:
         super(ReplayManager, self).before_step()
         if self.engine.replay_episode and not self.engine.only_reset_when_replay:
-            self.current_frames = self.restore_episode_info["frame"].pop()
+            self.current_frames = self._next_step_frames()
             self.current_frames.reverse()
         return {}
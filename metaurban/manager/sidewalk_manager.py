@@ -17,45 +17,6 @@ import json
 import random
 
 
-class GridCell:
-    """
-    Represents a single cell in a grid, which can be occupied by an object.
-    """
-    def __init__(self, position, occupied=False):
-        """
-        Args:
-            position (tuple): The position of the cell in the grid, as a tuple (i, j).
-            occupied (bool): Whether the cell is occupied by an object.
-        """
-        self.position = position
-        self.occupied = occupied
-        self.object = None  # Optional, to reference the object occupying the cell
-
-    def is_occupied(self):
-        """
-        Check if the cell is occupied by an object.
-        returns:
-            bool: True if the cell is occupied, False otherwise.
-        """
-        return self.occupied
-
-    def occupy(self, obj):
-        """
-        Mark the cell as occupied by an object.
-        returns:
-            bool: True if the cell is occupied, False otherwise.
-        """
-        self.occupied = True
-        self.object = obj
-
-    def release(self):
-        """
-        Mark the cell as unoccupied.
-        """
-        self.occupied = False
-        self.object = None
-
-
 class ObjectPlacer:
     """
     This class is used to place objects on a grid, ensuring that they do not overlap.
@@ -63,19 +24,17 @@ class ObjectPlacer:
     def __init__(self, grid):
         """
         Args:
-            grid (list): A 2D list of GridCell objects representing the placement grid.
-            
+            grid (np.ndarray): A 2D boolean array representing the placement grid, True for occupied cells.
+
             Example:
-            grid = [
-                [GridCell(), GridCell(), GridCell()],
-                [GridCell(), GridCell(), GridCell()],
-                [GridCell(), GridCell(), GridCell()]
-            ]
+            grid = np.zeros((num_cells_long, num_cells_lat), dtype=bool)
         """
         self.grid = grid
         # Dictionary to store the objects that have been placed, with their positions
         # Keys are tuples (object_id, position), values are tuples (position, object)
         self.placed_objects = {}
+        # Summed-area table of the grid, rebuilt lazily after cells are marked
+        self._summed_area = None
 
     def place_object(self, obj, last_long=None):
         """
@@ -117,125 +76,142 @@ class ObjectPlacer:
         Returns:
             tuple: The top-left position where the object can be placed, or None if no position is found.
         """
+        num_long, num_lat = self.grid.shape
         if 'obj_generation_mode' in obj:
             if obj['obj_generation_mode'] == 'parallel_only':
                 if last_long is not None:
                     assert 'spawn_long_gap' in obj
-                    for i in range(last_long + obj['spawn_long_gap'], len(self.grid)):
-                        for j in range(1):
-                            if self.can_place(i + 1, j + 1, obj):
-                                return (i + 1, j + 1)  # Top-left position where the object can be placed
-                    return None
+                    return self.first_valid_position(obj, range(last_long + obj['spawn_long_gap'], num_long), range(1))
 
-                for i in range(len(self.grid)):
-                    for j in range(1):
-                        if self.can_place(i + 1, j + 1, obj):
-                            return (i + 1, j + 1)  # Top-left position where the object can be placed
-
-                return None
+                return self.first_valid_position(obj, range(num_long), range(1))
 
             if obj['obj_generation_mode'] == 'normal':
                 if last_long is not None:
                     assert 'spawn_long_gap' in obj
-                    for i in range(last_long + obj['spawn_long_gap'], len(self.grid)):
-                        for j in range(len(self.grid[i])):
-                            if self.can_place(i + 1, j + 1, obj):
-                                return (i + 1, j + 1)  # Top-left position where the object can be placed
-                    return None
+                    return self.first_valid_position(
+                        obj, range(last_long + obj['spawn_long_gap'], num_long), range(num_lat)
+                    )
 
-                for i in range(len(self.grid)):
-                    for j in range(len(self.grid[i])):
-                        if self.can_place(i + 1, j + 1, obj):
-                            return (i + 1, j + 1)  # Top-left position where the object can be placed
+                return self.first_valid_position(obj, range(num_long), range(num_lat))
 
             if obj['obj_generation_mode'] == 'random_start':
                 if last_long is not None:
                     assert 'spawn_long_gap' in obj
-                    if last_long + obj['spawn_long_gap'] >= len(self.grid) - 5:
+                    if last_long + obj['spawn_long_gap'] >= num_long - 5:
                         return None
                     start_long = np.random.randint(
-                        last_long + obj['spawn_long_gap'],
-                        min(len(self.grid) - 5, last_long + obj['spawn_long_gap'] + 1), 1
+                        last_long + obj['spawn_long_gap'], min(num_long - 5, last_long + obj['spawn_long_gap'] + 1), 1
                     )[0]
-                    start_lat = np.random.randint(0, max(len(self.grid[0]) - 10, 1), 1)[0]
-                    for i in range(start_long, len(self.grid)):
-                        for j in range(start_lat, len(self.grid[i])):
-                            if self.can_place(i + 1, j + 1, obj):
-                                return (i + 1, j + 1)  # Top-left position where the object can be placed
-                    return None
-
-                start_long = np.random.randint(0, max(len(self.grid) - 10, 1), 1)[0]
-                start_lat = np.random.randint(0, max(len(self.grid[0]) - 10, 1), 1)[0]
-                for i in range(start_long, len(self.grid)):
-                    for j in range(start_lat, len(self.grid[i])):
-                        return (i + 1, j + 1)  # Top-left position where the object can be placed
+                    start_lat = np.random.randint(0, max(num_lat - 10, 1), 1)[0]
+                    return self.first_valid_position(obj, range(start_long, num_long), range(start_lat, num_lat))
+
+                start_long = np.random.randint(0, max(num_long - 10, 1), 1)[0]
+                start_lat = np.random.randint(0, max(num_lat - 10, 1), 1)[0]
+                if self.can_place(start_long + 1, start_lat + 1, obj):
+                    return (start_long + 1, start_lat + 1)  # Top-left position where the object can be placed
 
                 return None
 
             if obj['obj_generation_mode'] == 'inverse':
                 if last_long is not None:
                     assert 'spawn_long_gap' in obj
-                    for i in range(len(self.grid) - 1, last_long + obj['spawn_long_gap'], -1):
-                        for j in range(len(self.grid[i]) - 1, 0, -1):
-                            if self.can_place(i + 1, j + 1, obj):
-                                return (i + 1, j + 1)  # Top-left position where the object can be placed
-                    return None
-
-                for i in range(len(self.grid)):
-                    for j in range(len(self.grid[i])):
-                        if self.can_place(i + 1, j + 1, obj):
-                            return (i + 1, j + 1)  # Top-left position where the object can be placed
+                    return self.first_valid_position(
+                        obj, range(num_long - 1, last_long + obj['spawn_long_gap'], -1), range(num_lat - 1, 0, -1)
+                    )
 
-                return None
+                return self.first_valid_position(obj, range(num_long), range(num_lat))
         else:
             if last_long is not None:
                 assert 'spawn_long_gap' in obj
-                for i in range(last_long + obj['spawn_long_gap'], len(self.grid)):
-                    for j in range(len(self.grid[i])):
-                        if self.can_place(i + 1, j + 1, obj):
-                            return (i + 1, j + 1)  # Top-left position where the object can be placed
-                return None
+                return self.first_valid_position(
+                    obj, range(last_long + obj['spawn_long_gap'], num_long), range(num_lat)
+                )
 
-            for i in range(len(self.grid)):
-                for j in range(len(self.grid[i])):
-                    if self.can_place(i + 1, j + 1, obj):
-                        return (i + 1, j + 1)  # Top-left position where the object can be placed
+            return self.first_valid_position(obj, range(num_long), range(num_lat))
 
+    def first_valid_position(self, obj, rows, cols):
+        """
+        Scan the candidates (i + 1, j + 1) for i in rows and j in cols, in row-major order, and return the first one
+        where the object can be placed. All candidates are checked at once with the summed-area table.
+        Args:
+            obj (dict): The object to be placed, with properties like length and width.
+            rows (range): The row indices to scan.
+            cols (range): The column indices to scan.
+        Returns:
+            tuple: The top-left position where the object can be placed, or None if no position is found.
+        """
+        if len(rows) == 0 or len(cols) == 0:
             return None
+        valid = self.valid_positions(obj)
+        rows = np.asarray(rows) + 1
+        cols = np.asarray(cols) + 1
+        # candidates outside of the valid table are out of bounds
+        rows = rows[rows < valid.shape[0]]
+        cols = cols[cols < valid.shape[1]]
+        candidates = valid[np.ix_(rows, cols)]
+        if not candidates.any():
+            return None
+        i, j = np.unravel_index(np.argmax(candidates), candidates.shape)
+        return (int(rows[i]), int(cols[j]))  # Top-left position where the object can be placed
 
-    def can_place(self, start_i, start_j, obj):
+    def valid_positions(self, obj):
         """
-        Check if the object can be placed starting from the given position.
-        The object is placed with additional 2-cell buffer around it.
+        Compute where the object can be placed, with the additional buffer around it.
         Args:
-            start_i (int): The starting row index of the grid.
-            start_j (int): The starting column index of the grid.
             obj (dict): The object to be placed, with properties like length and width.
         Returns:
-            bool: True if the object can be placed, False otherwise.
+            np.ndarray: Boolean array, True at the top-left positions (start_i, start_j) where the object fits in the
+            grid without overlapping any occupied cell.
+        """
+        span_length, span_width = self.object_span(obj)
+        num_long, num_lat = self.grid.shape
+        if span_length > num_long or span_width > num_lat:
+            return np.zeros((0, 0), dtype=bool)
+        if self._summed_area is None:
+            self._summed_area = np.zeros((num_long + 1, num_lat + 1), dtype=np.int64)
+            self._summed_area[1:, 1:] = self.grid.cumsum(axis=0).cumsum(axis=1)
+        s = self._summed_area
+        occupied = s[span_length:, span_width:] - s[:-span_length, span_width:] - \
+            s[span_length:, :-span_width] + s[:-span_length, :-span_width]
+        return occupied == 0
+
+    def object_span(self, obj):
+        """
+        The number of cells the object spans, with the additional buffer around it.
+        Args:
+            obj (dict): The object to be placed, with properties like length and width.
+        Returns:
+            tuple: (span_length, span_width) in cells.
         """
         # Define the size of each cell (in meters, for example)
         cell_length = 1  # Length of each cell in meters
         cell_width = 1  # Width of each cell in meters
 
         # Calculate the number of cells the object spans, rounding up
-        # Note we add 2 to the span to create a buffer around the object
+        # Note we add the buffer to the span to create a buffer around the object
         span_length = math.ceil(obj['general']['length'] / cell_length) + self.buffer
         span_width = math.ceil(obj['general']['width'] / cell_width) + self.buffer
-        # span_length = math.ceil(obj['general']['width'] / cell_width) + 2
-        # span_width = math.ceil(obj['general']['length'] / cell_length) + 2
+        return span_length, span_width
+
+    def can_place(self, start_i, start_j, obj):
+        """
+        Check if the object can be placed starting from the given position.
+        The object is placed with additional 2-cell buffer around it.
+        Args:
+            start_i (int): The starting row index of the grid.
+            start_j (int): The starting column index of the grid.
+            obj (dict): The object to be placed, with properties like length and width.
+        Returns:
+            bool: True if the object can be placed, False otherwise.
+        """
+        span_length, span_width = self.object_span(obj)
 
         # Check if the object fits within the grid bounds
-        if start_i + span_length > len(self.grid) or start_j + span_width > len(self.grid[0]):
+        if start_i + span_length > self.grid.shape[0] or start_j + span_width > self.grid.shape[1]:
             return False
 
         # Check for any overlaps with existing objects
-        for i in range(start_i, start_i + span_length):
-            for j in range(start_j, start_j + span_width):
-                if self.grid[i][j].is_occupied():
-                    return False
-
-        return True
+        return not self.grid[start_i:start_i + span_length, start_j:start_j + span_width].any()
 
     def mark_occupied_cells(self, start_position, obj):
         """
@@ -247,17 +223,11 @@ class ObjectPlacer:
             Nothing, directly marks the cells as occupied.
         """
         start_i, start_j = start_position
-        cell_length = 1  # Length of each cell in meters
-        cell_width = 1  # Width of each cell in meters
-
-        # Calculate the number of cells the object spans, rounding up
-        span_length = math.ceil(obj['general']['length'] / cell_length) + self.buffer
-        span_width = math.ceil(obj['general']['width'] / cell_width) + self.buffer
+        span_length, span_width = self.object_span(obj)
 
         # Mark the occupied cells
-        for i in range(start_i, start_i + span_length):
-            for j in range(start_j, start_j + span_width):
-                self.grid[i][j].occupy(obj)
+        self.grid[start_i:start_i + span_length, start_j:start_j + span_width] = True
+        self._summed_area = None
 
     def is_placement_possible(self):
         """
@@ -266,11 +236,7 @@ class ObjectPlacer:
         Returns:
             bool: True if there is space available, False otherwise.
         """
-        for i in range(len(self.grid)):
-            for j in range(len(self.grid[i])):
-                if not self.grid[i][j].is_occupied():
-                    return True
-        return False
+        return not self.grid.all()
 
 
 class AssetManager(BaseManager):
@@ -1273,9 +1239,7 @@ class AssetManager(BaseManager):
 
                     if lane == block.positive_basic_lane:
                         for region, grid in name_grid_list:
-                            for i in range(10):
-                                for j in range(len(grid[0])):
-                                    grid[i][j].occupied = True
+                            grid[:10] = True
 
                     for region, grid in name_grid_list:
                         object_placer = ObjectPlacer(grid)
@@ -1729,7 +1693,7 @@ class AssetManager(BaseManager):
             lane (Lane): The lane object.
             lateral_range (tuple): The start and end of the lateral range for the grid.
         Returns:
-            list: A 2D list of GridCell objects representing the grid."""
+            np.ndarray: A 2D boolean array representing the grid, True for occupied cells."""
         # Define the size of each cell (in meters, for example)
         cell_length = 1  # Length of a cell along the lane
         cell_width = 1  # Width of a cell across the lane
@@ -1742,11 +1706,8 @@ class AssetManager(BaseManager):
             num_cells_long = int((lane.length + PGDrivableAreaProperty.SIDEWALK_LENGTH) / cell_length)
         num_cells_lat = int((lateral_range[1] - lateral_range[0]) / cell_width)
 
-        # Create the grid as a 2D array of GridCell objects
-        grid = [
-            [GridCell(position=(i * cell_length, j * cell_width + lateral_range[0])) for j in range(num_cells_lat)]
-            for i in range(num_cells_long)
-        ]
+        # Create the grid as a 2D occupancy array, True for occupied cells
+        grid = np.zeros((max(num_cells_long, 0), max(num_cells_lat, 0)), dtype=bool)
 
         return grid
 
@@ -1979,14 +1940,13 @@ class AssetManager(BaseManager):
         """
         Visualize the grid by printing it to the console.
         Args:
-            grid (list): A 2D list of GridCell objects representing the grid.
+            grid (np.ndarray): A 2D boolean array representing the grid, True for occupied cells.
         Returns:
             Nothing, directly prints the grid to the console.
         """
         for row in grid:
             for cell in row:
-                # Assuming each cell has a method 'is_occupied' to check if it's occupied
-                char = 'X' if cell.is_occupied() else '.'
+                char = 'X' if cell else '.'
                 print(char, end=' ')
             print()  # Newline after each row
 
@@ -60,9 +60,7 @@ class ImageObservation(BaseObservation):
         self.image_source = image_source
         super(ImageObservation, self).__init__(config)
         self.norm_pixel = clip_rgb
-        self.state = np.zeros(self.observation_space.shape, dtype=np.float32 if self.norm_pixel else np.uint8)
-        if self.enable_cuda:
-            self.state = cp.asarray(self.state)
+        self._make_frames()
 
     @property
     def observation_space(self):
@@ -83,11 +81,25 @@ class ImageObservation(BaseObservation):
         Get the image Observation. By setting new_parent_node and the reset parameters, it can capture a new image from
         a different position and pose
         """
-        new_obs = self.engine.get_sensor(self.image_source).perceive(self.norm_pixel, new_parent_node, position, hpr)
-        self.state = cp.roll(self.state, -1, axis=-1) if self.enable_cuda else np.roll(self.state, -1, axis=-1)
-        self.state[..., -1] = new_obs
+        self.engine.get_sensor(self.image_source).perceive(
+            self.norm_pixel, new_parent_node, position, hpr, out=self._frames[..., self._head]
+        )
+        self._head = (self._head + 1) % self.STACK_SIZE
+        xp = cp if self.enable_cuda else np
+        self.state = xp.take(self._frames, self._orders[self._head], axis=-1)
         return self.state
 
+    def _make_frames(self):
+        """
+        Frames are kept in a ring buffer and the new image is written into the slot of the oldest frame, so no frame is
+        moved or re-allocated. The observation is the stack of frames from the oldest to the newest one
+        """
+        xp = cp if self.enable_cuda else np
+        self._frames = xp.zeros(self.observation_space.shape, dtype=np.float32 if self.norm_pixel else np.uint8)
+        self._orders = [xp.asarray(np.roll(np.arange(self.STACK_SIZE), -i)) for i in range(self.STACK_SIZE)]
+        self._head = 0
+        self.state = self._frames.copy()
+
     def get_image(self):
         return self.state.copy()[:, :, -1]
 
@@ -98,9 +110,7 @@ class ImageObservation(BaseObservation):
         :param vehicle: BaseVehicle
         :return: None
         """
-        self.state = np.zeros(self.observation_space.shape, dtype=np.float32)
-        if self.enable_cuda:
-            self.state = cp.asarray(self.state)
+        self._make_frames()
 
     def destroy(self):
         """
@@ -108,3 +118,4 @@ class ImageObservation(BaseObservation):
         """
         super(ImageObservation, self).destroy()
         self.state = None
+        self._frames = None
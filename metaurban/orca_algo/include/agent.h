@@ -65,6 +65,8 @@ class Agent {
 
 		bool InitPath();
 
+		void SetGoal(const Point &newGoal);
+
 		int GetID() const;
 
 		Point GetPosition() const;
@@ -73,8 +75,12 @@ class Agent {
 
 		float GetRadius() const;
 
+		float GetSightRadius() const;
+
 		Point GetNext() const;
 
+		Point GetGoal() const;
+
 
 		std::pair<unsigned int, unsigned int> GetCollision() const;
 
@@ -109,6 +115,7 @@ class Agent {
 		const Map *map;
 		std::vector<std::pair<float, Agent *>> Neighbours;
 		std::vector<std::pair<float, ObstacleSegment>> NeighboursObst;
+		std::vector<int> obstCandidates;
 
 		std::vector<Line> ORCALines;
 
@@ -133,4 +140,12 @@ class Agent {
 };
 
 
+// Orders agents by ID instead of by address, so that sets of agents are iterated in the same order in every run
+struct AgentIDLess {
+	bool operator()(const Agent *a, const Agent *b) const {
+		return a->GetID() < b->GetID();
+	}
+};
+
+
 #endif //ORCA_AGENT_H
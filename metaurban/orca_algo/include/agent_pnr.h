@@ -58,9 +58,9 @@ class agent_pnr : public Agent {
 	private:
 		std::vector<std::pair<float, Agent *>> &GetNeighbours();
 
-		std::set<agent_pnr *> GetAgentsForCentralizedPlanning();
+		std::set<agent_pnr *, AgentIDLess> GetAgentsForCentralizedPlanning();
 
-		void SetAgentsForCentralizedPlanning(std::set<agent_pnr *> agents);
+		void SetAgentsForCentralizedPlanning(std::set<agent_pnr *, AgentIDLess> agents);
 
 		void PreparePARExecution();
 
@@ -78,7 +78,7 @@ class agent_pnr : public Agent {
 		SubMap PARMap;
 		MAPFActorSet PARSet;
 		MAPFConfig conf;
-		std::set<agent_pnr *> PARAgents;
+		std::set<agent_pnr *, AgentIDLess> PARAgents;
 		float fakeRadius;
 		bool inPARMode;
 		bool moveToPARPos;
@@ -63,9 +63,9 @@ class ORCAAgentWithPARAndECBS : public Agent {
 	private:
 		std::vector<std::pair<float, Agent *>> &GetNeighbours();
 
-		std::set<ORCAAgentWithPARAndECBS *> GetAgentsForCentralizedPlanning();
+		std::set<ORCAAgentWithPARAndECBS *, AgentIDLess> GetAgentsForCentralizedPlanning();
 
-		void SetAgentsForCentralizedPlanning(std::set<ORCAAgentWithPARAndECBS *> agents);
+		void SetAgentsForCentralizedPlanning(std::set<ORCAAgentWithPARAndECBS *, AgentIDLess> agents);
 
 		void PrepareMAPFExecution();
 
@@ -83,7 +83,7 @@ class ORCAAgentWithPARAndECBS : public Agent {
 		SubMap MAPFMap;
 		MAPFActorSet MAPFSet;
 		MAPFConfig conf;
-		std::set<ORCAAgentWithPARAndECBS *> MAPFAgents;
+		std::set<ORCAAgentWithPARAndECBS *, AgentIDLess> MAPFAgents;
 		float fakeRadius;
 		bool inMAPFMode;
 		bool moveToMAPFPos;
@@ -0,0 +1,72 @@
+#include <string>
+#include <vector>
+
+#include "reader.h"
+#include "const.h"
+#include "agent.h"
+#include "orca_agent.h"
+#include "orca_diff_drive_agent.h"
+#include "thetastar.h"
+#include "direct_planner.h"
+#include "agent_pnr.h"
+#include "agent_pnr_ecbs.h"
+#include "agent_returning.h"
+
+
+#ifndef ORCA_ARRAYREADER_H
+#define ORCA_ARRAYREADER_H
+
+
+/*
+ * Builds a task directly from in-memory data (occupancy grid, obstacle contours, starts and goals)
+ * instead of parsing an XML document. Agents whose start or goal is invalid are skipped, as in XMLReader,
+ * but GetAgents does not fail in that case: it hands out the agents that were actually created.
+ */
+class ArrayReader : public Reader {
+	public:
+		ArrayReader();
+
+		ArrayReader(const std::vector<std::vector<int>> &grid, const std::vector<std::vector<Point>> &obstacles,
+					const std::vector<Point> &starts, const std::vector<Point> &goals, const std::string &agentType,
+					float cellSize, float agentSize, float timeStep, float delta);
+
+		ArrayReader(const ArrayReader &obj);
+
+		~ArrayReader() override;
+
+		bool ReadData() override;
+
+		bool GetMap(Map **map) override;
+
+		bool GetEnvironmentOptions(environment_options **envOpt) override;
+
+		bool GetAgents(std::vector<Agent *> &agents, const int &numThreshold) override;
+
+		ArrayReader *Clone() const override;
+
+		ArrayReader &operator=(const ArrayReader &obj);
+
+	private:
+		std::vector<std::vector<int>> grid;
+		std::vector<std::vector<Point>> obstacles;
+		std::vector<Point> starts;
+		std::vector<Point> goals;
+		std::string agentType;
+		float cellSize;
+		float agentSize;
+		float timeStep;
+		float delta;
+
+		std::vector<Agent *> *allAgents;
+		Map *map;
+		environment_options *options;
+
+		bool ReadMap();
+
+		bool ReadAgents();
+
+		bool ReadAlgorithmOptions();
+};
+
+
+#endif //ORCA_ARRAYREADER_H
@@ -16,6 +16,7 @@
 #define SMALL_SPEED 0.1
 #define MISSION_SMALL_SPEED 0.001
 #define ECBS_SUBOUT_FACTOR 10.0
+#define OBST_INDEX_CELL_SIZE 4
 
 
 //XML tags
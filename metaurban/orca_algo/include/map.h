@@ -1,7 +1,11 @@
 #include <string>
 #include <vector>
+#include <algorithm>
+#include <cmath>
+#include <memory>
 
 #include "geom.h"
+#include "path_cache.h"
 
 
 #ifndef ORCA_MAP_H
@@ -36,15 +40,36 @@ class Map {
 
 		const std::vector<std::vector<ObstacleSegment>> &GetObstacles() const;
 
+		void GetObstaclesInRange(const Point &point, float range, std::vector<int> &segments) const;
+
+		const ObstacleSegment &GetObstacleSegment(int segment) const;
+
+		PathCache *GetPathCache() const;
+
+		void SetPathCache(std::shared_ptr<PathCache> cache);
+
 		Map &operator=(const Map &obj);
 
 	private:
+		void BuildObstacleIndex();
+
 		float cellSize;
 		unsigned int height;
 		unsigned int width;
 		std::vector<std::vector<int>> *grid;
 		std::vector<std::vector<ObstacleSegment>> *obstacles;
 
+		// Uniform grid over the obstacle segments. Segments are numbered in the order of GetObstacles(), and every
+		// cell lists the segments whose bounding box overlaps it
+		std::vector<const ObstacleSegment *> obstSegments;
+		std::vector<std::vector<int>> obstIndex;
+		float obstIndexCellSize;
+		int obstIndexWidth;
+		int obstIndexHeight;
+
+		// Memoized global paths, shared by the copies of the map
+		std::shared_ptr<PathCache> pathCache;
+
 };
 
 
@@ -8,12 +8,14 @@
 #include <fstream>
 #include <unordered_map>
 #include <chrono>
+#include <memory>
 
 #include "agent.h"
 #include "summary.h"
 #include "xml_reader.h"
 #include "xml_logger.h"
 #include "mapf_instances_logger.h"
+#include "worker_pool.h"
 
 using namespace tinyxml2;
 
@@ -32,6 +34,9 @@ class Mission {
 		Mission(std::string &xml_data, unsigned int agentsNum, unsigned int stepsTh, bool time, size_t timeTh,
 				bool speedStop);
 
+		Mission(Reader *reader, unsigned int agentsNum, unsigned int stepsTh, bool time, size_t timeTh,
+				bool speedStop);
+
 		Mission(const Mission &obj);
 
 		~Mission();
@@ -40,9 +45,31 @@ class Mission {
 
 		Summary StartMission();
 
+		void InitMission();
+
+		void StepForward();
+
+		bool NeedToStop(size_t time);
+
+		bool SetAgentGoal(int id, const Point &goal);
+
+		bool IsAgentFinished(int id);
+
+		void SetStepsLogging(bool enabled);
+
+		void SetPathCache(std::shared_ptr<PathCache> cache);
+
+		void SetThreadsNum(size_t threadsNum);
+
 		Mission &operator=(const Mission &obj);
 		unordered_map<int, trajectory_dict> save_dict();
 
+		const std::unordered_map<int, std::vector<Point>> &GetStepsLog() const;
+
+		unsigned int GetStepsCount() const;
+
+		const std::vector<Agent *> &GetAgents() const;
+
 
 #if FULL_LOG
 
@@ -52,10 +79,16 @@ class Mission {
 #endif
 
 	private:
+		Agent *FindAgent(int id);
+
 		void UpdateSate();
 
 		void AssignNeighbours();
 
+		void ForEachAgent(const std::function<void(size_t, size_t)> &task);
+
+		static long long NeighbourCell(int i, int j);
+
 		bool IsFinished();
 
 		vector<Agent *> agents;
@@ -69,6 +102,7 @@ class Mission {
 		bool isTimeBounded;
 		bool stopByMeanSpeed;
 		bool allStops;
+		bool stepsLogging;
 		size_t timeTreshhold;
 
 		unsigned int stepsCount;
@@ -79,6 +113,10 @@ class Mission {
 		std::vector<std::list<float>> commonSpeedsBuffer;
 		std::unordered_map<int, std::vector<Point>> stepsLog;
 		std::unordered_map<int, std::vector<Point>> goalsLog;
+		std::unordered_map<long long, std::vector<size_t>> neighbourGrid;
+		std::vector<std::vector<size_t>> neighbourCandidates;
+		std::vector<std::vector<std::pair<size_t, float>>> agentsNeighbours;
+		std::shared_ptr<WorkerPool> workers;
 
 
 #if FULL_LOG
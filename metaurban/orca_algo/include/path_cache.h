@@ -0,0 +1,67 @@
+#include <list>
+#include <mutex>
+#include <unordered_map>
+
+#include "geom.h"
+
+#ifndef ORCA_PATH_CACHE_H
+#define ORCA_PATH_CACHE_H
+
+
+/*
+ * Memoized results of ThetaStar searches on one map, keyed by start cell, goal cell and agent radius. Entries are
+ * evicted in LRU order beyond the capacity. It is shared between missions on the same map, and between the agents of a
+ * mission, so it is thread safe. A cache must only be used with one map and one set of search options.
+ */
+class PathCache {
+	public:
+		explicit PathCache(size_t capacity);
+
+		// Copy the cached search result to found and path, returns false if the search is not cached
+		bool Get(const Node &start, const Node &goal, float radius, bool &found, std::list<Point> &path);
+
+		void Put(const Node &start, const Node &goal, float radius, bool found, const std::list<Point> &path);
+
+		void Clear();
+
+		size_t Size();
+
+		size_t GetCapacity() const;
+
+		size_t hits;
+		size_t misses;
+
+	private:
+		struct Key {
+			int si, sj, gi, gj;
+			float radius;
+
+			bool operator==(const Key &other) const {
+				return si == other.si && sj == other.sj && gi == other.gi && gj == other.gj && radius == other.radius;
+			}
+		};
+
+		struct KeyHash {
+			size_t operator()(const Key &key) const {
+				size_t hash = std::hash<float>()(key.radius);
+				for (int v: {key.si, key.sj, key.gi, key.gj}) {
+					hash = hash * 31 + std::hash<int>()(v);
+				}
+				return hash;
+			}
+		};
+
+		struct Entry {
+			Key key;
+			bool found;
+			std::list<Point> path;
+		};
+
+		size_t capacity;
+		std::list<Entry> entries;
+		std::unordered_map<Key, std::list<Entry>::iterator, KeyHash> index;
+		std::mutex lock;
+};
+
+
+#endif //ORCA_PATH_CACHE_H
@@ -0,0 +1,52 @@
+#include <algorithm>
+#include <atomic>
+#include <condition_variable>
+#include <functional>
+#include <mutex>
+#include <thread>
+#include <vector>
+
+#ifndef ORCA_WORKER_POOL_H
+#define ORCA_WORKER_POOL_H
+
+
+/*
+ * Fixed set of threads running loops whose iterations are independent, e.g. the per agent steps of a mission.
+ * Iterations are handed out in chunks to the calling thread and the workers, so a task must only write the state of
+ * its own iteration, and the result doesn't depend on the number of threads.
+ */
+class WorkerPool {
+	public:
+		explicit WorkerPool(size_t threadsNum);
+
+		WorkerPool(const WorkerPool &obj) = delete;
+
+		~WorkerPool();
+
+		size_t GetThreadsNum() const;
+
+		// Run task(i, thread) for all i in [0, n) and wait for them, thread is in [0, GetThreadsNum())
+		void ParallelFor(size_t n, const std::function<void(size_t, size_t)> &task);
+
+		WorkerPool &operator=(const WorkerPool &obj) = delete;
+
+	private:
+		void Work(size_t thread);
+
+		void RunChunks(size_t thread);
+
+		std::vector<std::thread> threads;
+		std::mutex lock;
+		std::condition_variable started;
+		std::condition_variable finished;
+
+		const std::function<void(size_t, size_t)> *currTask;
+		size_t tasksNum;
+		std::atomic<size_t> nextTask;
+		size_t generation;
+		size_t busyThreads;
+		bool stop;
+};
+
+
+#endif //ORCA_WORKER_POOL_H
@@ -144,17 +144,16 @@ Point Agent::GetPosition() const {
 
 void Agent::UpdateNeighbourObst() {
 	NeighboursObst.clear();
-	std::vector<std::vector<ObstacleSegment>> tmpObstacles = map->GetObstacles();
+	// candidates come in the order of map->GetObstacles(), so the sort below keeps the order of the full scan
+	map->GetObstaclesInRange(position, std::sqrt(maxSqObstDist), obstCandidates);
 	float distSq = 0;
 
-	for (int i = 0; i < tmpObstacles.size(); i++) {
-		for (int j = 0; j < tmpObstacles[i].size(); j++) {
-
-			distSq = Utils::SqPointSegDistance(static_cast<Point>(tmpObstacles[i][j].left),
-											   static_cast<Point>(tmpObstacles[i][j].right), position);
-			if (distSq < maxSqObstDist) {
-				NeighboursObst.push_back({distSq, tmpObstacles[i][j]});
-			}
+	for (int id: obstCandidates) {
+		const ObstacleSegment &segment = map->GetObstacleSegment(id);
+		distSq = Utils::SqPointSegDistance(static_cast<Point>(segment.left), static_cast<Point>(segment.right),
+										   position);
+		if (distSq < maxSqObstDist) {
+			NeighboursObst.push_back({distSq, segment});
 		}
 	}
 
@@ -177,6 +176,18 @@ bool Agent::InitPath() {
 }
 
 
+void Agent::SetGoal(const Point &newGoal) {
+	start = position;
+	goal = newGoal;
+	if (planner != nullptr) {
+		delete planner;
+	}
+	planner = new ThetaStar(*map, *options, start, goal, param.radius + param.rEps);
+	speedSaveBuffer = std::list<float>(SPEED_BUFF_SIZE, param.maxSpeed);
+	meanSavedSpeed = 1.0f;
+}
+
+
 int Agent::GetID() const {
 	return id;
 }
@@ -187,6 +198,11 @@ float Agent::GetRadius() const {
 }
 
 
+float Agent::GetSightRadius() const {
+	return param.sightRadius;
+}
+
+
 Agent &Agent::operator=(const Agent &obj) {
 
 	if (this != &obj) {
@@ -225,6 +241,11 @@ Point Agent::GetNext() const {
 }
 
 
+Point Agent::GetGoal() const {
+	return goal;
+}
+
+
 bool Agent::CommonPointMAPFTrigger(float distToTargetPoint) {
 	return (Neighbours.size() >= options->MAPFNum) && (distToTargetPoint < param.sightRadius);
 }
@@ -3,7 +3,7 @@
 
 agent_pnr::agent_pnr() : Agent() {
 	fakeRadius = 0;
-	PARAgents = std::set<agent_pnr *>();
+	PARAgents = std::set<agent_pnr *, AgentIDLess>();
 	inPARMode = false;
 	moveToPARPos = false;
 	PARExec = false;
@@ -52,7 +52,7 @@ agent_pnr::agent_pnr(const int &id, const Point &start, const Point &goal, const
 					 const environment_options &options, AgentParam param) : Agent(id, start, goal, map,
 																								 options, param) {
 	fakeRadius = param.rEps + param.radius;
-	PARAgents = std::set<agent_pnr *>();
+	PARAgents = std::set<agent_pnr *, AgentIDLess>();
 	inPARMode = false;
 	moveToPARPos = false;
 	PARVis = false;
@@ -758,12 +758,12 @@ void agent_pnr::AddNeighbour(Agent &neighbour, float distSq) {
 }
 
 
-std::set<agent_pnr *> agent_pnr::GetAgentsForCentralizedPlanning() {
+std::set<agent_pnr *, AgentIDLess> agent_pnr::GetAgentsForCentralizedPlanning() {
 	return PARAgents;
 }
 
 
-void agent_pnr::SetAgentsForCentralizedPlanning(std::set<agent_pnr *> agents) {
+void agent_pnr::SetAgentsForCentralizedPlanning(std::set<agent_pnr *, AgentIDLess> agents) {
 	PARAgents.clear();
 	for (auto &a: agents) {
 		PARAgents.insert(a);
@@ -980,7 +980,7 @@ bool agent_pnr::UpdatePAR() {
 		ag->PARActorId = -1;
 	}
 
-	std::set<agent_pnr *> tmpAgents;
+	std::set<agent_pnr *, AgentIDLess> tmpAgents;
 	for (auto &ag: PARAgents) {
 
 		auto N = ag->GetNeighbours();
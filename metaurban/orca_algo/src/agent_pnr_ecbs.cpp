@@ -4,7 +4,7 @@
 ORCAAgentWithPARAndECBS::ORCAAgentWithPARAndECBS() : Agent() {
 //    srand (42);
 	fakeRadius = 0;
-	MAPFAgents = std::set<ORCAAgentWithPARAndECBS *>();
+	MAPFAgents = std::set<ORCAAgentWithPARAndECBS *, AgentIDLess>();
 	inMAPFMode = false;
 	moveToMAPFPos = false;
 	MAPFExec = false;
@@ -61,7 +61,7 @@ ORCAAgentWithPARAndECBS::ORCAAgentWithPARAndECBS(const int &id, const Point &sta
 																											   param) {
 //    srand (42);
 	fakeRadius = param.rEps + param.radius;
-	MAPFAgents = std::set<ORCAAgentWithPARAndECBS *>();
+	MAPFAgents = std::set<ORCAAgentWithPARAndECBS *, AgentIDLess>();
 	inMAPFMode = false;
 	moveToMAPFPos = false;
 	MAPFVis = false;
@@ -797,12 +797,12 @@ void ORCAAgentWithPARAndECBS::AddNeighbour(Agent &neighbour, float distSq) {
 }
 
 
-std::set<ORCAAgentWithPARAndECBS *> ORCAAgentWithPARAndECBS::GetAgentsForCentralizedPlanning() {
+std::set<ORCAAgentWithPARAndECBS *, AgentIDLess> ORCAAgentWithPARAndECBS::GetAgentsForCentralizedPlanning() {
 	return MAPFAgents;
 }
 
 
-void ORCAAgentWithPARAndECBS::SetAgentsForCentralizedPlanning(std::set<ORCAAgentWithPARAndECBS *> agents) {
+void ORCAAgentWithPARAndECBS::SetAgentsForCentralizedPlanning(std::set<ORCAAgentWithPARAndECBS *, AgentIDLess> agents) {
 	MAPFAgents = agents;
 }
 
@@ -1217,7 +1217,7 @@ bool ORCAAgentWithPARAndECBS::UpdateMAPF() {
 
 	}
 
-	std::set<ORCAAgentWithPARAndECBS *> tmpAgents;
+	std::set<ORCAAgentWithPARAndECBS *, AgentIDLess> tmpAgents;
 	for (auto &ag: MAPFAgents) {
 
 		auto N = ag->GetNeighbours();
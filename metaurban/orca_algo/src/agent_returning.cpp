@@ -424,7 +424,7 @@ std::vector<std::pair<float, Agent *>> &ORCAAgentWithReturning::GetNeighbours()
 
 
 void ORCAAgentWithReturning::SendRequestsForReturning() {
-	std::set<ORCAAgentWithReturning *> closeAgents;
+	std::set<ORCAAgentWithReturning *, AgentIDLess> closeAgents;
 	//closeAgents.insert(this);
 	auto buffSize = speedSaveBuffer.size();
 	speedSaveBuffer = std::list<float>(buffSize, param.maxSpeed);
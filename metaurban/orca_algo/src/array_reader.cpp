@@ -0,0 +1,243 @@
+#include "array_reader.h"
+
+
+ArrayReader::ArrayReader() {
+	this->agentType = CNS_DEFAULT_AGENT_TYPE;
+	this->cellSize = 1;
+	this->agentSize = CN_DEFAULT_SIZE;
+	this->timeStep = CN_DEFAULT_TIME_STEP;
+	this->delta = CN_DEFAULT_DELTA;
+	this->allAgents = nullptr;
+	this->map = nullptr;
+	this->options = nullptr;
+}
+
+
+ArrayReader::ArrayReader(const std::vector<std::vector<int>> &grid, const std::vector<std::vector<Point>> &obstacles,
+						 const std::vector<Point> &starts, const std::vector<Point> &goals,
+						 const std::string &agentType, float cellSize, float agentSize, float timeStep, float delta) {
+	this->grid = grid;
+	this->obstacles = obstacles;
+	this->starts = starts;
+	this->goals = goals;
+	this->agentType = agentType;
+	this->cellSize = cellSize;
+	this->agentSize = agentSize;
+	this->timeStep = timeStep;
+	this->delta = delta;
+	this->allAgents = new std::vector<Agent *>();
+	this->map = nullptr;
+	this->options = nullptr;
+}
+
+
+ArrayReader::ArrayReader(const ArrayReader &obj) {
+	grid = obj.grid;
+	obstacles = obj.obstacles;
+	starts = obj.starts;
+	goals = obj.goals;
+	agentType = obj.agentType;
+	cellSize = obj.cellSize;
+	agentSize = obj.agentSize;
+	timeStep = obj.timeStep;
+	delta = obj.delta;
+	allAgents = (obj.allAgents == nullptr) ? nullptr : new std::vector<Agent *>(*(obj.allAgents));
+	map = (obj.map == nullptr) ? nullptr : new Map(*obj.map);
+	options = (obj.options == nullptr) ? nullptr : new environment_options(*obj.options);
+}
+
+
+ArrayReader::~ArrayReader() {
+	if (allAgents != nullptr) {
+		delete allAgents;
+		allAgents = nullptr;
+	}
+
+	if (options != nullptr) {
+		delete options;
+		options = nullptr;
+	}
+
+	if (map != nullptr) {
+		delete map;
+		map = nullptr;
+	}
+}
+
+
+bool ArrayReader::ReadData() {
+	if (allAgents == nullptr || starts.size() != goals.size()) {
+		return false;
+	}
+	return ReadMap() && ReadAlgorithmOptions() && ReadAgents();
+}
+
+
+bool ArrayReader::GetMap(Map **map) {
+	if (this->map != nullptr) {
+		*map = this->map;
+		this->map = nullptr;
+		return true;
+	}
+
+	return false;
+}
+
+
+bool ArrayReader::GetEnvironmentOptions(environment_options **envOpt) {
+	if (this->options != nullptr) {
+		*envOpt = this->options;
+		this->options = nullptr;
+		return true;
+	}
+	return false;
+}
+
+
+bool ArrayReader::GetAgents(std::vector<Agent *> &agents, const int &numThreshold) {
+	if (allAgents == nullptr) {
+		return false;
+	}
+
+	agents.clear();
+	for (int i = 0; i < allAgents->size(); i++) {
+		if (i < numThreshold) {
+			agents.push_back((*allAgents)[i]);
+		}
+		else {
+			delete (*allAgents)[i];
+		}
+	}
+	allAgents->clear();
+	delete allAgents;
+	allAgents = nullptr;
+
+	return true;
+}
+
+
+ArrayReader *ArrayReader::Clone() const {
+	return new ArrayReader(*this);
+}
+
+
+ArrayReader &ArrayReader::operator=(const ArrayReader &obj) {
+	if (this != &obj) {
+		grid = obj.grid;
+		obstacles = obj.obstacles;
+		starts = obj.starts;
+		goals = obj.goals;
+		agentType = obj.agentType;
+		cellSize = obj.cellSize;
+		agentSize = obj.agentSize;
+		timeStep = obj.timeStep;
+		delta = obj.delta;
+
+		if (allAgents != nullptr) {
+			delete allAgents;
+		}
+		allAgents = (obj.allAgents == nullptr) ? nullptr : new std::vector<Agent *>(*(obj.allAgents));
+
+		if (map != nullptr) {
+			delete map;
+		}
+		map = (obj.map == nullptr) ? nullptr : new Map(*obj.map);
+
+		if (options != nullptr) {
+			delete options;
+		}
+		options = (obj.options == nullptr) ? nullptr : new environment_options(*obj.options);
+	}
+	return *this;
+}
+
+
+bool ArrayReader::ReadMap() {
+	if (grid.empty() || grid[0].empty() || cellSize <= 0) {
+		return false;
+	}
+	for (auto &row: grid) {
+		if (row.size() != grid[0].size()) {
+			return false;
+		}
+	}
+	map = new Map(cellSize, grid, obstacles);
+	return true;
+}
+
+
+bool ArrayReader::ReadAlgorithmOptions() {
+	// Same values as the <algorithm> section written by orca_planner_utils.write_to_xml
+	options = new environment_options(CN_DEFAULT_METRIC_TYPE, false, false, false, CN_DEFAULT_HWEIGHT, timeStep, delta,
+									  SPEED_BUFFER, CN_DEFAULT_MAPFNUM);
+	return true;
+}
+
+
+bool ArrayReader::ReadAgents() {
+	AgentParam defaultParam = AgentParam();
+	defaultParam.radius = agentSize;
+
+	for (int id = 0; id < starts.size(); id++) {
+		AgentParam param = AgentParam(defaultParam);
+		float stx = starts[id].X(), sty = starts[id].Y();
+		float gx = goals[id].X(), gy = goals[id].Y();
+		bool correct = true;
+
+		/* Checking params */
+		if (stx <= param.radius || sty <= param.radius ||
+			gx <= param.radius || gy <= param.radius ||
+			stx >= (map->GetWidth() * map->GetCellSize()) - param.radius ||
+			gx >= (map->GetWidth() * map->GetCellSize()) - param.radius ||
+			sty >= (map->GetHeight() * map->GetCellSize()) - param.radius ||
+			gy >= (map->GetHeight() * map->GetCellSize()) - param.radius) {
+			correct = false;
+		}
+
+		for (auto agent: *allAgents) {
+			float sqRadiusSum = static_cast<float>(std::pow((agent->GetRadius() + param.radius), 2.0));
+			float sqDist = (Point(stx, sty) - agent->GetPosition()).SquaredEuclideanNorm();
+			if (sqDist <= sqRadiusSum) {
+				correct = false;
+				break;
+			}
+		}
+		Node tmpStNode = map->GetClosestNode(Point(stx, sty));
+		Node tmpGlNode = map->GetClosestNode(Point(gx, gy));
+		LineOfSight positionChecker(param.radius / map->GetCellSize());
+		if (!positionChecker.checkTraversability(tmpStNode.i, tmpStNode.j, *map) ||
+			!positionChecker.checkTraversability(tmpGlNode.i, tmpGlNode.j, *map)) {
+			correct = false;
+		}
+
+		if (!correct) {
+			continue;
+		}
+
+		/* Creating of an agent */
+		Agent *a;
+		if (agentType == CNS_AT_ST_ORCA) {
+			a = new orca_agent(id, Point(stx, sty), Point(gx, gy), *map, *options, param);
+		}
+		else if (agentType == CNS_AT_ST_ORCADD) {
+			a = new ORCADDAgent(id, Point(stx, sty), Point(gx, gy), *map, *options, param,
+								2 * (param.radius + param.rEps), 2 * (param.radius), CN_DEFAULT_START_THETA);
+		}
+		else if (agentType == CNS_AT_ST_ORCAPAR) {
+			a = new agent_pnr(id, Point(stx, sty), Point(gx, gy), *map, *options, param);
+		}
+		else if (agentType == CNS_AT_ST_ORCAPARECBS) {
+			a = new ORCAAgentWithPARAndECBS(id, Point(stx, sty), Point(gx, gy), *map, *options, param);
+		}
+		else if (agentType == CNS_AT_ST_ORCARETURN) {
+			a = new ORCAAgentWithReturning(id, Point(stx, sty), Point(gx, gy), *map, *options, param);
+		}
+		else {
+			a = new orca_agent(id, Point(stx, sty), Point(gx, gy), *map, *options, param);
+		}
+
+		a->SetPlanner(ThetaStar(*map, *options, Point(stx, sty), Point(gx, gy), param.radius + param.rEps));
+		allAgents->push_back(a);
+	}
+	return true;
+}
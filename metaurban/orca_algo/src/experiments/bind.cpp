@@ -1,11 +1,14 @@
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
+#include <pybind11/numpy.h>
 #include <iostream>
 #include <string>
 #include <ostream>
 #include <iomanip>
 #include <locale>
+#include <memory>
 #include "mission.h"
+#include "array_reader.h"
 
 #define STEP_MAX            1200
 #define IS_TIME_BOUNDED     false
@@ -98,6 +101,244 @@ unordered_map<int, trajectory_dict> demo(string xml_data, int num)
 }
 
 
+typedef py::array_t<int, py::array::c_style | py::array::forcecast> int_array;
+typedef py::array_t<float, py::array::c_style | py::array::forcecast> float_array;
+
+std::vector<Point> to_points(const float_array &arr)
+{
+	if (arr.size() == 0) {
+		return std::vector<Point>();
+	}
+	if (arr.ndim() != 2 || arr.shape(1) != 2) {
+		throw std::invalid_argument("expected an array of shape (K, 2)");
+	}
+	auto view = arr.unchecked<2>();
+	std::vector<Point> points;
+	points.reserve(view.shape(0));
+	for (py::ssize_t k = 0; k < view.shape(0); k++) {
+		points.emplace_back(view(k, 0), view(k, 1));
+	}
+	return points;
+}
+
+std::vector<std::vector<int>> to_grid(const int_array &grid)
+{
+	if (grid.ndim() != 2) {
+		throw std::invalid_argument("grid must be a 2D array");
+	}
+	auto gridView = grid.unchecked<2>();
+	std::vector<std::vector<int>> gridVec(gridView.shape(0), std::vector<int>(gridView.shape(1)));
+	for (py::ssize_t i = 0; i < gridView.shape(0); i++) {
+		for (py::ssize_t j = 0; j < gridView.shape(1); j++) {
+			gridVec[i][j] = gridView(i, j);
+		}
+	}
+	return gridVec;
+}
+
+std::vector<std::vector<Point>> to_obstacles(const std::vector<float_array> &obstacles)
+{
+	std::vector<std::vector<Point>> obstaclesVec;
+	obstaclesVec.reserve(obstacles.size());
+	for (auto &obstacle: obstacles) {
+		obstaclesVec.push_back(to_points(obstacle));
+	}
+	return obstaclesVec;
+}
+
+/*
+ * Typed counterpart of demo(): takes the occupancy grid (H, W) with 0 for free cells, obstacle contours as (K, 2)
+ * arrays of (x, y) vertices, and (N, 2) start and goal arrays. Returns all agent positions as a (T, N, 2) array,
+ * where T = number of simulated steps + 1. Agents rejected by the start/goal checks stay at their start position.
+ * Global paths are memoized in path_cache if one is given, it must only be used with this grid. The per agent work of
+ * a step runs on num_threads threads, and the GIL is released while the mission runs.
+ */
+py::array_t<float> plan(int_array grid, std::vector<float_array> obstacles, float_array starts, float_array goals,
+						std::string agent_type, float cell_size, float agent_size, float time_step, float delta,
+						int steps_max, std::shared_ptr<PathCache> path_cache, size_t num_threads)
+{
+	std::vector<std::vector<int>> gridVec = to_grid(grid);
+	std::vector<std::vector<Point>> obstaclesVec = to_obstacles(obstacles);
+	std::vector<Point> startsVec = to_points(starts), goalsVec = to_points(goals);
+	if (startsVec.size() != goalsVec.size()) {
+		throw std::invalid_argument("starts and goals must have the same length");
+	}
+	size_t num = startsVec.size();
+
+	Reader *reader = new ArrayReader(gridVec, obstaclesVec, startsVec, goalsVec, agent_type, cell_size, agent_size,
+									 time_step, delta);
+	Mission task = Mission(reader, num, steps_max, IS_TIME_BOUNDED, TIME_MAX, STOP_BY_SPEED);
+	size_t steps = 1;
+	{
+		py::gil_scoped_release release;
+		if (task.ReadTask()) {
+			task.SetPathCache(path_cache);
+			task.SetThreadsNum(num_threads);
+			task.StartMission();
+			steps = task.GetStepsCount() + 1;
+		}
+	}
+
+	py::array_t<float> result({steps, num, (size_t) 2});
+	auto out = result.mutable_unchecked<3>();
+	for (size_t n = 0; n < num; n++) {
+		for (size_t t = 0; t < steps; t++) {
+			out(t, n, 0) = startsVec[n].X();
+			out(t, n, 1) = startsVec[n].Y();
+		}
+	}
+	for (auto &agentPath: task.GetStepsLog()) {
+		for (size_t t = 0; t < agentPath.second.size() && t < steps; t++) {
+			out(t, agentPath.first, 0) = agentPath.second[t].X();
+			out(t, agentPath.first, 1) = agentPath.second[t].Y();
+		}
+	}
+	return result;
+}
+
+
+/*
+ * ORCA simulation that lives across calls, for receding-horizon planning. Agents keep their state between step()
+ * calls, and agents that reached their goal can be given a new one while the others keep moving.
+ * It also streams the trajectories of plan(): pull() returns the next steps until the mission would stop, so the
+ * pulled blocks together are the result of plan() without the start positions.
+ */
+class Simulation {
+	public:
+		Simulation(int_array grid, std::vector<float_array> obstacles, float_array starts, float_array goals,
+				   std::string agent_type, float cell_size, float agent_size, float time_step, float delta,
+				   std::shared_ptr<PathCache> path_cache, size_t num_threads, int steps_max)
+		{
+			positions = to_points(starts);
+			stopSteps = std::vector<int>(positions.size(), -1);
+			stepsCount = 0;
+			std::vector<Point> goalsVec = to_points(goals);
+			if (positions.size() != goalsVec.size()) {
+				throw std::invalid_argument("starts and goals must have the same length");
+			}
+			Reader *reader = new ArrayReader(to_grid(grid), to_obstacles(obstacles), positions, goalsVec, agent_type,
+											 cell_size, agent_size, time_step, delta);
+			task.reset(new Mission(reader, positions.size(), steps_max, IS_TIME_BOUNDED, TIME_MAX, STOP_BY_SPEED));
+			py::gil_scoped_release release;
+			ready = task->ReadTask();
+			if (ready) {
+				task->SetPathCache(path_cache);
+				task->SetThreadsNum(num_threads);
+				task->SetStepsLogging(false);
+				task->InitMission();
+			}
+			done = !ready;
+		}
+
+		// Advance the simulation, returns the positions after each of the next `steps` steps as a (steps, N, 2) array
+		py::array_t<float> step(size_t steps)
+		{
+			py::array_t<float> result({steps, positions.size(), (size_t) 2});
+			auto out = result.mutable_unchecked<3>();
+			for (size_t t = 0; t < steps; t++) {
+				{
+					py::gil_scoped_release release;
+					Advance();
+				}
+				for (size_t n = 0; n < positions.size(); n++) {
+					out(t, n, 0) = positions[n].X();
+					out(t, n, 1) = positions[n].Y();
+				}
+			}
+			return result;
+		}
+
+		// Advance the simulation by at most `steps` steps, stops where plan() stops. Returns a (K, N, 2) array with
+		// K <= steps, empty once the simulation is done
+		py::array_t<float> pull(size_t steps)
+		{
+			std::vector<Point> block;
+			{
+				py::gil_scoped_release release;
+				block.reserve(steps * positions.size());
+				for (size_t t = 0; t < steps && !done; t++) {
+					Advance();
+					block.insert(block.end(), positions.begin(), positions.end());
+				}
+			}
+			size_t num = positions.size(), pulled = num ? block.size() / num : 0;
+			py::array_t<float> result({pulled, num, (size_t) 2});
+			auto out = result.mutable_unchecked<3>();
+			for (size_t t = 0; t < pulled; t++) {
+				for (size_t n = 0; n < num; n++) {
+					out(t, n, 0) = block[t * num + n].X();
+					out(t, n, 1) = block[t * num + n].Y();
+				}
+			}
+			return result;
+		}
+
+		// For each agent, the first step at which its position equals the one of the step before, -1 if there is none
+		// yet. Steps are counted from 0 for the start positions
+		std::vector<int> stop_steps() const
+		{
+			return stopSteps;
+		}
+
+		// Number of simulated steps
+		size_t get_steps() const
+		{
+			return stepsCount;
+		}
+
+		// Whether the mission met the stop criterion of plan() after the last step
+		bool is_done() const
+		{
+			return done;
+		}
+
+		// Indices of the agents that reached their goal
+		std::vector<int> finished()
+		{
+			std::vector<int> result;
+			for (size_t n = 0; n < positions.size() && ready; n++) {
+				if (task->IsAgentFinished(n)) {
+					result.push_back(n);
+				}
+			}
+			return result;
+		}
+
+		// Re-plan one agent from its current position, false if the agent or the goal was rejected
+		bool set_goal(int agent, float x, float y)
+		{
+			py::gil_scoped_release release;
+			return ready && task->SetAgentGoal(agent, Point(x, y));
+		}
+
+	private:
+		void Advance()
+		{
+			std::vector<Point> previous = positions;
+			if (ready) {
+				task->StepForward();
+				for (auto agent: task->GetAgents()) {
+					positions[agent->GetID()] = agent->GetPosition();
+				}
+			}
+			stepsCount++;
+			// same criterion as get_time_length() in python
+			for (size_t n = 0; n < positions.size(); n++) {
+				if (stopSteps[n] < 0 && positions[n].X() == previous[n].X() && positions[n].Y() == previous[n].Y()) {
+					stopSteps[n] = stepsCount;
+				}
+			}
+			done = !ready || task->NeedToStop(0);
+		}
+
+		std::unique_ptr<Mission> task;
+		std::vector<Point> positions;
+		std::vector<int> stopSteps;
+		size_t stepsCount;
+		bool ready;
+		bool done;
+};
+
 
 PYBIND11_MODULE(bind, m)
 {
@@ -105,6 +346,34 @@ PYBIND11_MODULE(bind, m)
     m.doc() = "pybind11 test plugin";
     //def("提供给python调用的方法名"， &实际操作的函数， "函数功能说明"， 默认参数). 其中函数功能说明为可选
     m.def("demo", &demo, "A function which multiplies two numbers", py::arg("xml_data")="tmp", py::arg("num")=7);
+    m.def("plan", &plan, "Run ORCA on in-memory grid/obstacle/start/goal arrays, returns (T, N, 2) positions",
+          py::arg("grid"), py::arg("obstacles"), py::arg("starts"), py::arg("goals"),
+          py::arg("agent_type")="orca-par", py::arg("cell_size")=1.0f, py::arg("agent_size")=0.3f,
+          py::arg("time_step")=0.1f, py::arg("delta")=0.1f, py::arg("steps_max")=STEP_MAX,
+          py::arg("path_cache")=nullptr, py::arg("num_threads")=1);
+	py::class_<PathCache, std::shared_ptr<PathCache>>(m, "PathCache")
+		.def(py::init<size_t>(), py::arg("capacity")=4096)
+		.def("__len__", &PathCache::Size)
+		.def("clear", &PathCache::Clear)
+		.def_property_readonly("capacity", &PathCache::GetCapacity)
+		.def_readonly("hits", &PathCache::hits)
+		.def_readonly("misses", &PathCache::misses)
+		;
+	py::class_<Simulation>(m, "Simulation")
+		.def(py::init<int_array, std::vector<float_array>, float_array, float_array, std::string, float, float, float,
+					  float, std::shared_ptr<PathCache>, size_t, int>(),
+			 py::arg("grid"), py::arg("obstacles"), py::arg("starts"), py::arg("goals"),
+			 py::arg("agent_type")="orca-par", py::arg("cell_size")=1.0f, py::arg("agent_size")=0.3f,
+			 py::arg("time_step")=0.1f, py::arg("delta")=0.1f, py::arg("path_cache")=nullptr,
+			 py::arg("num_threads")=1, py::arg("steps_max")=STEP_MAX)
+		.def("step", &Simulation::step, py::arg("steps")=1)
+		.def("pull", &Simulation::pull, py::arg("steps"))
+		.def("stop_steps", &Simulation::stop_steps)
+		.def_property_readonly("steps", &Simulation::get_steps)
+		.def_property_readonly("done", &Simulation::is_done)
+		.def("finished", &Simulation::finished)
+		.def("set_goal", &Simulation::set_goal, py::arg("agent"), py::arg("x"), py::arg("y"))
+		;
 	py::class_<trajectory_dict>(m, "trajectory_dict")
 		.def(py::init<>())
 		.def_readwrite("xr", &trajectory_dict::xr)
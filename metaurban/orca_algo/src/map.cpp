@@ -6,6 +6,7 @@ Map::Map() {
 	width = 0;
 	grid = nullptr;
 	obstacles = nullptr;
+	BuildObstacleIndex();
 }
 
 
@@ -55,6 +56,7 @@ Map::Map(float cellSize, std::vector<std::vector<int>> &grid, std::vector<std::v
 			obstacle[i].prev = (i == 0) ? &obstacle.at(obstacle.size() - 1) : &obstacle.at(i - 1);
 		}
 	}
+	BuildObstacleIndex();
 }
 
 
@@ -64,6 +66,8 @@ Map::Map(const Map &obj) {
 	obstacles = (obj.obstacles == nullptr) ? nullptr : new std::vector<std::vector<ObstacleSegment>>(*obj.obstacles);
 	height = obj.height;
 	width = obj.width;
+	pathCache = obj.pathCache;
+	BuildObstacleIndex();
 }
 
 
@@ -156,13 +160,82 @@ Map &Map::operator=(const Map &obj) {
 		}
 		obstacles = (obj.obstacles == nullptr) ? nullptr : new std::vector<std::vector<ObstacleSegment>>(
 				*obj.obstacles);
+		pathCache = obj.pathCache;
+		BuildObstacleIndex();
 	}
 	return *this;
 }
 
 
+void Map::BuildObstacleIndex() {
+	obstSegments.clear();
+	obstIndex.clear();
+	obstIndexCellSize = OBST_INDEX_CELL_SIZE * cellSize;
+	obstIndexWidth = std::max(1, (int) std::ceil(width * cellSize / obstIndexCellSize));
+	obstIndexHeight = std::max(1, (int) std::ceil(height * cellSize / obstIndexCellSize));
+	if (obstacles == nullptr) {
+		return;
+	}
+	obstIndex.resize(obstIndexWidth * obstIndexHeight);
+
+	for (auto &obstacle: *obstacles) {
+		for (auto &segment: obstacle) {
+			int id = obstSegments.size();
+			obstSegments.push_back(&segment);
+			float xMin = std::min(segment.left.X(), segment.right.X());
+			float xMax = std::max(segment.left.X(), segment.right.X());
+			float yMin = std::min(segment.left.Y(), segment.right.Y());
+			float yMax = std::max(segment.left.Y(), segment.right.Y());
+			int iMin = std::min(std::max((int) std::floor(xMin / obstIndexCellSize), 0), obstIndexWidth - 1);
+			int iMax = std::min(std::max((int) std::floor(xMax / obstIndexCellSize), 0), obstIndexWidth - 1);
+			int jMin = std::min(std::max((int) std::floor(yMin / obstIndexCellSize), 0), obstIndexHeight - 1);
+			int jMax = std::min(std::max((int) std::floor(yMax / obstIndexCellSize), 0), obstIndexHeight - 1);
+			for (int j = jMin; j <= jMax; j++) {
+				for (int i = iMin; i <= iMax; i++) {
+					obstIndex[j * obstIndexWidth + i].push_back(id);
+				}
+			}
+		}
+	}
+}
 
 
+void Map::GetObstaclesInRange(const Point &point, float range, std::vector<int> &segments) const {
+	segments.clear();
+	if (obstIndex.empty()) {
+		return;
+	}
+	// slightly enlarged, so rounding never drops a segment at the border of the range
+	range = range * 1.001f + CN_EPS;
+	int iMin = std::min(std::max((int) std::floor((point.X() - range) / obstIndexCellSize), 0), obstIndexWidth - 1);
+	int iMax = std::min(std::max((int) std::floor((point.X() + range) / obstIndexCellSize), 0), obstIndexWidth - 1);
+	int jMin = std::min(std::max((int) std::floor((point.Y() - range) / obstIndexCellSize), 0), obstIndexHeight - 1);
+	int jMax = std::min(std::max((int) std::floor((point.Y() + range) / obstIndexCellSize), 0), obstIndexHeight - 1);
+	for (int j = jMin; j <= jMax; j++) {
+		for (int i = iMin; i <= iMax; i++) {
+			auto &cell = obstIndex[j * obstIndexWidth + i];
+			segments.insert(segments.end(), cell.begin(), cell.end());
+		}
+	}
+	std::sort(segments.begin(), segments.end());
+	segments.erase(std::unique(segments.begin(), segments.end()), segments.end());
+}
+
+
+const ObstacleSegment &Map::GetObstacleSegment(int segment) const {
+	return *obstSegments[segment];
+}
+
+
+PathCache *Map::GetPathCache() const {
+	return pathCache.get();
+}
+
+
+void Map::SetPathCache(std::shared_ptr<PathCache> cache) {
+	pathCache = std::move(cache);
+}
+
 
 
 
@@ -2,8 +2,12 @@
 
 
 Mission::Mission(std::string &xml_data, unsigned int agentsNum, unsigned int stepsTh, bool time, size_t timeTh,
+				 bool speedStop) : Mission(new XMLReader(xml_data), agentsNum, stepsTh, time, timeTh, speedStop) {}
+
+
+Mission::Mission(Reader *reader, unsigned int agentsNum, unsigned int stepsTh, bool time, size_t timeTh,
 				 bool speedStop) {
-	taskReader = new XMLReader(xml_data);
+	taskReader = reader;
 	agents = vector<Agent *>();
 	this->agentsNum = agentsNum;
 	stepsTreshhold = stepsTh;
@@ -42,6 +46,7 @@ Mission::Mission(std::string &xml_data, unsigned int agentsNum, unsigned int ste
 
 	commonSpeedsBuffer = std::vector<std::list<float>>(agentsNum, std::list<float>(COMMON_SPEED_BUFF_SIZE, 1.0));
 	allStops = false;
+	stepsLogging = true;
 	stopByMeanSpeed = speedStop;
 }
 
@@ -72,7 +77,9 @@ Mission::Mission(const Mission &obj) {
 #endif
 	commonSpeedsBuffer = obj.commonSpeedsBuffer;
 	allStops = obj.allStops;
+	stepsLogging = obj.stepsLogging;
 	stopByMeanSpeed = obj.stopByMeanSpeed;
+	workers = obj.workers;
 }
 
 
@@ -114,61 +121,27 @@ bool Mission::ReadTask() {
 }
 
 
+// Share global paths with other missions on the same map, call it after ReadTask() and before the agents plan
+void Mission::SetPathCache(std::shared_ptr<PathCache> cache) {
+	if (map != nullptr) {
+		map->SetPathCache(std::move(cache));
+	}
+}
+
+
 Summary Mission::StartMission() {
 #if FULL_OUTPUT
 	//  std::cout << "Start\n";
 #endif
 
 	auto startpnt = std::chrono::high_resolution_clock::now();
-	for (auto agent: agents) {
-#if MAPF_LOG
-		if (dynamic_cast<ORCAAgentWithPARAndECBS*>(agent) != nullptr) {
-			dynamic_cast<ORCAAgentWithPARAndECBS *>(agent)->SetMAPFInstanceLoggerRef(&MAPFLog);
-		}
-		else if (dynamic_cast<ORCAAgentWithPAR*>(agent) != nullptr) {
-			dynamic_cast<ORCAAgentWithPAR *>(agent)->SetMAPFInstanceLoggerRef(&MAPFLog);
-		}
-#endif
-		bool found = agent->InitPath();
-#if FULL_OUTPUT
-		if (!found) {
-			//  std::cout << agent->GetID() << " " << "Path not found\n";
-		}
-#endif
-		resultsLog.insert({agent->GetID(), {false, 0}});
-		stepsLog.insert({agent->GetID(), std::vector<Point>()});
-		stepsLog[agent->GetID()].push_back({agent->GetPosition()});
-		goalsLog[agent->GetID()].push_back(agent->GetPosition());
-
-#if FULL_LOG
-		stepsLog.insert({agent->GetID(), std::vector<Point>()});
-		stepsLog[agent->GetID()].push_back({agent->GetPosition()});
-		goalsLog[agent->GetID()].push_back(agent->GetPosition());
-#endif
-
-	}
-	bool needToStop, needToStopByTime, needToStopBySteps, needToStopBySpeed;
+	InitMission();
+	size_t nowtime;
 	do {
-		AssignNeighbours();
-
-		for (auto &agent: agents) {
-			agent->UpdatePrefVelocity();
-		}
-
-		for (auto &agent: agents) {
-			agent->ComputeNewVelocity();
-		}
-
-		UpdateSate();
+		StepForward();
 		auto checkpnt = std::chrono::high_resolution_clock::now();
-		size_t nowtime = std::chrono::duration_cast<std::chrono::milliseconds>(checkpnt - startpnt).count();
-
-		needToStopBySpeed = (stopByMeanSpeed and allStops);
-		needToStopByTime = (isTimeBounded and nowtime >= timeTreshhold);
-		needToStopBySteps = (!isTimeBounded and stepsCount >= stepsTreshhold);
-		needToStop = needToStopBySpeed or needToStopByTime or needToStopBySteps;
-
-	} while (!IsFinished() && !needToStop);
+		nowtime = std::chrono::duration_cast<std::chrono::milliseconds>(checkpnt - startpnt).count();
+	} while (!NeedToStop(nowtime));
 
 	auto endpnt = std::chrono::high_resolution_clock::now();
 	size_t res = std::chrono::duration_cast<std::chrono::milliseconds>(endpnt - startpnt).count();
@@ -247,6 +220,134 @@ Summary Mission::StartMission() {
 }
 
 
+void Mission::InitMission() {
+	for (auto agent: agents) {
+#if MAPF_LOG
+		if (dynamic_cast<ORCAAgentWithPARAndECBS*>(agent) != nullptr) {
+			dynamic_cast<ORCAAgentWithPARAndECBS *>(agent)->SetMAPFInstanceLoggerRef(&MAPFLog);
+		}
+		else if (dynamic_cast<ORCAAgentWithPAR*>(agent) != nullptr) {
+			dynamic_cast<ORCAAgentWithPAR *>(agent)->SetMAPFInstanceLoggerRef(&MAPFLog);
+		}
+#endif
+		bool found = agent->InitPath();
+#if FULL_OUTPUT
+		if (!found) {
+			//  std::cout << agent->GetID() << " " << "Path not found\n";
+		}
+#endif
+		resultsLog.insert({agent->GetID(), {false, 0}});
+		stepsLog.insert({agent->GetID(), std::vector<Point>()});
+		stepsLog[agent->GetID()].push_back({agent->GetPosition()});
+		goalsLog[agent->GetID()].push_back(agent->GetPosition());
+
+#if FULL_LOG
+		stepsLog.insert({agent->GetID(), std::vector<Point>()});
+		stepsLog[agent->GetID()].push_back({agent->GetPosition()});
+		goalsLog[agent->GetID()].push_back(agent->GetPosition());
+#endif
+
+	}
+}
+
+
+void Mission::StepForward() {
+	AssignNeighbours();
+
+	// Preferred velocities stay sequential: the MAPF triggers of PAR agents change the state of their neighbours
+	for (auto &agent: agents) {
+		agent->UpdatePrefVelocity();
+	}
+
+	// ORCA velocities only read the state of the neighbours, which is not changed before UpdateSate()
+	ForEachAgent([this](size_t k, size_t thread) {
+		agents[k]->ComputeNewVelocity();
+	});
+
+	UpdateSate();
+}
+
+
+// Stop criterion of StartMission(), checked after each step. time is the run time of the mission in milliseconds
+bool Mission::NeedToStop(size_t time) {
+	bool needToStopBySpeed = (stopByMeanSpeed and allStops);
+	bool needToStopByTime = (isTimeBounded and time >= timeTreshhold);
+	bool needToStopBySteps = (!isTimeBounded and stepsCount >= stepsTreshhold);
+	return IsFinished() || needToStopBySpeed || needToStopByTime || needToStopBySteps;
+}
+
+
+// Use threadsNum threads for the per agent work of a step, 1 runs everything in the calling thread
+void Mission::SetThreadsNum(size_t threadsNum) {
+	if (threadsNum > 1) {
+		workers = std::make_shared<WorkerPool>(threadsNum);
+	}
+	else {
+		workers.reset();
+	}
+}
+
+
+void Mission::ForEachAgent(const std::function<void(size_t, size_t)> &task) {
+	if (workers == nullptr) {
+		for (size_t k = 0; k < agents.size(); k++) {
+			task(k, 0);
+		}
+	}
+	else {
+		workers->ParallelFor(agents.size(), task);
+	}
+}
+
+
+Agent *Mission::FindAgent(int id) {
+	for (auto &agent: agents) {
+		if (agent->GetID() == id) {
+			return agent;
+		}
+	}
+	return nullptr;
+}
+
+
+bool Mission::SetAgentGoal(int id, const Point &goal) {
+	Agent *agent = FindAgent(id);
+	if (agent == nullptr) {
+		return false;
+	}
+	float r = agent->GetRadius();
+	if (goal.X() <= r || goal.Y() <= r || goal.X() >= (map->GetWidth() * map->GetCellSize()) - r ||
+		goal.Y() >= (map->GetHeight() * map->GetCellSize()) - r) {
+		return false;
+	}
+	Node goalNode = map->GetClosestNode(goal);
+	LineOfSight positionChecker(r / map->GetCellSize());
+	if (!positionChecker.checkTraversability(goalNode.i, goalNode.j, *map)) {
+		return false;
+	}
+	Point oldGoal = agent->GetGoal();
+	agent->SetGoal(goal);
+	if (!agent->InitPath()) {
+		// keep heading to the previous goal if the new one can't be reached
+		agent->SetGoal(oldGoal);
+		agent->InitPath();
+		return false;
+	}
+	return true;
+}
+
+
+bool Mission::IsAgentFinished(int id) {
+	Agent *agent = FindAgent(id);
+	return agent != nullptr && agent->isFinished();
+}
+
+
+void Mission::SetStepsLogging(bool enabled) {
+	stepsLogging = enabled;
+}
+
+
 #if FULL_LOG
 
 
@@ -316,8 +417,10 @@ void Mission::UpdateSate() {
 		if (mean >= MISSION_SMALL_SPEED) {
 			allStops = false;
 		}
-		stepsLog[agent->GetID()].push_back(newPos);
-		goalsLog[agent->GetID()].push_back(agent->GetNext());
+		if (stepsLogging) {
+			stepsLog[agent->GetID()].push_back(newPos);
+			goalsLog[agent->GetID()].push_back(agent->GetNext());
+		}
 
 #if FULL_LOG
 		stepsLog[agent->GetID()].push_back(newPos);
@@ -330,16 +433,67 @@ void Mission::UpdateSate() {
 }
 
 
+long long Mission::NeighbourCell(int i, int j) {
+	return (static_cast<long long>(i) << 32) ^ static_cast<unsigned int>(j);
+}
+
+
 void Mission::AssignNeighbours() {
+	// Agents are bucketed in a uniform grid with cells as large as the largest sight radius, so the agents in sight
+	// of an agent are in the 3x3 cells around it. Candidates are handed to AddNeighbour in the order of the agents
+	// vector, which gives the same neighbour lists as checking every pair of agents. Candidates and obstacles are
+	// found in parallel, but AddNeighbour is called sequentially, since PAR agents read flags it sets on neighbours.
+	float cellSize = 0.0f;
 	for (auto &agent: agents) {
+		cellSize = std::max(cellSize, agent->GetSightRadius());
+	}
+	if (cellSize <= 0.0f) {
+		for (auto &agent: agents) {
+			agent->UpdateNeighbourObst();
+		}
+		return;
+	}
 
-		for (auto &neighbour: agents) {
-			if (agent != neighbour) {
-				float distSq = (agent->GetPosition() - neighbour->GetPosition()).SquaredEuclideanNorm();
-				agent->AddNeighbour(*neighbour, distSq);
+	for (auto &cell: neighbourGrid) {
+		cell.second.clear();
+	}
+	std::vector<std::pair<int, int>> cells(agents.size());
+	for (size_t k = 0; k < agents.size(); k++) {
+		Point pos = agents[k]->GetPosition();
+		cells[k] = {static_cast<int>(std::floor(pos.X() / cellSize)), static_cast<int>(std::floor(pos.Y() / cellSize))};
+		neighbourGrid[NeighbourCell(cells[k].first, cells[k].second)].push_back(k);
+	}
+
+	neighbourCandidates.resize(workers == nullptr ? 1 : workers->GetThreadsNum());
+	agentsNeighbours.resize(agents.size());
+	ForEachAgent([this, &cells](size_t k, size_t thread) {
+		Agent *agent = agents[k];
+		std::vector<size_t> &candidates = neighbourCandidates[thread];
+		candidates.clear();
+		for (int i = cells[k].first - 1; i <= cells[k].first + 1; i++) {
+			for (int j = cells[k].second - 1; j <= cells[k].second + 1; j++) {
+				auto cell = neighbourGrid.find(NeighbourCell(i, j));
+				if (cell != neighbourGrid.end()) {
+					candidates.insert(candidates.end(), cell->second.begin(), cell->second.end());
+				}
+			}
+		}
+		std::sort(candidates.begin(), candidates.end());
+
+		agentsNeighbours[k].clear();
+		for (size_t n: candidates) {
+			if (n != k) {
+				float distSq = (agent->GetPosition() - agents[n]->GetPosition()).SquaredEuclideanNorm();
+				agentsNeighbours[k].emplace_back(n, distSq);
 			}
 		}
 		agent->UpdateNeighbourObst();
+	});
+
+	for (size_t k = 0; k < agents.size(); k++) {
+		for (auto &neighbour: agentsNeighbours[k]) {
+			agents[k]->AddNeighbour(*agents[neighbour.first], neighbour.second);
+		}
 	}
 }
 
@@ -411,7 +565,9 @@ Mission &Mission::operator=(const Mission &obj) {
 #endif
 		commonSpeedsBuffer = obj.commonSpeedsBuffer;
 		allStops = obj.allStops;
+		stepsLogging = obj.stepsLogging;
 		stopByMeanSpeed = obj.stopByMeanSpeed;
+		workers = obj.workers;
 	}
 	return *this;
 }
@@ -447,4 +603,18 @@ unordered_map<int, trajectory_dict> Mission::save_dict() {
 	// taskLogger->SetSummary(missionResult);
 	// taskLogger->GenerateLog();
 	return traceDict;
-}
\ No newline at end of file
+}
+
+const std::unordered_map<int, std::vector<Point>> &Mission::GetStepsLog() const {
+	return stepsLog;
+}
+
+
+unsigned int Mission::GetStepsCount() const {
+	return stepsCount;
+}
+
+
+const std::vector<Agent *> &Mission::GetAgents() const {
+	return agents;
+}
@@ -0,0 +1,59 @@
+#include "path_cache.h"
+
+
+PathCache::PathCache(size_t capacity) : capacity(capacity), hits(0), misses(0) {}
+
+
+bool PathCache::Get(const Node &start, const Node &goal, float radius, bool &found, std::list<Point> &path) {
+	std::lock_guard<std::mutex> guard(lock);
+	auto it = index.find({start.i, start.j, goal.i, goal.j, radius});
+	if (it == index.end()) {
+		misses++;
+		return false;
+	}
+	hits++;
+	entries.splice(entries.begin(), entries, it->second);
+	found = it->second->found;
+	path = it->second->path;
+	return true;
+}
+
+
+void PathCache::Put(const Node &start, const Node &goal, float radius, bool found, const std::list<Point> &path) {
+	if (capacity == 0) {
+		return;
+	}
+	std::lock_guard<std::mutex> guard(lock);
+	Key key = {start.i, start.j, goal.i, goal.j, radius};
+	auto it = index.find(key);
+	if (it != index.end()) {
+		entries.erase(it->second);
+		index.erase(it);
+	}
+	entries.push_front({key, found, path});
+	index[key] = entries.begin();
+	while (entries.size() > capacity) {
+		index.erase(entries.back().key);
+		entries.pop_back();
+	}
+}
+
+
+void PathCache::Clear() {
+	std::lock_guard<std::mutex> guard(lock);
+	entries.clear();
+	index.clear();
+	hits = 0;
+	misses = 0;
+}
+
+
+size_t PathCache::Size() {
+	std::lock_guard<std::mutex> guard(lock);
+	return entries.size();
+}
+
+
+size_t PathCache::GetCapacity() const {
+	return capacity;
+}
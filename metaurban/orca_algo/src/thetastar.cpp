@@ -112,6 +112,17 @@ bool ThetaStar::SearchPath(const Node &start, const Node &goal) {
 		open.resize(map->GetHeight());
 	}
 
+	PathCache *cache = map->GetPathCache();
+	bool pathfound = false;
+	if (cache != nullptr) {
+		std::list<Point> path;
+		if (cache->Get(start, goal, radius, pathfound, path)) {
+			currPath.splice(currPath.begin(), path);
+			return pathfound;
+		}
+	}
+	size_t prevPathSize = currPath.size();
+
 	Node curNode;
 	curNode.i = start.i;
 	curNode.j = start.j;
@@ -121,7 +132,6 @@ bool ThetaStar::SearchPath(const Node &start, const Node &goal) {
 	curNode.parent = nullptr;
 	AddOpen(curNode);
 	int closeSize = 0;
-	bool pathfound = false;
 	while (!StopCriterion()) {
 		curNode = FindMin();
 		close.insert({curNode.i * map->GetWidth() + curNode.j, curNode});
@@ -148,6 +158,10 @@ bool ThetaStar::SearchPath(const Node &start, const Node &goal) {
 	if (pathfound) {
 		MakePrimaryPath(curNode);
 	}
+	if (cache != nullptr) {
+		cache->Put(start, goal, radius, pathfound,
+				   std::list<Point>(currPath.begin(), std::prev(currPath.end(), prevPathSize)));
+	}
 	return pathfound;
 }
 
@@ -0,0 +1,90 @@
+#include "worker_pool.h"
+
+#define WORKER_POOL_CHUNK_SIZE 8
+
+
+WorkerPool::WorkerPool(size_t threadsNum) : currTask(nullptr), tasksNum(0), nextTask(0), generation(0),
+											busyThreads(0), stop(false) {
+	for (size_t thread = 1; thread < threadsNum; thread++) {
+		threads.emplace_back(&WorkerPool::Work, this, thread);
+	}
+}
+
+
+WorkerPool::~WorkerPool() {
+	{
+		std::lock_guard<std::mutex> guard(lock);
+		stop = true;
+	}
+	started.notify_all();
+	for (auto &thread: threads) {
+		thread.join();
+	}
+}
+
+
+size_t WorkerPool::GetThreadsNum() const {
+	return threads.size() + 1;
+}
+
+
+void WorkerPool::ParallelFor(size_t n, const std::function<void(size_t, size_t)> &task) {
+	if (threads.empty() || n <= WORKER_POOL_CHUNK_SIZE) {
+		for (size_t i = 0; i < n; i++) {
+			task(i, 0);
+		}
+		return;
+	}
+
+	{
+		std::lock_guard<std::mutex> guard(lock);
+		currTask = &task;
+		tasksNum = n;
+		nextTask = 0;
+		busyThreads = threads.size();
+		generation++;
+	}
+	started.notify_all();
+	RunChunks(0);
+
+	std::unique_lock<std::mutex> guard(lock);
+	finished.wait(guard, [this] { return busyThreads == 0; });
+	currTask = nullptr;
+}
+
+
+void WorkerPool::Work(size_t thread) {
+	size_t seenGeneration = 0;
+	while (true) {
+		{
+			std::unique_lock<std::mutex> guard(lock);
+			started.wait(guard, [this, seenGeneration] { return stop || generation != seenGeneration; });
+			if (stop) {
+				return;
+			}
+			seenGeneration = generation;
+		}
+
+		RunChunks(thread);
+
+		{
+			std::lock_guard<std::mutex> guard(lock);
+			busyThreads--;
+		}
+		finished.notify_one();
+	}
+}
+
+
+void WorkerPool::RunChunks(size_t thread) {
+	while (true) {
+		size_t begin = nextTask.fetch_add(WORKER_POOL_CHUNK_SIZE);
+		if (begin >= tasksNum) {
+			return;
+		}
+		size_t end = std::min(begin + WORKER_POOL_CHUNK_SIZE, tasksNum);
+		for (size_t i = begin; i < end; i++) {
+			(*currTask)(i, thread);
+		}
+	}
+}
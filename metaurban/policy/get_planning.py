@@ -1,10 +1,11 @@
 import numpy as np
 import xml.etree.ElementTree as ET
 import multiprocessing
+import atexit
+from concurrent.futures import Future, ProcessPoolExecutor
 import bind
 import math
 import metaurban.policy.orca_planner_utils as orca_planner_utils
-from skimage import measure
 import time
 
 
@@ -12,17 +13,66 @@ def generate_template_xml(mask):
     cellsize = 1
     agentdict = {"type": "orca-par", "agent": []}
 
-    mylist, h, w = orca_planner_utils.mask_to_2d_list(mask)
-    contours = measure.find_contours(mylist, 0.5, positive_orientation='high')
-
-    flipped_contours = []
-    for contour in contours:
-        contour = orca_planner_utils.find_tuning_point(contour, h)
-        flipped_contours.append(contour)
-    root = orca_planner_utils.write_to_xml(mylist, w, h, cellsize, flipped_contours, agentdict)
+    geometry = orca_planner_utils.get_mask_geometry(mask)
+    root = orca_planner_utils.write_to_xml(
+        geometry.grid, geometry.w, geometry.h, cellsize, geometry.contours, agentdict
+    )
     return root
 
 
+def generate_template_arrays(mask):
+    """
+    Same map as generate_template_xml, but as arrays that can be handed to bind.plan directly
+    :param mask: walkable region mask, 255 for walkable pixels
+    :return: occupancy grid (h, w) with 1 for obstacles, and a list of (K, 2) integer obstacle contours
+    """
+    geometry = orca_planner_utils.get_mask_geometry(mask)
+    # write_to_xml stores vertices as int, keep the same truncation
+    obstacles = [contour.astype(int) for contour in geometry.contours]
+    return geometry.grid, obstacles
+
+
+PATH_CACHE_SIZE = 4096
+
+
+def get_path_cache(mask):
+    """
+    The global path cache of a map. It lives with the MaskGeometry of the mask, so all plans on the same map in this
+    process reuse the Theta* paths between the same start and goal cells
+    :return: bind.PathCache, or None for bind modules built without it
+    """
+    if not hasattr(bind, "PathCache"):
+        return None
+    geometry = orca_planner_utils.get_mask_geometry(mask)
+    if geometry.path_cache is None:
+        geometry.path_cache = bind.PathCache(PATH_CACHE_SIZE)
+    return geometry.path_cache
+
+
+def get_bind_options(mask, num_threads=1):
+    """
+    Optional arguments of bind.plan and bind.Simulation, only the ones the loaded bind module supports are set
+    :param num_threads: number of threads simulating one crowd, 1 steps all agents in the calling thread
+    """
+    options = {}
+    if hasattr(bind, "PathCache"):
+        options["path_cache"] = get_path_cache(mask)
+    if num_threads != 1:
+        options["num_threads"] = num_threads
+    return options
+
+
+def get_time_length(nexts):
+    """
+    For each agent, the number of steps before its position repeats for the first time
+    :param nexts: positions with shape (T, N, 2)
+    :return: list of N ints
+    """
+    stopped = np.all(nexts[1:] == nexts[:-1], axis=-1)
+    first_stop = np.argmax(stopped, axis=0) + 1
+    return np.where(stopped.any(axis=0), first_stop, len(nexts)).tolist()
+
+
 def get_speed(start_positions, positions):
     pos1 = positions[:-1]
     pos2 = positions[1:]
@@ -56,46 +106,215 @@ def set_agents(start_positions, goals, root):
         agents.append(agent)
 
 
-def run_planning(start_positions, goals, mask, num_agent, thread_id, results):
+def run_planning_xml(start_positions, goals, mask, num_agent):
+    """
+    Plan through the XML reader, for bind modules built before bind.plan was added. bind.demo returns the agents in
+    hash order, they are sorted by id so that columns are in agent order as with bind.plan
+    """
     root = generate_template_xml(mask)
     set_agents(start_positions, goals, root)
     xml_string = ET.tostring(root, encoding='unicode')
     result = bind.demo(xml_string, num_agent)
     nexts = []
-    time_length_list = []
-    for v in result.values():
-        nextxr = np.array(v.xr)  #[:min_total_step]
-        nextyr = np.array(v.yr)  #[:min_total_step]
-        nextr = np.stack([nextxr, nextyr], axis=1)
-        nexts.append(nextr)
-
-        time_length = 0
-        last_x, last_y = None, None
-        flag = False
-        for x, y in zip(nextxr, nextyr):
-            if x == last_x and y == last_y:
-                time_length_list.append(time_length)
-                flag = True
-                break
-            else:
-                last_x, last_y = x, y
-                time_length += 1
-        if not flag:
-            time_length_list.append(time_length)
-    nexts = np.stack(nexts, axis=1)
+    for _, v in sorted(result.items()):
+        nexts.append(np.stack([np.array(v.xr), np.array(v.yr)], axis=1))
+    return np.stack(nexts, axis=1)
+
+
+def plan_trajectories(start_positions, goals, mask, num_agent, num_threads=1):
+    """
+    Plan one environment
+    :param num_threads: number of threads of the ORCA simulation
+    :return: (nexts, time_length_list, speed, earliest_stop_pos)
+    """
+    if hasattr(bind, "plan"):
+        grid, obstacles = generate_template_arrays(mask)
+        starts = np.asarray(start_positions, dtype=np.float64).reshape(-1, 2)[:num_agent]
+        ends = np.asarray(goals, dtype=np.float64).reshape(-1, 2)[:num_agent] + 0.5  # magic number
+        nexts = bind.plan(grid, obstacles, starts, ends, **get_bind_options(mask, num_threads)).astype(np.float64)
+    else:
+        nexts = run_planning_xml(start_positions, goals, mask, num_agent)
+    time_length_list = get_time_length(nexts)
     speed = get_speed(start_positions, nexts)
     earliest_stop_pos = list(nexts)[-1]
+    return nexts, time_length_list, speed, earliest_stop_pos
+
+
+def run_planning(start_positions, goals, mask, num_agent, thread_id, results, num_threads=1):
     #print(f"Before assignment, results type: {type(results)}")
     #result = {key: convert_to_dict(value) for key, value in result.items()}
     #results[thread_id] = result
-    results[thread_id] = (nexts, time_length_list, speed, earliest_stop_pos)
+    results[thread_id] = plan_trajectories(start_positions, goals, mask, num_agent, num_threads)
     #print(f"After assignment, results type: {type(results)}")
 
 
-def get_planning(start_positions_list, masks, goals_list, num_agent_list, num_envs, roots=None):
-    results = [None] * num_envs
-    for i in range(num_envs):
-        run_planning(start_positions_list[i], goals_list[i], masks[i], num_agent_list[i], i, results)
+class RecedingHorizonPlanning:
+    """
+    One ORCA simulation kept alive for a whole episode. Instead of re-planning all agents once every agent stopped,
+    the simulation is advanced a fixed number of steps at a time, and only agents that reached their goal get a new one
+    """
+    def __init__(self, start_positions, goals, mask, horizon, num_threads=1):
+        assert hasattr(bind, "Simulation"), "Receding-horizon planning requires a bind module with bind.Simulation"
+        grid, obstacles = generate_template_arrays(mask)
+        starts = np.asarray(start_positions, dtype=np.float64).reshape(-1, 2)
+        ends = np.asarray(goals, dtype=np.float64).reshape(-1, 2) + 0.5  # magic number
+        self.simulation = bind.Simulation(grid, obstacles, starts, ends, **get_bind_options(mask, num_threads))
+        self.horizon = horizon
+        self.positions = starts
+        self._started = False
+
+    def step(self):
+        """
+        Advance the simulation by one horizon. The first block starts with the start positions, as in run_planning
+        :return: positions with shape (horizon, N, 2) and the list of per step speeds
+        """
+        if self._started:
+            nexts = self.simulation.step(self.horizon).astype(np.float64)
+        else:
+            nexts = np.concatenate([self.positions[None], self.simulation.step(self.horizon - 1)])
+            self._started = True
+        speed = np.linalg.norm(nexts - np.concatenate([nexts[:1], nexts[:-1]]), axis=2)
+        speed[0] = np.linalg.norm(nexts[0] - self.positions, axis=1)
+        self.positions = nexts[-1]
+        return nexts, list(speed)
+
+    def finished_agents(self):
+        """
+        Indices of the agents at their goal
+        """
+        return self.simulation.finished()
+
+    def set_goals(self, agent_ids, goals):
+        """
+        Give new goals to some agents, which re-plan their global path from their current position
+        :return: list of bools, False where the new goal was rejected
+        """
+        ends = np.asarray(goals, dtype=np.float64).reshape(-1, 2) + 0.5  # magic number
+        return [self.simulation.set_goal(int(i), float(end[0]), float(end[1])) for i, end in zip(agent_ids, ends)]
+
+
+class PlanningStream:
+    """
+    plan_trajectories pulled block by block. The ORCA simulation runs only as far as the trajectory is consumed, so the
+    first steps are available right away and a reset does not wait for the whole plan. The concatenated blocks and
+    speeds are the nexts and speed of plan_trajectories
+    """
+    def __init__(self, start_positions, goals, mask, num_agent, num_threads=1):
+        assert hasattr(bind, "Simulation"), "Streaming plans requires a bind module with bind.Simulation"
+        grid, obstacles = generate_template_arrays(mask)
+        starts = np.asarray(start_positions, dtype=np.float64).reshape(-1, 2)[:num_agent]
+        ends = np.asarray(goals, dtype=np.float64).reshape(-1, 2)[:num_agent] + 0.5  # magic number
+        self.simulation = bind.Simulation(grid, obstacles, starts, ends, **get_bind_options(mask, num_threads))
+        self.positions = starts.astype(np.float32).astype(np.float64)
+        self._started = False
+
+    @property
+    def done(self):
+        """
+        Whether the whole plan was pulled
+        """
+        return self._started and self.simulation.done
+
+    def pull(self, steps):
+        """
+        The next steps of the plan. The first block starts with the start positions, as in plan_trajectories
+        :return: positions with shape (K, N, 2), K <= steps and 0 once done, and the list of per step speeds
+        """
+        if self._started:
+            nexts = self.simulation.pull(steps).astype(np.float64)
+        else:
+            nexts = np.concatenate([self.positions[None], self.simulation.pull(steps - 1)])
+            self._started = True
+        speed = np.linalg.norm(nexts - np.concatenate([self.positions[None], nexts[:-1]]), axis=2)
+        if len(nexts) > 0:
+            self.positions = nexts[-1]
+        return nexts, list(speed)
+
+    def time_length(self):
+        """
+        get_time_length of the steps pulled so far
+        """
+        stop_steps = np.asarray(self.simulation.stop_steps())
+        return np.where(stop_steps >= 0, stop_steps, self.simulation.steps + 1).tolist()
+
+
+class PlanningService:
+    """
+    A persistent pool of planning processes. Workers live as long as the service, so each of them keeps its own mask
+    geometry cache and re-plans on a known map only run the ORCA simulation. Workers are started with 'spawn', so the
+    launching script needs the usual `if __name__ == "__main__":` guard.
+    """
+    def __init__(self, num_workers):
+        assert num_workers > 0, "Use submit_planning with num_workers=0 to plan in the current process"
+        self.num_workers = num_workers
+        self._executor = ProcessPoolExecutor(max_workers=num_workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def submit(self, start_positions, goals, mask, num_agent, num_threads=1):
+        """
+        Plan one environment in the background
+        :return: Future of (nexts, time_length_list, speed, earliest_stop_pos)
+        """
+        return self._executor.submit(
+            plan_trajectories, np.asarray(start_positions), np.asarray(goals), np.asarray(mask), num_agent, num_threads
+        )
+
+    def close(self):
+        try:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        except TypeError:  # cancel_futures requires python >= 3.9
+            self._executor.shutdown(wait=False)
+
+
+_planning_service = None
+
+
+def get_planning_service(num_workers):
+    """
+    The process wide planning service, (re)created when the number of workers changes
+    """
+    global _planning_service
+    if _planning_service is not None and _planning_service.num_workers != num_workers:
+        _planning_service.close()
+        _planning_service = None
+    if _planning_service is None:
+        _planning_service = PlanningService(num_workers)
+    return _planning_service
+
+
+@atexit.register
+def close_planning_service():
+    global _planning_service
+    if _planning_service is not None:
+        _planning_service.close()
+        _planning_service = None
+
+
+def submit_planning(start_positions, goals, mask, num_agent, num_workers=0, num_threads=1):
+    """
+    Future interface of plan_trajectories. With num_workers=0 the plan is computed right away in this process and a
+    completed future is returned, so callers can use one code path for both cases
+    """
+    if num_workers > 0:
+        return get_planning_service(num_workers).submit(start_positions, goals, mask, num_agent, num_threads)
+    future = Future()
+    future.set_result(plan_trajectories(start_positions, goals, mask, num_agent, num_threads))
+    return future
+
+
+def get_planning(
+    start_positions_list, masks, goals_list, num_agent_list, num_envs, roots=None, num_workers=0, num_threads=1
+):
+    if num_workers > 0 and num_envs > 1:
+        futures = [
+            submit_planning(
+                start_positions_list[i], goals_list[i], masks[i], num_agent_list[i], num_workers, num_threads
+            ) for i in range(num_envs)
+        ]
+        results = [future.result() for future in futures]
+    else:
+        results = [None] * num_envs
+        for i in range(num_envs):
+            run_planning(start_positions_list[i], goals_list[i], masks[i], num_agent_list[i], i, results, num_threads)
 
     nexts_list = []
     time_length_lists = []
@@ -0,0 +1,100 @@
+"""
+Vectorized processing of walkable region masks for ORCA: thresholding the mask into the occupancy grid, extracting
+the interior walkable points, and sampling start/goal points with a minimum spacing.
+
+All functions reproduce the results of the original per-pixel Python implementations exactly, and sampling consumes
+the global `random` stream in the same way, so recorded scenarios replay identically for a given seed.
+"""
+import math
+import random
+
+import numpy as np
+from PIL import Image
+
+
+def mask_to_binary_grid(mask):
+    """
+    Threshold a walkable mask into the ORCA occupancy grid: 1 for obstacles (luminance < 128), 0 for walkable cells
+    :param mask: uint8 mask of shape (h, w) or (h, w, 3)
+    :return: int grid of shape (h, w)
+    """
+    mask = np.asarray(mask)
+    if mask.dtype == np.uint8 and mask.ndim == 2:
+        luminance = mask
+    elif mask.dtype == np.uint8 and mask.ndim == 3 and mask.shape[2] == 3:
+        # same fixed-point ITU-R 601-2 transform as PIL's convert('L')
+        rgb = mask.astype(np.uint32)
+        luminance = (rgb[..., 0] * 19595 + rgb[..., 1] * 38470 + rgb[..., 2] * 7471 + 0x8000) >> 16
+    else:
+        luminance = np.asarray(Image.fromarray(mask).convert('L'))
+    return (luminance < 128).astype(int)
+
+
+def find_interior_points(mask, contours):
+    """
+    Pixels of a 2D mask whose 8 neighbours are all 255 (pixels outside the mask count as 0), excluding the obstacle
+    contour vertices
+    :param mask: uint8 mask of shape (h, w)
+    :param contours: obstacle contours as returned by orca_planner_utils.find_tuning_point, vertices are (x, h-1-y)
+    :return: (K, 2) int array of (x, y) pixels, in row-major order
+    """
+    h, w = mask.shape
+    walkable = np.zeros((h + 2, w + 2), dtype=bool)
+    walkable[1:-1, 1:-1] = mask == 255
+    interior = np.ones((h, w), dtype=bool)
+    for dy in (0, 1, 2):
+        for dx in (0, 1, 2):
+            if dy == 1 and dx == 1:
+                continue
+            interior &= walkable[dy:dy + h, dx:dx + w]
+
+    if len(contours) > 0:
+        # the contour vertex (x, y') excludes the pixel at column y', row x, as the original implementation did
+        vertices = np.concatenate([np.asarray(c).reshape(-1, 2) for c in contours]).astype(int)
+        rows, cols = vertices[:, 0], vertices[:, 1]
+        in_range = (rows >= 0) & (rows < h) & (cols >= 0) & (cols < w)
+        interior[rows[in_range], cols[in_range]] = False
+
+    ys, xs = np.nonzero(interior)
+    return np.stack([xs, ys], axis=1)
+
+
+def sample_spaced_points(points, num, min_dis=5, max_try=10000):
+    """
+    Pick num points that are at least min_dis apart. Shuffles the candidates and draws with random.choice until
+    enough points are accepted, i.e. the same draws as the original list based implementation, but the spacing test
+    is a lookup into a raster of blocked pixels instead of a loop over the accepted points
+    :param points: (K, 2) array of integer (x, y) candidates
+    :param num: number of points to pick
+    :param min_dis: minimum euclidean distance between two picked points
+    :param max_try: maximum number of draws
+    :return: (num, 2) array of picked points
+    """
+    points = np.asarray(points, dtype=int).reshape(-1, 2)
+    order = list(range(len(points)))
+    random.shuffle(order)
+    if len(points) < num:
+        raise ValueError(" Walkable points are less than spawn number! ")
+    if num == 0:
+        # also covers empty points, which have no extent to build the raster from
+        return np.zeros((0, 2), dtype=int)
+
+    radius = int(math.ceil(min_dis))
+    offsets = np.arange(-radius, radius + 1)
+    dx, dy = np.meshgrid(offsets, offsets)
+    in_disk = dx**2 + dy**2 < min_dis**2
+    dx, dy = dx[in_disk], dy[in_disk]
+    origin = points.min(axis=0) - radius
+    blocked = np.zeros(tuple(points.max(axis=0) - origin + radius + 1)[::-1], dtype=bool)
+
+    selected = []
+    try_time = 0
+    while len(selected) < num:
+        if try_time > max_try:
+            raise ValueError("Try too many time to get valid humanoid points!")
+        x, y = points[random.choice(order)] - origin
+        if not blocked[y, x]:
+            selected.append((x, y))
+            blocked[y + dy, x + dx] = True
+        try_time += 1
+    return np.array(selected, dtype=int).reshape(-1, 2) + origin
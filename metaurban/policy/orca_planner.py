@@ -1,6 +1,5 @@
 import xml.etree.ElementTree as ET
 import numpy as np
-from skimage import measure
 from metaurban.engine.logger import get_logger
 
 import sys, os
@@ -40,13 +39,7 @@ class OrcaPlanner:
         cellsize = 1
         agentdict = {"type": "orca-par-ecbs", "agent": []}
 
-        mylist, h, w = orca_planner_utils.mask_to_2d_list(mask)
-        contours = measure.find_contours(mylist, 0.5, positive_orientation='high')
-
-        flipped_contours = []
-        for contour in contours:
-            contour = orca_planner_utils.find_tuning_point(contour, h)
-            flipped_contours.append(contour)
+        geometry = orca_planner_utils.get_mask_geometry(mask)
         import os
         os.system(f'rm -rf ./.cache/{self.template_xml_file}')
         random_cache_file_id = np.random.uniform(0, 1)
@@ -56,7 +49,9 @@ class OrcaPlanner:
         else:
             self.template_xml_file = f'.cache/template_xml_file_{random_cache_file_id}_{curr_time}.xml'
 
-        orca_planner_utils.write_to_xml(mylist, w, h, cellsize, flipped_contours, agentdict, self.template_xml_file)
+        orca_planner_utils.write_to_xml(
+            geometry.grid, geometry.w, geometry.h, cellsize, geometry.contours, agentdict, self.template_xml_file
+        )
 
     def get_planning(self, start_positions, goals, num_agent, walkable_regions_mask=None):
         def get_speed(positions):
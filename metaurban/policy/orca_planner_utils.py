@@ -1,6 +1,9 @@
 import xml.etree.ElementTree as ET
 import sys
+import hashlib
+from collections import OrderedDict
 from metaurban.engine.logger import get_logger
+import metaurban.policy.mask_processing as mask_processing
 
 logger = get_logger()
 
@@ -107,22 +110,64 @@ def prettify(elem):
 
 
 def mask_to_2d_list(mask):
-    ## get <map> required by xml
-    img = Image.fromarray(mask)
-    img = img.convert('L')
-    binary_array = img.point(lambda x: 0 if x < 128 else 1, mode='1')
-    h = binary_array.size[1]
-    w = binary_array.size[0]
-    binary_list = []
-    for y in range(h):
-        row = []
-        for x in range(w):
-            row.append(1 - binary_array.getpixel((x, y)))  ## revert 0 & 1
-        binary_list.append(np.array(row))
-    binary_list = np.array(binary_list)
+    ## get <map> required by xml, 1 for obstacles and 0 for walkable cells
+    binary_list = mask_processing.mask_to_binary_grid(mask)
+    h, w = binary_list.shape
     return binary_list, h, w
 
 
+class MaskGeometry:
+    """
+    Obstacle geometry derived from one walkable region mask: the binary grid used by ORCA, the simplified obstacle
+    contours and the interior walkable points used for sampling starts and goals. Don't modify the returned arrays,
+    they are shared by all users of the same mask.
+    """
+    def __init__(self, mask):
+        self.grid, self.h, self.w = mask_to_2d_list(mask)
+        contours = measure.find_contours(self.grid, 0.5, positive_orientation='high')
+        self.contours = [find_tuning_point(contour, self.h) for contour in contours]
+        self._mask = mask.copy()
+        self._walkable_points = None
+        # Theta* paths planned on this map, see get_planning.get_path_cache
+        self.path_cache = None
+
+    @property
+    def walkable_points(self):
+        """
+        Pixels (x, y) of a 2D mask whose 8 neighbours are all walkable, excluding contour vertices. Same order as
+        np.where, as an (K, 2) int array
+        """
+        if self._walkable_points is None:
+            self._walkable_points = mask_processing.find_interior_points(self._mask, self.contours)
+            self._mask = None
+        return self._walkable_points
+
+
+_mask_geometry_cache = OrderedDict()
+MASK_GEOMETRY_CACHE_SIZE = 8
+
+
+def get_mask_geometry(mask):
+    """
+    Return the MaskGeometry of this mask, computed once per distinct mask. The walkable mask is fully determined by
+    the map seed and the object layout, so its content is used as the key: planners and samplers working on the same
+    map share one entry, and a changed object layout on the same seed never hits a stale one.
+    """
+    key = (mask.shape, mask.dtype.str, hashlib.sha1(np.ascontiguousarray(mask).data).hexdigest())
+    if key in _mask_geometry_cache:
+        _mask_geometry_cache.move_to_end(key)
+        return _mask_geometry_cache[key]
+    geometry = MaskGeometry(mask)
+    _mask_geometry_cache[key] = geometry
+    if len(_mask_geometry_cache) > MASK_GEOMETRY_CACHE_SIZE:
+        _mask_geometry_cache.popitem(last=False)
+    return geometry
+
+
+def clear_mask_geometry_cache():
+    _mask_geometry_cache.clear()
+
+
 def find_tuning_point(contour, h):
     unique_pt = []
     filtered_contour = []
@@ -195,6 +195,7 @@ class ScenarioDescription(dict):
     class DATASET:
         SUMMARY_FILE = "dataset_summary.pkl"  # dataset summary file name
         MAPPING_FILE = "dataset_mapping.pkl"  # store the relative path of summary file and each scenario
+        INDEX_FILE = "dataset_index.pkl"  # location of scenarios in the shard files of a sharded dataset
 
     @classmethod
     def sanity_check(cls, scenario_dict, check_self_type=False, valid_check=False):
@@ -0,0 +1,223 @@
+"""
+Sharded scenario dataset.
+
+Scenarios are packed into shard files instead of one pickle file per scenario. Every first-level field of a scenario,
+e.g. tracks or map_features, is pickled separately, and a small index maps each scenario to the location of its fields,
+so a scenario is found in O(1) and tools can load only the fields they need. Shards are written and sanity checked by
+parallel workers.
+
+Layout of a dataset:
+    <dataset_dir>/dataset_summary.pkl     the usual summary, see ScenarioDescription.DATASET.SUMMARY_FILE
+    <dataset_dir>/dataset_index.pkl       {"shards": [shard file], "scenarios": {file name: (shard, {field: (offset,
+                                          length)})}, "ids": {scenario id: file name}}
+    <dataset_dir>/shard_<i>.sds           concatenated pickled fields
+"""
+import copy
+import mmap
+import multiprocessing
+import os
+import pickle
+
+from metaurban.engine.logger import get_logger
+from metaurban.scenario.scenario_description import ScenarioDescription as SD
+
+logger = get_logger()
+
+SHARD_FILE = "shard_{:05d}.sds"
+
+
+def _write_shard(args):
+    """
+    Convert, sanity check and write the scenarios of one shard. It runs in worker processes
+    """
+    shard_path, scenario_list, dataset_name, dataset_version = args
+    summary, scenarios, ids = {}, {}, {}
+    tmp_path = "{}.{}.tmp".format(shard_path, os.getpid())
+    with open(tmp_path, "wb") as file:
+        for sd_scenario in scenario_list:
+            export_file_name = SD.get_export_file_name(dataset_name, dataset_version, sd_scenario[SD.ID])
+            sd_scenario = SD(sd_scenario)
+            SD.update_summaries(sd_scenario)
+            sd_scenario = sd_scenario.to_dict()
+            SD.sanity_check(sd_scenario, check_self_type=True)
+
+            fields = {}
+            for field, value in sd_scenario.items():
+                data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+                fields[field] = (file.tell(), len(data))
+                file.write(data)
+            if export_file_name in scenarios:
+                logger.warning("Scenario {} already exists and will be overwritten!".format(export_file_name))
+            summary[export_file_name] = copy.deepcopy(sd_scenario[SD.METADATA])
+            scenarios[export_file_name] = fields
+            ids[sd_scenario[SD.ID]] = export_file_name
+    os.replace(tmp_path, shard_path)
+    return summary, scenarios, ids
+
+
+def save_sharded_dataset(
+    scenario_list, dataset_name, dataset_version, dataset_dir, scenarios_per_shard=256, num_workers=None
+):
+    """
+    Save scenarios as a sharded dataset
+    :param scenario_list: a list of Scenario Description objects or dicts
+    :param dataset_name: name of the dataset, used in the file name of scenarios
+    :param dataset_version: version of the dataset, used in the file name of scenarios
+    :param dataset_dir: directory of the dataset
+    :param scenarios_per_shard: number of scenarios in a shard file
+    :param num_workers: number of processes writing shards, 0 to write in the current process, None for the CPU count
+    :return: summary dict
+    """
+    from metaurban.scenario.utils import dict_recursive_remove_array_and_set
+    os.makedirs(dataset_dir, exist_ok=True)
+    shards = [scenario_list[i:i + scenarios_per_shard] for i in range(0, len(scenario_list), scenarios_per_shard)]
+    jobs = [
+        (os.path.join(dataset_dir, SHARD_FILE.format(i)), shard, dataset_name, dataset_version)
+        for i, shard in enumerate(shards)
+    ]
+    num_workers = min(os.cpu_count() if num_workers is None else num_workers, len(jobs))
+    if num_workers > 1:
+        with multiprocessing.Pool(num_workers) as pool:
+            results = pool.map(_write_shard, jobs, chunksize=1)
+    else:
+        results = [_write_shard(job) for job in jobs]
+
+    summary, index = {}, dict(shards=[SHARD_FILE.format(i) for i in range(len(jobs))], scenarios={}, ids={})
+    for shard_index, (shard_summary, scenarios, ids) in enumerate(results):
+        for export_file_name in scenarios:
+            if export_file_name in index["scenarios"]:
+                logger.warning("Scenario {} already exists and will be overwritten!".format(export_file_name))
+        summary.update(shard_summary)
+        index["scenarios"].update({k: (shard_index, fields) for k, fields in scenarios.items()})
+        index["ids"].update(ids)
+    with open(os.path.join(dataset_dir, SD.DATASET.SUMMARY_FILE), "wb") as file:
+        pickle.dump(dict_recursive_remove_array_and_set(summary), file)
+    # replace the index atomically, so that readers of the previous dataset notice the change, see get_sharded_reader
+    index_path = os.path.join(dataset_dir, SD.DATASET.INDEX_FILE)
+    tmp_path = "{}.{}.tmp".format(index_path, os.getpid())
+    with open(tmp_path, "wb") as file:
+        pickle.dump(index, file)
+    os.replace(tmp_path, index_path)
+    close_sharded_reader(dataset_dir)
+    logger.info("Save {} scenarios in {} shards to {}".format(len(summary), len(jobs), dataset_dir))
+    return summary
+
+
+class ShardedDatasetReader:
+    """
+    Read scenarios from a sharded dataset. Shards are memory-mapped when they are first accessed
+    """
+    def __init__(self, dataset_dir):
+        self.dataset_dir = dataset_dir
+        with open(os.path.join(dataset_dir, SD.DATASET.INDEX_FILE), "rb") as file:
+            index = pickle.load(file)
+        self._shard_files = index["shards"]
+        self._scenarios = index["scenarios"]
+        self._ids = index["ids"]
+        self._shards = {}
+        self._summary = None
+
+    @staticmethod
+    def is_sharded_dataset(dataset_dir):
+        return os.path.isfile(os.path.join(dataset_dir, SD.DATASET.INDEX_FILE))
+
+    @property
+    def summary(self):
+        if self._summary is None:
+            with open(os.path.join(self.dataset_dir, SD.DATASET.SUMMARY_FILE), "rb") as file:
+                self._summary = pickle.load(file)
+        return self._summary
+
+    @property
+    def scenario_files(self):
+        return list(self._scenarios.keys())
+
+    def _fields(self, scenario):
+        """
+        :param scenario: scenario file name as in the summary, or scenario id
+        """
+        if scenario not in self._scenarios:
+            scenario = self._ids[scenario]
+        return self._scenarios[scenario]
+
+    def _shard(self, shard_index):
+        shard = self._shards.get(shard_index)
+        if shard is None:
+            with open(os.path.join(self.dataset_dir, self._shard_files[shard_index]), "rb") as file:
+                shard = self._shards[shard_index] = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return shard
+
+    def read_field(self, scenario, field):
+        """
+        Load one first-level field of a scenario, e.g. SD.TRACKS or SD.METADATA
+        """
+        shard_index, fields = self._fields(scenario)
+        offset, length = fields[field]
+        return pickle.loads(self._shard(shard_index)[offset:offset + length])
+
+    def read_scenario(self, scenario, fields=None, centralize=False):
+        """
+        Load a scenario
+        :param scenario: scenario file name as in the summary, or scenario id
+        :param fields: first-level fields to load, None for all of them
+        :param centralize: whether to centralize all elements to the ego car's initial position
+        :return: Scenario Description instance
+        """
+        shard_index, scenario_fields = self._fields(scenario)
+        shard = self._shard(shard_index)
+        data = SD(
+            {
+                field: pickle.loads(shard[offset:offset + length])
+                for field, (offset, length) in scenario_fields.items() if fields is None or field in fields
+            }
+        )
+        if centralize:
+            data = SD.centralize_to_ego_car_initial_position(data)
+        return data
+
+    def __contains__(self, scenario):
+        return scenario in self._scenarios or scenario in self._ids
+
+    def __len__(self):
+        return len(self._scenarios)
+
+    def close(self):
+        for shard in self._shards.values():
+            shard.close()
+        self._shards = {}
+
+
+_readers = {}
+
+
+def _index_stat(dataset_dir):
+    stat = os.stat(os.path.join(dataset_dir, SD.DATASET.INDEX_FILE))
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def get_sharded_reader(dataset_dir):
+    """
+    Reader of a sharded dataset, shared by all callers. It is reopened when the dataset index changes, e.g. when the
+    dataset is saved again to the same directory
+    :param dataset_dir: directory of the dataset
+    :return: ShardedDatasetReader
+    """
+    dataset_dir = os.path.abspath(dataset_dir)
+    stat = _index_stat(dataset_dir)
+    cached = _readers.get(dataset_dir)
+    if cached is not None and cached[1] == stat:
+        return cached[0]
+    close_sharded_reader(dataset_dir)
+    reader = ShardedDatasetReader(dataset_dir)
+    _readers[dataset_dir] = (reader, stat)
+    return reader
+
+
+def close_sharded_reader(dataset_dir):
+    """
+    Close and drop the shared reader of a sharded dataset, if any
+    :param dataset_dir: directory of the dataset
+    """
+    cached = _readers.pop(os.path.abspath(dataset_dir), None)
+    if cached is not None:
+        cached[0].close()
@@ -336,6 +336,9 @@ def convert_recorded_scenario_exported(record_episode, scenario_log_interval=0.1
 def read_scenario_data(file_path, centralize=False):
     """Read a scenario pkl file and return the Scenario Description instance.
 
+    Scenarios of a sharded dataset have no file of their own. They are read from the shards through the dataset index
+    when `file_path` is `<dataset_dir>/<scenario file name>`, which is the path given by read_dataset_summary.
+
     Args:
         file_path: the path to a scenario file (usually ends with `.pkl`).
         centralize: whether to centralize all elements to the ego car's initial position
@@ -344,6 +347,11 @@ def read_scenario_data(file_path, centralize=False):
         The Scenario Description instance of that scenario.
     """
     assert SD.is_scenario_file(file_path), "File: {} is not scenario file".format(file_path)
+    dataset_dir = os.path.abspath(os.path.dirname(file_path))
+    if not os.path.isfile(file_path) and os.path.isfile(os.path.join(dataset_dir, SD.DATASET.INDEX_FILE)):
+        # sharded dataset, see metaurban/scenario/sharded_dataset.py
+        from metaurban.scenario.sharded_dataset import get_sharded_reader
+        return get_sharded_reader(dataset_dir).read_scenario(os.path.basename(file_path), centralize=centralize)
     with open(file_path, "rb") as f:
         # unpickler = CustomUnpickler(f)
         data = pickle.load(f)
@@ -369,7 +377,8 @@ def read_dataset_summary(file_folder, check_file_existence=True):
         A tuple of three elements:
         1) the summary dict mapping from scenario ID to its metadata,
         2) the list of all scenarios IDs, and
-        3) a dict mapping from scenario IDs to the folder that hosts their files.
+        3) a dict mapping from scenario IDs to the folder that hosts their files. For a sharded dataset, scenarios are
+        mapped to the root folder, and read_scenario_data reads them from the shards.
     """
     file_folder = pathlib.Path(file_folder)
     summary_file = file_folder / SD.DATASET.SUMMARY_FILE
@@ -395,10 +404,16 @@ def read_dataset_summary(file_folder, check_file_existence=True):
             mapping = pickle.load(f)
 
     if not mapping:
-        # Create a fake one
+        # Create a fake one. Sharded datasets have no mapping file and always end up here
         mapping = {k: "" for k in summary_dict}
 
-    if check_file_existence:
+    if check_file_existence and os.path.isfile(file_folder / SD.DATASET.INDEX_FILE):
+        # sharded dataset, see metaurban/scenario/sharded_dataset.py
+        from metaurban.scenario.sharded_dataset import ShardedDatasetReader
+        reader = ShardedDatasetReader(file_folder)
+        for file in summary_dict:
+            assert file in reader, "Can not find scenario {} in the shards".format(file)
+    elif check_file_existence:
         for file in summary_dict:
             assert file in mapping, "FileName in mapping mismatch with summary"
             assert SD.is_scenario_file(file), "File:{} is not sd scenario file".format(file)
@@ -0,0 +1,151 @@
+from metaurban.engine.contact_service import ContactService, ContactType, contact_type
+from metaurban.type import MetaUrbanType
+
+
+class _Node:
+    def __init__(self, name, static=False):
+        self.name = name
+        self.static = static
+        self.tag = object()
+
+    def getName(self):
+        return self.name
+
+    def hasPythonTag(self, name):
+        return name == self.name
+
+    def getPythonTag(self, name):
+        return self.tag
+
+    def isStatic(self):
+        return self.static
+
+    def isKinematic(self):
+        return False
+
+
+class _Wrapper(_Node):
+    # a second python wrapper of the same physics node, sharing its python tag
+    def __init__(self, node):
+        super(_Wrapper, self).__init__(node.name, node.static)
+        self.tag = node.tag
+
+
+class _Contact:
+    def __init__(self, node0, node1):
+        self.nodes = (node0, node1)
+
+    def getNode0(self):
+        return self.nodes[0]
+
+    def getNode1(self):
+        return self.nodes[1]
+
+
+class _ContactResult:
+    def __init__(self, contacts):
+        self.contacts = contacts
+
+    def getContacts(self):
+        return self.contacts
+
+
+class _ManifoldPoint:
+    def __init__(self, distance):
+        self.distance = distance
+
+    def getDistance(self):
+        return self.distance
+
+
+class _Manifold(_Contact):
+    def __init__(self, node0, node1, distances):
+        super(_Manifold, self).__init__(node0, node1)
+        self.points = [_ManifoldPoint(d) for d in distances]
+
+    def getNumManifoldPoints(self):
+        return len(self.points)
+
+    def getManifoldPoint(self, i):
+        return self.points[i]
+
+
+class _World:
+    def __init__(self, pairs=(), manifolds=()):
+        self.pairs = list(pairs)
+        self.manifolds = list(manifolds)
+
+    def contactTest(self, node, one_way):
+        ret = []
+        for node0, node1 in self.pairs:
+            if node0.tag is node.tag or node1.tag is node.tag:
+                ret.append(_Contact(_Wrapper(node0), _Wrapper(node1)))
+        return _ContactResult(ret)
+
+    def getManifolds(self):
+        return self.manifolds
+
+
+class _PhysicsWorld:
+    def __init__(self, static_world, dynamic_world):
+        self.static_world = static_world
+        self.dynamic_world = dynamic_world
+
+
+def test_contact_type():
+    assert contact_type(MetaUrbanType.LINE_SOLID_SINGLE_WHITE) == ContactType.LINE_SOLID_SINGLE_WHITE
+    assert contact_type(MetaUrbanType.LINE_SOLID_SINGLE_YELLOW) == ContactType.LINE_SOLID_SINGLE_YELLOW
+    assert contact_type(MetaUrbanType.LINE_BROKEN_SINGLE_WHITE) == ContactType.LINE_BROKEN
+    assert contact_type(MetaUrbanType.LINE_BROKEN_SINGLE_YELLOW) == ContactType.LINE_BROKEN
+    assert contact_type(MetaUrbanType.CROSSWALK) == ContactType.CROSSWALK
+    assert contact_type(MetaUrbanType.TRAFFIC_LIGHT) == ContactType.TRAFFIC_LIGHT
+    assert contact_type(MetaUrbanType.VEHICLE) == ContactType.VEHICLE
+    assert contact_type(MetaUrbanType.BUILDING) == ContactType.BUILDING
+    assert contact_type(MetaUrbanType.PEDESTRIAN) == ContactType.HUMAN
+    assert contact_type(MetaUrbanType.CYCLIST) == ContactType.HUMAN
+    for name in [MetaUrbanType.TRAFFIC_CONE, MetaUrbanType.TRAFFIC_BARRIER, MetaUrbanType.TRAFFIC_OBJECT]:
+        assert contact_type(name) == ContactType.TRAFFIC_OBJECT
+    assert contact_type("UNKNOWN_NODE") == ContactType.NONE
+    # cached codes of unknown names are returned again
+    assert contact_type("UNKNOWN_NODE") == ContactType.NONE
+
+
+def test_contact_service_other_node():
+    pedestrian = _Node(MetaUrbanType.PEDESTRIAN)
+    vehicle = _Node(MetaUrbanType.VEHICLE)
+    other_pedestrian = _Node(MetaUrbanType.PEDESTRIAN)
+    crosswalk = _Node(MetaUrbanType.CROSSWALK, static=True)
+    static_world = _World([(pedestrian, crosswalk)])
+    dynamic_world = _World([(pedestrian, vehicle), (other_pedestrian, pedestrian), (vehicle, other_pedestrian)])
+    service = ContactService(_PhysicsWorld(static_world, dynamic_world))
+
+    # the other body of each contact is returned, whichever side of the contact the queried body is on, and also
+    # when the queried body is a pedestrian touching a vehicle
+    contacts = service.get_contacts(_Wrapper(pedestrian))
+    assert [code for code, _ in contacts] == [ContactType.CROSSWALK, ContactType.VEHICLE, ContactType.HUMAN]
+    assert [node.tag for _, node in contacts] == [crosswalk.tag, vehicle.tag, other_pedestrian.tag]
+
+    contacts = service.get_contacts(vehicle)
+    assert [(code, node.tag) for code, node in contacts] == [
+        (ContactType.HUMAN, pedestrian.tag), (ContactType.HUMAN, other_pedestrian.tag)
+    ]
+
+
+def test_contact_service_manifolds():
+    pedestrian = _Node(MetaUrbanType.PEDESTRIAN)
+    vehicle = _Node(MetaUrbanType.VEHICLE)
+    building = _Node(MetaUrbanType.BUILDING)
+    manifolds = [_Manifold(vehicle, pedestrian, [0.1, -0.01]), _Manifold(pedestrian, building, [0.2])]
+    dynamic_world = _World([(pedestrian, building)], manifolds)
+    service = ContactService(_PhysicsWorld(_World(), dynamic_world), use_manifolds=True)
+
+    # before the first physics step, contactTest is used
+    assert [code for code, _ in service.get_contacts(pedestrian)] == [ContactType.BUILDING]
+
+    # manifolds without a point in contact are skipped
+    service.after_physics_step()
+    assert [(code, node.tag) for code, node in service.get_contacts(pedestrian)] == [(ContactType.VEHICLE, vehicle.tag)]
+    assert [(code, node.tag) for code, node in service.get_contacts(vehicle)] == [(ContactType.HUMAN, pedestrian.tag)]
+
+    service.reset()
+    assert [code for code, _ in service.get_contacts(pedestrian)] == [ContactType.BUILDING]
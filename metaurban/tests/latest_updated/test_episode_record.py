@@ -0,0 +1,85 @@
+import os
+import tempfile
+
+import numpy as np
+
+from metaurban.manager.record_manager import FrameInfo
+from metaurban.utils.episode_record import EpisodeRecordWriter, EpisodeRecordReader
+
+
+def _make_frame(episode_step, rng, names):
+    frame = FrameInfo(episode_step)
+    for name in names:
+        frame.step_info[name] = {
+            "position": rng.randn(3).tolist(),
+            "heading_theta": float(rng.randn()),
+            "roll": 0.0,
+            "pitch": 0.0,
+            "velocity": rng.randn(2),
+            "steering": float(rng.randint(2)),
+        }
+        frame.policy_info[name] = {"lane_index": rng.randint(3)}
+    frame.manager_info = {"TrafficManager": {"step": episode_step // 10}}
+    frame.agents = ["default_agent"]
+    frame._agent_to_object = {"default_agent": names[0]}
+    frame._object_to_agent = {names[0]: "default_agent"}
+    return frame
+
+
+def test_episode_record_round_trip():
+    rng = np.random.RandomState(0)
+    steps = [[_make_frame(0, rng, ["a"])]]
+    steps[0][0].spawn_info["a"] = {"name": "a"}
+    for step in range(1, 60):
+        names = ["a"] + (["b"] if 20 <= step < 40 else [])
+        steps.append([_make_frame(step, rng, names) for _ in range(5)])
+    steps[20][0].spawn_info["b"] = {"name": "b"}
+    steps[40][0].clear_info.append("b")
+
+    file_path = os.path.join(tempfile.mkdtemp(), "episode.rec")
+    writer = EpisodeRecordWriter(file_path, chunk_frames=32)
+    writer.write_header({"global_seed": 0})
+    for step_frames in steps:
+        writer.add_step(step_frames)
+    writer.close()
+
+    reader = EpisodeRecordReader(file_path)
+    episode = reader.to_episode_info()
+    assert episode["global_seed"] == 0
+    assert [len(s) for s in episode["frame"]] == [len(s) for s in steps]
+    for expected, frame in zip([f for s in steps for f in s], [f for s in episode["frame"] for f in s]):
+        assert frame.episode_step == expected.episode_step
+        assert frame.step_info.keys() == expected.step_info.keys()
+        for name, state in expected.step_info.items():
+            for key, value in state.items():
+                assert np.array_equal(frame.step_info[name][key], value)
+        assert frame.policy_info == expected.policy_info
+        assert frame.manager_info == expected.manager_info
+        assert frame.spawn_info == expected.spawn_info and frame.clear_info == expected.clear_info
+        assert frame._agent_to_object == expected._agent_to_object
+    assert reader.frame(150).step_info["b"]["heading_theta"] == steps[30][4].step_info["b"]["heading_theta"]
+    reader.close()
+
+
+def test_episode_record_seek():
+    rng = np.random.RandomState(1)
+    file_path = os.path.join(tempfile.mkdtemp(), "episode.rec")
+    writer = EpisodeRecordWriter(file_path, chunk_frames=16)
+    writer.write_header({})
+    for step in range(40):
+        frames = [_make_frame(step, rng, ["a"] + (["b"] if 10 <= step < 30 else [])) for _ in range(3)]
+        if step == 10:
+            frames[1].spawn_info["b"] = {"name": "b"}
+        if step == 30:
+            frames[0].clear_info.append("b")
+        writer.add_step(frames)
+    writer.close()
+
+    reader = EpisodeRecordReader(file_path)
+    assert reader.num_steps == 40 and reader.step_frame_range(20) == (60, 63)
+    assert not reader.alive_objects(31)[0] and list(reader.alive_objects(32)[0]) == ["b"]
+    assert not reader.alive_objects(91)[0]
+    shard = list(reader.steps(20, 25))
+    assert [frame.episode_step for frame in shard[0]] == [20] * 3 and len(shard) == 5
+    assert shard[-1][-1].step_info["b"]["position"] == reader.frame(74).step_info["b"]["position"]
+    reader.close()
@@ -0,0 +1,38 @@
+import numpy as np
+
+from metaurban.utils.interpolating_line import InterpolatingLine
+
+
+def _random_polyline(rng, num_points):
+    steps = rng.uniform(0.5, 3, (num_points, 2)) * rng.choice([-1, 1], (num_points, 2))
+    points = np.cumsum(steps, axis=0)
+    # repeated points make zero-length segments
+    repeat = rng.randint(0, num_points, 3)
+    return np.insert(points, repeat, points[repeat], axis=0)
+
+
+def test_interpolating_line_batch():
+    rng = np.random.RandomState(0)
+    for num_points in [1, 2, 5, 30]:
+        for _ in range(5):
+            line = InterpolatingLine(_random_polyline(rng, num_points))
+            # including longitudes before the start and past the end of the line
+            longitudinals = np.concatenate(
+                [rng.uniform(-5, line.length + 5, 50), [-1, 0, line.length, line.length + 1], line._accumulate_lengths]
+            )
+            laterals = rng.uniform(-3, 3, len(longitudinals))
+
+            points = line.get_points(longitudinals, laterals)
+            center_points = line.get_points(longitudinals)
+            headings = line.get_heading_thetas(longitudinals)
+            for i, (longitudinal, lateral) in enumerate(zip(longitudinals, laterals)):
+                assert np.array_equal(points[i], line.get_point(longitudinal, lateral))
+                assert np.array_equal(center_points[i], line.get_point(longitudinal))
+                assert headings[i] == line.get_heading_theta(longitudinal)
+            assert np.array_equal(line.get_points(longitudinals, 1.5)[3], line.get_point(longitudinals[3], 1.5))
+
+            positions = np.concatenate([points, rng.uniform(-20, 60, (20, 2))])
+            longs, lats = line.local_coordinates_batch(positions)
+            for i, position in enumerate(positions):
+                long, lat = line.local_coordinates(position)
+                assert np.isclose(longs[i], long, rtol=0, atol=1e-9) and np.isclose(lats[i], lat, rtol=0, atol=1e-9)
@@ -0,0 +1,52 @@
+import numpy as np
+
+from metaurban.envs import SidewalkStaticMetaUrbanEnv
+
+
+def test_lidar_perceive_batch():
+    """
+    perceive_batch, and perceive after prefetch, return the same points and objects as one perceive call per agent
+    """
+    env = SidewalkStaticMetaUrbanEnv(
+        {
+            "object_density": 0.6,
+            "num_scenarios": 1,
+            "traffic_density": 0.2,
+            "show_terrain": False,
+            "map": "X",
+            "start_seed": 4,
+        }
+    )
+    try:
+        env.reset()
+        for _ in range(5):
+            env.step([0, 1])
+        engine = env.engine
+        physics_world = engine.physics_world.dynamic_world
+        others = engine.get_objects(lambda obj: obj is not env.agent and len(obj.dynamic_nodes) > 0)
+        vehicles = [env.agent] + list(others.values())[:5]
+        assert len(vehicles) > 1
+
+        lidar = engine.get_sensor("lidar")
+        batch = lidar.perceive_batch(vehicles, physics_world, num_lasers=120, distance=50)
+        batch_cloud_points, batch_objects = batch.cloud_points.copy(), batch.detected_objects
+        for index, vehicle in enumerate(vehicles):
+            cloud_points, detected_objects = lidar.perceive(vehicle, physics_world, num_lasers=120, distance=50)
+            assert np.array_equal(batch_cloud_points[index], cloud_points)
+            assert batch_objects[index] == detected_objects
+
+        lidar.prefetch(vehicles, physics_world, num_lasers=120, distance=50)
+        for index, vehicle in enumerate(vehicles):
+            cloud_points, detected_objects = lidar.perceive(vehicle, physics_world, num_lasers=120, distance=50)
+            assert cloud_points == batch_cloud_points[index].tolist() and detected_objects == batch_objects[index]
+        assert lidar._prefetched == {}
+
+        side_detector = engine.get_sensor("side_detector")
+        batch = side_detector.perceive_batch(vehicles, engine.physics_world.static_world, num_lasers=12, distance=50)
+        for index, vehicle in enumerate(vehicles):
+            result = side_detector.perceive(vehicle, engine.physics_world.static_world, num_lasers=12, distance=50)
+            assert np.array_equal(batch.cloud_points[index], result.cloud_points)
+            assert [r.getNode() for r in batch.detected_objects[index]] == \
+                   [r.getNode() for r in result.detected_objects]
+    finally:
+        env.close()
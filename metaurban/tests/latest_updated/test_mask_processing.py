@@ -0,0 +1,62 @@
+import math
+import random
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+from metaurban.policy.mask_processing import mask_to_binary_grid, find_interior_points, sample_spaced_points
+
+
+def _make_mask(h=120, w=160):
+    mask = np.zeros((h, w, 3), np.uint8)
+    cv2.rectangle(mask, (5, 5), (w - 6, 20), (255, 255, 255), -1)
+    cv2.rectangle(mask, (5, h - 21), (w - 6, h - 6), (255, 255, 255), -1)
+    cv2.rectangle(mask, (5, 5), (20, h - 6), (255, 255, 255), -1)
+    cv2.rectangle(mask, (w - 21, 5), (w - 6, h - 6), (255, 255, 255), -1)
+    return mask
+
+
+def test_mask_to_binary_grid():
+    rgb = np.random.RandomState(0).randint(0, 256, (40, 50, 3)).astype(np.uint8)
+    for mask in [_make_mask(), _make_mask()[:, :, 0], rgb]:
+        luminance = np.asarray(Image.fromarray(mask).convert('L'))
+        assert np.array_equal(mask_to_binary_grid(mask), (luminance < 128).astype(int))
+
+
+def test_find_interior_points():
+    mask = _make_mask()[:, :, 0]
+    contours = [np.array([[10.0, 110.0], [12.0, 30.0]])]
+    points = find_interior_points(mask, contours)
+    padded = np.pad(mask == 255, 1)
+    h, w = mask.shape
+    expected = []
+    for y in range(h):
+        for x in range(w):
+            neighbours = padded[y:y + 3, x:x + 3].sum() - padded[y + 1, x + 1]
+            if neighbours == 8 and (x, y) not in [(110, 10), (30, 12)]:
+                expected.append((x, y))
+    assert [tuple(p) for p in points] == expected
+
+
+def test_sample_spaced_points_matches_list_sampling():
+    points = find_interior_points(_make_mask()[:, :, 0], [])
+    for seed in range(3):
+        random.seed(seed)
+        candidates = [tuple(p) for p in points]
+        random.shuffle(candidates)
+        expected = []
+        while len(expected) < 10:
+            pt = random.choice(candidates)
+            if all(math.dist(pt, s) >= 5 for s in expected):
+                expected.append(pt)
+        random.seed(seed)
+        assert [tuple(p) for p in sample_spaced_points(points, 10, min_dis=5)] == expected
+
+
+def test_sample_spaced_points_empty():
+    assert sample_spaced_points(np.zeros((0, 2), dtype=int), 0).shape == (0, 2)
+    assert sample_spaced_points(find_interior_points(_make_mask()[:, :, 0], []), 0).shape == (0, 2)
+    with pytest.raises(ValueError):
+        sample_spaced_points([], 1)
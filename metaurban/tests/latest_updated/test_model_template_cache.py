@@ -0,0 +1,67 @@
+from panda3d.core import CardMaker, NodePath
+
+from metaurban.engine.core.model_template_cache import ModelTemplateCache, estimate_model_bytes
+
+
+class _Loader:
+    def __init__(self):
+        self.loaded = []
+
+    def loadModel(self, model_path):
+        self.loaded.append(model_path)
+        return NodePath(CardMaker(model_path).generate())
+
+
+def _template_bytes():
+    template = NodePath("template")
+    _Loader().loadModel("model").reparentTo(template)
+    template.flattenStrong()
+    return estimate_model_bytes(template)
+
+
+def test_model_template_cache_hit():
+    loader, parent = _Loader(), NodePath("parent")
+    cache = ModelTemplateCache(max_bytes=1024 * 1024)
+    first = cache.instance_to(loader, parent, "a", heading=90, pos=(1, 0, 0), scale=2)
+    second = cache.instance_to(loader, parent, "a", heading=90, pos=[1, 0, 0], scale=2)
+    # a repeated key instances the same template without loading the model again
+    assert loader.loaded == ["a"]
+    assert first.node() == second.node() and first.getParent() == parent and second.getParent() == parent
+    assert cache.stats() == dict(hits=1, misses=1, evictions=0, templates=1, bytes=_template_bytes())
+
+    # the transform is part of the key
+    cache.instance_to(loader, parent, "a", heading=0, pos=(1, 0, 0), scale=2)
+    cache.instance_to(loader, parent, "b", heading=90, pos=(1, 0, 0), scale=2)
+    assert loader.loaded == ["a", "a", "b"]
+    assert cache.stats()["misses"] == 3 and cache.stats()["templates"] == 3
+
+
+def test_model_template_cache_eviction():
+    nbytes = _template_bytes()
+    assert nbytes > 0
+    loader, parent = _Loader(), NodePath("parent")
+    cache = ModelTemplateCache(max_bytes=2 * nbytes)
+    cache.instance_to(loader, parent, "a")
+    instance_b = cache.instance_to(loader, parent, "b")
+    cache.instance_to(loader, parent, "a")
+    # b is the least recently used template
+    cache.instance_to(loader, parent, "c")
+    assert cache.stats() == dict(hits=1, misses=3, evictions=1, templates=2, bytes=2 * nbytes)
+    # instances of an evicted template are kept
+    assert not instance_b.isEmpty() and instance_b.getParent() == parent
+    cache.instance_to(loader, parent, "a")
+    cache.instance_to(loader, parent, "b")
+    assert loader.loaded == ["a", "b", "c", "b"]
+    assert cache.stats()["evictions"] == 2
+
+    # the last template is kept even if it alone exceeds max_bytes
+    cache = ModelTemplateCache(max_bytes=0)
+    cache.instance_to(loader, parent, "a")
+    assert cache.stats()["templates"] == 1 and cache.stats()["bytes"] == nbytes
+    cache.instance_to(loader, parent, "b")
+    assert cache.stats() == dict(hits=0, misses=2, evictions=1, templates=1, bytes=nbytes)
+
+    cache.clear()
+    assert cache.stats() == dict(hits=0, misses=2, evictions=1, templates=0, bytes=0)
+    cache.instance_to(loader, parent, "b")
+    assert cache.stats()["misses"] == 3 and cache.stats()["templates"] == 1
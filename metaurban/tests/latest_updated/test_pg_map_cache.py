@@ -0,0 +1,108 @@
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+from metaurban.component.map.pg_map_cache import PGMapCache, WALKABLE_LAYERS
+
+
+class _FakeLane:
+    def __init__(self, index, polygon):
+        self.index = index
+        self.polygon = polygon
+
+
+class _FakeRoadNetwork:
+    def __init__(self, lanes):
+        self.lanes = lanes
+
+    def get_all_lanes(self):
+        return self.lanes
+
+
+class _FakeMap:
+    def __init__(self, offset=0.0):
+        rng = np.random.RandomState(0)
+        self.road_network = _FakeRoadNetwork([_FakeLane(("a", "b", i), rng.rand(4, 2) * 10 + offset) for i in range(3)])
+        for layer in WALKABLE_LAYERS:
+            setattr(self, layer, {})
+        self.sidewalks = {
+            "SDW_0": {
+                "type": "sidewalk",
+                "polygon": (rng.rand(5, 2) * 10 + offset).tolist()
+            },
+            "SDW_1": {
+                "type": "sidewalk",
+                "polygon": None
+            }
+        }
+        self.crosswalks = {"CRS_0": {"type": "crosswalk", "polygon": rng.rand(4, 2) + offset}}
+
+    def get_meta_data(self):
+        return {"map_config": {"lane_num": 2}, "block_sequence": [{"id": "I"}, {"id": "X"}]}
+
+
+def test_pg_map_cache_key():
+    global_config = {"crswalk_density": 0.5, "sidewalk_type": "Wide Commercial", "traffic_density": 0.1}
+    map_config = {"lane_num": 2, "lane_width": 3.5}
+    key = PGMapCache.key(1, map_config, global_config, 1)
+    # the order of the map config items does not matter
+    assert key == PGMapCache.key(1, dict(reversed(list(map_config.items()))), dict(global_config), 1)
+    # global config values that do not affect the geometry are not part of the key
+    assert key == PGMapCache.key(1, map_config, dict(global_config, traffic_density=0.3), 1)
+    others = [
+        PGMapCache.key(2, map_config, global_config, 1),
+        PGMapCache.key(1, dict(map_config, lane_num=3), global_config, 1),
+        PGMapCache.key(1, map_config, dict(global_config, crswalk_density=1.0), 1),
+        PGMapCache.key(1, map_config, dict(global_config, sidewalk_type="Narrow Sidewalk"), 1),
+        PGMapCache.key(1, map_config, dict(global_config, predefined_config={"a": 1}), 1),
+        PGMapCache.key(1, map_config, global_config, 2),
+    ]
+    assert len(set(others + [key])) == len(others) + 1
+
+
+def test_pg_map_cache_round_trip():
+    cache = PGMapCache(tempfile.mkdtemp())
+    fake_map = _FakeMap()
+    assert cache.get("0123") is None
+    cache.put("0123", fake_map)
+    entry = cache.get("0123")
+    assert entry.meta == fake_map.get_meta_data()
+
+    sidewalks = entry.polygons("sidewalks")
+    assert list(sidewalks.keys()) == ["SDW_0"] and sidewalks["SDW_0"]["type"] == "sidewalk"
+    assert np.array_equal(sidewalks["SDW_0"]["polygon"], fake_map.sidewalks["SDW_0"]["polygon"])
+    lanes = entry.polygons("lanes")
+    for lane in fake_map.road_network.get_all_lanes():
+        assert np.array_equal(lanes[str(lane.index)]["polygon"], lane.polygon)
+    assert entry.matches(fake_map)
+    assert not entry.matches(_FakeMap(offset=0.5))
+
+    assert entry.walkable_mask(2) is None
+    mask = np.random.RandomState(1).randint(0, 256, (20, 30, 3)).astype(np.uint8)
+    entry.save_walkable_mask(2, mask, np.array([3.0, -4.0]))
+    cached_mask, translate = cache.get("0123").walkable_mask(2)
+    assert np.array_equal(cached_mask, mask) and np.array_equal(translate, [3.0, -4.0])
+
+
+def test_pg_map_cache_concurrent_put():
+    cache = PGMapCache(tempfile.mkdtemp())
+    fake_map = _FakeMap()
+    entries = []
+
+    def put():
+        entries.append(cache.put("abcd", fake_map))
+
+    threads = [threading.Thread(target=put) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # a put after the entry exists loses the rename as well
+    put()
+    assert len(entries) == 9
+    assert len({entry.path for entry in entries}) == 1
+    assert all(entry.matches(fake_map) for entry in entries)
+    # temporary directories of the losing puts are removed
+    assert os.listdir(os.path.join(cache.cache_dir, "ab")) == ["abcd"]
@@ -1,4 +1,6 @@
+import numpy as np
 import pytest
+from scipy.spatial.transform import Rotation as R
 
 from metaurban.component.sensors.point_cloud_lidar import PointCloudLidar
 from metaurban.envs import SidewalkStaticMetaUrbanEnv
@@ -61,5 +63,45 @@ def test_point_cloud(config, render=False):
         env.close()
 
 
+def _meshgrid_lidar_from_depth(depth_img, camera_intrinsics, camera_translation, camera_rotation):
+    # simulate_lidar_from_depth() before the pixel rays were cached
+    depth_img = depth_img.T[::-1, ::-1]
+    height, width = depth_img.shape
+    u, v = np.meshgrid(np.arange(width), np.arange(height))
+    uv_coords = np.stack([u, v, np.ones_like(u)], axis=-1).reshape(-1, 3)
+    cam_coords = (np.linalg.inv(camera_intrinsics) @ uv_coords.T).T
+    cam_coords *= depth_img.reshape(-1)[..., None]
+    cam_coords = cam_coords[..., [2, 1, 0]]
+    world_coords = (camera_rotation @ cam_coords.T).T + camera_translation
+    return world_coords.reshape(height, width, 3).swapaxes(0, 1)
+
+
+class _RayCache(PointCloudLidar):
+    """
+    Only the camera ray cache of PointCloudLidar, without a camera and image buffer
+    """
+    def __init__(self):
+        self._camera_rays, self._camera_rays_key = None, None
+
+    def __del__(self):
+        pass
+
+
+def test_simulate_lidar_from_depth_non_square():
+    depth = np.random.RandomState(0).uniform(1, 50, (4, 6))
+    height, width = depth.shape
+    intrinsics = np.asarray([[5.0, 0, (height - 1) / 2], [0, 4.0, (width - 1) / 2], [0, 0, 1]])
+    rotation = R.from_euler('ZYX', [30, -10, 5], degrees=True).as_matrix()
+    translation = np.array([1.0, -2.0, 0.5])
+    expected = _meshgrid_lidar_from_depth(depth, intrinsics, translation, rotation)
+
+    rays = _RayCache().camera_rays(intrinsics, depth.shape[0], depth.shape[1])
+    points_without_rays = PointCloudLidar.simulate_lidar_from_depth(depth, intrinsics, translation, rotation)
+    points_with_rays = PointCloudLidar.simulate_lidar_from_depth(depth, intrinsics, translation, rotation, rays)
+    for points in [points_without_rays, points_with_rays]:
+        assert points.shape == (height, width, 3)
+        assert np.array_equal(points, expected)
+
+
 if __name__ == '__main__':
     test_point_cloud(config=blackbox_test_configs["small"], render=True)
@@ -0,0 +1,31 @@
+import tempfile
+
+import numpy as np
+
+from metaurban.utils.raster_cache import RasterCache
+
+
+def test_raster_cache_lru():
+    cache = RasterCache(max_bytes=300)
+    for i in range(4):
+        cache.put(RasterCache.make_key("raster", i), np.full(100, i, dtype=np.uint8))
+    # the first raster is evicted, the others fit in the bound
+    assert cache.get(RasterCache.make_key("raster", 0)) is None
+    assert len(cache) == 3 and cache.nbytes == 300
+    cache.get(RasterCache.make_key("raster", 1))
+    cache.put(RasterCache.make_key("raster", 4), np.zeros(100, dtype=np.uint8))
+    assert cache.get(RasterCache.make_key("raster", 2)) is None
+    assert cache.get(RasterCache.make_key("raster", 1))[0] == 1
+    # too large to be kept in memory
+    cache.put(RasterCache.make_key("large"), np.zeros(1000, dtype=np.uint8))
+    assert cache.get(RasterCache.make_key("large")) is None and len(cache) == 3
+
+
+def test_raster_cache_disk():
+    cache_dir = tempfile.mkdtemp()
+    raster = np.arange(1000, dtype=np.uint16).reshape(10, 100)
+    RasterCache(max_bytes=0, cache_dir=cache_dir).put("key", raster, persistent=True)
+    RasterCache(max_bytes=0, cache_dir=cache_dir).put("other", raster)
+    cache = RasterCache(max_bytes=1 << 20, cache_dir=cache_dir)
+    assert np.array_equal(cache.get("key"), raster) and len(cache) == 1
+    assert cache.get("other") is None
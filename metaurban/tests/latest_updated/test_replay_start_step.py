@@ -0,0 +1,74 @@
+import tempfile
+
+import numpy as np
+
+from metaurban.envs import SidewalkStaticMetaUrbanEnv
+from metaurban.utils.episode_record import EpisodeRecordReader
+from metaurban.utils.math import wrap_to_pi
+
+CONFIG = {
+    "object_density": 0.6,
+    "num_scenarios": 1,
+    "traffic_density": 0.2,
+    "show_terrain": False,
+    "map": "X",
+    "start_seed": 4,
+}
+
+
+def _record(record_dir, num_steps):
+    env = SidewalkStaticMetaUrbanEnv(dict(CONFIG, record_episode=True, record_episode_dir=record_dir))
+    try:
+        env.reset()
+        for _ in range(num_steps):
+            env.step([0, 1])
+        return env.engine.record_manager.episode_file
+    finally:
+        env.close()
+
+
+def _check_replay_from(episode_file, start_step, only_reset_when_replay):
+    reader = EpisodeRecordReader(episode_file)
+    frame_index = reader.step_frame_range(start_step)[1] - 1
+    frame = reader.frame(frame_index)
+    alive = set(reader.alive_objects(frame_index)[0])
+    reader.close()
+    expected_names = (alive | set(frame.spawn_info)) - set(frame.clear_info)
+    # objects spawned in earlier frames are set to their recorded states in both modes, the objects spawned in this
+    # frame only when the full trajectory is replayed
+    restored_names = set(frame.step_info) & expected_names
+    if only_reset_when_replay:
+        restored_names -= set(frame.spawn_info)
+    assert len(restored_names) > 1
+
+    env = SidewalkStaticMetaUrbanEnv(
+        dict(
+            CONFIG,
+            replay_episode=episode_file,
+            replay_start_step=start_step,
+            only_reset_when_replay=only_reset_when_replay
+        )
+    )
+    try:
+        env.reset()
+        replay_manager = env.engine.replay_manager
+        assert replay_manager.current_frame.episode_step == frame.episode_step
+        assert set(replay_manager.record_name_to_current_name) == expected_names
+        objects = env.engine.get_objects(list(replay_manager.current_name_to_record_name))
+        assert len(objects) == len(expected_names)
+        for name in restored_names:
+            obj = objects[replay_manager.record_name_to_current_name[name]]
+            state = frame.step_info[name]
+            assert np.allclose(obj.position, state["position"][:2], atol=1e-3)
+            assert abs(wrap_to_pi(obj.heading_theta - state["heading_theta"])) < 1e-3
+    finally:
+        env.close()
+
+
+def test_replay_start_step():
+    """
+    Replay an episode record from a step in the middle, the scene is restored to the last frame of that step
+    """
+    episode_file = _record(tempfile.mkdtemp(), num_steps=20)
+    for only_reset_when_replay in [False, True]:
+        _check_replay_from(episode_file, 12, only_reset_when_replay)
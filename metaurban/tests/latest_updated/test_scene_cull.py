@@ -0,0 +1,140 @@
+import sys
+import types
+
+import pytest
+
+from metaurban.engine.scene_cull import SceneCull
+
+
+class _NodePath:
+    def __init__(self):
+        self.hidden = False
+        self.calls = 0
+
+    def hide(self):
+        self.hidden = True
+        self.calls += 1
+
+    def show(self):
+        self.hidden = False
+        self.calls += 1
+
+    def isHidden(self):
+        return self.hidden
+
+    def isEmpty(self):
+        return False
+
+
+class _PhysicsNodes:
+    def __init__(self):
+        self.attached = True
+
+    def detach_from_physics_world(self, physics_world):
+        self.attached = False
+
+    def attach_to_physics_world(self, physics_world):
+        self.attached = True
+
+    def __len__(self):
+        return 1
+
+
+class _Block:
+    def __init__(self, x, y):
+        self.bounding_box = (x - 0.5, x + 0.5, y - 0.5, y + 0.5)
+        self.origin = _NodePath()
+        self.dynamic_nodes = _PhysicsNodes()
+
+
+class _Body:
+    def isStatic(self):
+        return False
+
+
+class _Object:
+    def __init__(self, object_id, x, y):
+        self.id = object_id
+        self.position = (x, y)
+        self.origin = _NodePath()
+        self.dynamic_nodes = _PhysicsNodes()
+        self.body = _Body()
+
+    def is_attached(self):
+        return True
+
+
+class _Vehicle(_Object):
+    pass
+
+
+class _Engine:
+    def __init__(self, blocks, objects):
+        self.current_map = types.SimpleNamespace(blocks=blocks)
+        self.physics_world = types.SimpleNamespace(dynamic_world=None)
+        self.objects = {obj.id: obj for obj in objects}
+        self.agents = {}
+
+    def get_objects(self):
+        return self.objects
+
+
+@pytest.fixture(autouse=True)
+def _stub_base_vehicle(monkeypatch):
+    # SceneCull only checks whether an object is a BaseVehicle, which needs the whole engine to be imported
+    module = types.ModuleType("metaurban.component.vehicle.base_vehicle")
+    module.BaseVehicle = _Vehicle
+    monkeypatch.setitem(sys.modules, "metaurban.component.vehicle.base_vehicle", module)
+
+
+def _culled(element):
+    return element.origin.hidden
+
+
+def test_scene_cull_distance_and_hysteresis():
+    near, band, far = _Object("near", 50, 0), _Object("band", 105, 0), _Object("far", 200, 0)
+    far_vehicle = _Vehicle("vehicle", 0, 200)
+    far_block = _Block(300, 0)
+    engine = _Engine([_Block(0, 0), far_block], [near, band, far, far_vehicle])
+    scene_cull = SceneCull(engine, cull_distance=100, cull_margin=10)
+
+    # culled beyond cull_distance + cull_margin, kept inside of it
+    scene_cull.update([(0, 0)])
+    assert not _culled(near) and not _culled(band) and _culled(far) and _culled(far_block)
+    assert not far.dynamic_nodes.attached and not far_block.dynamic_nodes.attached
+    # vehicles are only hidden, their bodies stay in the physics world
+    assert _culled(far_vehicle) and far_vehicle.dynamic_nodes.attached
+
+    # in the margin band, a culled element stays culled and a visible one stays visible
+    calls = {id(element): element.origin.calls for element in [near, band, far, far_block]}
+    for x in [95, 92, 99.5, 94, 98]:
+        scene_cull.update([(x, 0)])
+        assert _culled(far) and not _culled(band)
+    assert all(element.origin.calls == calls[id(element)] for element in [near, band, far, far_block])
+
+    # restored only inside cull_distance
+    scene_cull.update([(101, 0)])
+    assert not _culled(far) and far.dynamic_nodes.attached
+    scene_cull.update([(205, 0)])
+    assert not _culled(far_block) and far_block.dynamic_nodes.attached
+    assert _culled(near) and not near.dynamic_nodes.attached
+
+
+def test_scene_cull_restore():
+    far, removed, far_vehicle = _Object("far", 200, 0), _Object("removed", 0, 300), _Vehicle("vehicle", 0, 200)
+    far_block = _Block(300, 0)
+    engine = _Engine([_Block(0, 0), far_block], [far, removed, far_vehicle])
+    scene_cull = SceneCull(engine, cull_distance=100, cull_margin=10)
+    scene_cull.update([(0, 0)])
+    assert _culled(far) and _culled(removed) and _culled(far_vehicle) and _culled(far_block)
+
+    # objects removed from the engine are restored
+    del engine.objects["removed"]
+    scene_cull.update([(0, 0)])
+    assert not _culled(removed) and removed.dynamic_nodes.attached
+    assert _culled(far)
+
+    # everything is restored on reset
+    scene_cull.reset()
+    for element in [far, far_vehicle, far_block]:
+        assert not _culled(element) and element.dynamic_nodes.attached
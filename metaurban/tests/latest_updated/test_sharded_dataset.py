@@ -0,0 +1,87 @@
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from metaurban.scenario import ScenarioDescription as SD
+from metaurban.scenario.sharded_dataset import save_sharded_dataset, ShardedDatasetReader
+from metaurban.scenario.utils import read_dataset_summary, read_scenario_data
+from metaurban.type import MetaUrbanType
+
+
+def _make_scenario(scenario_id, length=5):
+    positions = np.random.RandomState(scenario_id).randn(length, 3)
+    return {
+        SD.ID: str(scenario_id),
+        SD.VERSION: "test",
+        SD.LENGTH: length,
+        SD.TRACKS: {
+            "ego": {
+                SD.TYPE: MetaUrbanType.VEHICLE,
+                SD.STATE: {
+                    SD.POSITION: positions,
+                    SD.HEADING: np.zeros(length),
+                    "valid": np.ones(length, dtype=bool)
+                },
+                SD.METADATA: {
+                    SD.TYPE: MetaUrbanType.VEHICLE,
+                    SD.OBJECT_ID: "ego"
+                }
+            }
+        },
+        SD.DYNAMIC_MAP_STATES: {},
+        SD.MAP_FEATURES: {},
+        SD.METADATA: {
+            SD.metaurban_PROCESSED: False,
+            SD.COORDINATE: "metaurban",
+            SD.TIMESTEP: np.arange(length) * 0.1,
+            SD.SDC_ID: "ego"
+        },
+    }
+
+
+def test_sharded_dataset():
+    dataset_dir = tempfile.mkdtemp()
+    scenarios = [_make_scenario(i) for i in range(10)]
+    save_sharded_dataset(scenarios, "test", "v0", dataset_dir, scenarios_per_shard=3, num_workers=2)
+
+    summary, files, mapping = read_dataset_summary(dataset_dir)
+    assert len(files) == 10
+    # scenarios are read through the mapping as for a dataset of scenario files
+    for i, file in enumerate(files):
+        scenario = read_scenario_data(os.path.join(dataset_dir, mapping[file], file))
+        assert scenario[SD.ID] == str(i) and scenario[SD.LENGTH] == 5
+        assert np.array_equal(
+            scenario[SD.TRACKS]["ego"][SD.STATE][SD.POSITION], scenarios[i][SD.TRACKS]["ego"][SD.STATE][SD.POSITION]
+        )
+    reader = ShardedDatasetReader(dataset_dir)
+    assert len(reader) == 10 and set(reader.scenario_files) == set(files)
+    for i in [0, 4, 9]:
+        scenario = reader.read_scenario(SD.get_export_file_name("test", "v0", str(i)))
+        position = scenario[SD.TRACKS]["ego"][SD.STATE][SD.POSITION]
+        assert np.array_equal(position, scenarios[i][SD.TRACKS]["ego"][SD.STATE][SD.POSITION])
+        assert summary[SD.get_export_file_name("test", "v0", str(i))][SD.SDC_ID] == "ego"
+    # lookup by scenario id, and only load metadata
+    scenario = reader.read_scenario("7", fields=[SD.METADATA])
+    assert list(scenario.keys()) == [SD.METADATA]
+    assert reader.read_field("7", SD.LENGTH) == 5
+    reader.close()
+
+
+def test_sharded_dataset_rewrite():
+    dataset_dir = tempfile.mkdtemp()
+    file = SD.get_export_file_name("test", "v0", "1")
+    save_sharded_dataset([_make_scenario(i, length=5) for i in range(3)], "test", "v0", dataset_dir, num_workers=0)
+    assert read_scenario_data(os.path.join(dataset_dir, file))[SD.LENGTH] == 5
+
+    # saving again to the same directory drops the reader of the previous dataset
+    save_sharded_dataset([_make_scenario(i, length=9) for i in range(3)], "test", "v0", dataset_dir, num_workers=0)
+    assert read_scenario_data(os.path.join(dataset_dir, file))[SD.LENGTH] == 9
+
+    # a dataset replaced by other means is noticed through its index file
+    other_dir = tempfile.mkdtemp()
+    save_sharded_dataset([_make_scenario(i, length=7) for i in range(3)], "test", "v0", other_dir, num_workers=0)
+    for name in os.listdir(other_dir):
+        shutil.copy(os.path.join(other_dir, name), os.path.join(dataset_dir, name))
+    assert read_scenario_data(os.path.join(dataset_dir, file))[SD.LENGTH] == 7
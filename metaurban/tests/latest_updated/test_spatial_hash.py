@@ -0,0 +1,64 @@
+import numpy as np
+
+from metaurban.utils.spatial_hash import SpatialHash
+
+
+def test_spatial_hash_query():
+    rng = np.random.RandomState(0)
+    spatial_hash = SpatialHash(cell_size=7)
+    entries = {}
+    for step in range(2000):
+        key = rng.randint(100)
+        if rng.rand() < 0.1:
+            spatial_hash.remove(key)
+            entries.pop(key, None)
+        else:
+            entries[key] = (rng.uniform(-100, 100, 2), rng.uniform(0, 3))
+            spatial_hash.update(key, *entries[key])
+        if step % 50 == 0:
+            center, radius = rng.uniform(-100, 100, 2), rng.uniform(0, 60)
+            keys, positions, extents = spatial_hash.query(center, radius)
+            expected = [k for k, (p, e) in entries.items() if np.linalg.norm(p - center) <= radius + e]
+            assert sorted(keys) == sorted(expected)
+            assert len(spatial_hash) == len(entries)
+            for k, position, extent in zip(keys, positions, extents):
+                assert np.array_equal(position, entries[k][0]) and extent == entries[k][1]
+
+
+def test_lidar_spatial_hash_broad_phase():
+    """
+    The spatial hash finds every object the contact test finds, and only objects whose covering circle reaches into the
+    range
+    """
+    from metaurban.envs import SidewalkStaticMetaUrbanEnv
+    env = SidewalkStaticMetaUrbanEnv(
+        {
+            "object_density": 0.6,
+            "num_scenarios": 1,
+            "traffic_density": 0.2,
+            "show_terrain": False,
+            "map": "X",
+            "start_seed": 4,
+            "lidar_spatial_hash": True,
+        }
+    )
+    try:
+        env.reset()
+        lidar = env.engine.get_sensor("lidar")
+        assert lidar.broad_phase_spatial_hash
+        for step in range(10):
+            env.step([0, 1])
+            others = env.engine.get_objects(lambda obj: obj is not env.agent and len(obj.dynamic_nodes) > 0)
+            for vehicle in [env.agent] + list(others.values())[:5]:
+                for radius in [10, 50]:
+                    lidar.broad_phase_spatial_hash = True
+                    hashed = lidar.get_surrounding_objects(vehicle, radius)
+                    lidar.broad_phase_spatial_hash = False
+                    contacts = lidar.get_surrounding_objects(vehicle, radius)
+                    assert contacts <= hashed
+                    for obj in hashed - contacts:
+                        extent = (obj.LENGTH + obj.WIDTH) / 2 if hasattr(obj, "LENGTH") else 0.0
+                        distance = np.linalg.norm(np.asarray(obj.position) - np.asarray(vehicle.position))
+                        assert distance <= radius + lidar.BROAD_PHASE_EXTRA_DIST + extent
+    finally:
+        env.close()
@@ -0,0 +1,427 @@
+"""
+Columnar, compressed file format of recorded episodes.
+
+The numeric object states, i.e. position, heading, roll, pitch and velocity, are written to per-field arrays indexed by
+frame and object slot. The other state values, the policy and manager states, and the agent mappings are delta encoded,
+so only values which changed since the previous frame are stored. Spawn and clear events are stored in separate blocks.
+Frames are buffered in chunks of preallocated arrays, and each full chunk is compressed and appended to the file, so
+the memory used by the recorder does not grow with the episode length. The delta encoding restarts at every chunk, so
+a frame can be decoded from its own chunk only.
+
+File layout:
+    MAGIC
+    block*       a block is its 8 bytes little-endian length followed by a zlib compressed pickle
+    index        offset of the index block, 8 bytes little-endian
+    MAGIC
+The recording can be flushed at any time, e.g. when the episode is dumped. A flush writes a new index block and footer,
+and the recording continues after them, the reader always uses the last footer.
+"""
+import bisect
+import mmap
+import pickle
+import struct
+import zlib
+
+import numpy as np
+
+from metaurban.constants import ObjectState
+
+MAGIC = b"MUREC001"
+_LENGTH = struct.Struct("<Q")
+
+# state fields stored in columns, and their dimension
+STATE_COLUMNS = {
+    ObjectState.POSITION: 3,
+    ObjectState.HEADING_THETA: 1,
+    ObjectState.ROLL: 1,
+    ObjectState.PITCH: 1,
+    ObjectState.VELOCITY: 2,
+}
+
+
+def _same(a, b):
+    if a is b:
+        return True
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, np.ndarray):
+        return a.shape == b.shape and a.dtype == b.dtype and np.array_equal(a, b)
+    try:
+        return bool(a == b)
+    except (ValueError, TypeError):
+        return False
+
+
+def _column_kind(value):
+    """
+    How a state value is restored from its column, or None if it can not be stored in a column
+    """
+    if isinstance(value, np.ndarray):
+        return ("array", value.dtype.str) if value.dtype.kind == "f" else None
+    if isinstance(value, (list, tuple)):
+        if all(isinstance(v, (float, int, np.floating, np.integer)) and not isinstance(v, bool) for v in value):
+            return type(value).__name__
+        return None
+    if isinstance(value, (float, np.floating)):
+        return "scalar"
+    return None
+
+
+def _restore(kind, column):
+    if kind == "scalar":
+        return float(column[0])
+    if kind == "list":
+        return column.tolist()
+    if kind == "tuple":
+        return tuple(column.tolist())
+    return column.astype(kind[1])
+
+
+class _Removed:
+    """
+    Marks a key removed from a delta encoded dict
+    """
+    pass
+
+
+class _Delta:
+    """
+    Delta encoding of dicts of values, which are stored only when they differ from the last stored value
+    """
+    def __init__(self):
+        self.last = {}
+
+    def encode(self, values):
+        changed = {k: v for k, v in values.items() if k not in self.last or not _same(self.last[k], v)}
+        self.last.update(changed)
+        for k in [k for k in self.last if k not in values]:
+            del self.last[k]
+            changed[k] = _Removed()
+        return changed
+
+    @staticmethod
+    def apply(target, changed):
+        for k, v in changed.items():
+            if isinstance(v, _Removed):
+                target.pop(k, None)
+            else:
+                target[k] = v
+
+
+class EpisodeRecordWriter:
+    """
+    Stream frames of an episode to a file. The frames are the FrameInfo objects of the RecordManager
+    """
+    CHUNK_FRAMES = 256
+
+    def __init__(self, file_path, chunk_frames=None, compress_level=1):
+        self.file_path = file_path
+        self.chunk_frames = chunk_frames or self.CHUNK_FRAMES
+        self.compress_level = compress_level
+        self._file = open(file_path, "wb")
+        self._file.write(MAGIC)
+        self.header_offset = None
+        # object slot -> name
+        self.names = []
+        self._slots = {}
+        # (name, field) -> how to restore the value from the column
+        self.kinds = {}
+        self.step_sizes = []
+        self.num_frames = 0
+        # (start frame, number of frames, offset of state block, offset of event block)
+        self.chunks = []
+        self._new_chunk()
+
+    def _write_block(self, data):
+        data = zlib.compress(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL), self.compress_level)
+        offset = self._file.tell()
+        self._file.write(_LENGTH.pack(len(data)))
+        self._file.write(data)
+        return offset
+
+    def write_header(self, header):
+        """
+        Episode information shared by all frames, e.g. map data and global config
+        """
+        self.header_offset = self._write_block(header)
+
+    def _new_chunk(self):
+        capacity = max(len(self.names), 16)
+        self._start = self.num_frames
+        self._length = 0
+        self._columns = {k: np.full((self.chunk_frames, capacity, d), np.nan) for k, d in STATE_COLUMNS.items()}
+        self._present = np.zeros((self.chunk_frames, capacity), dtype=bool)
+        self._episode_steps = np.zeros(self.chunk_frames, dtype=np.int64)
+        # frame offset in chunk -> delta encoded values
+        self._extras = {}
+        self._policies = {}
+        self._policy_names = {}
+        self._managers = {}
+        self._agents = {}
+        self._events = {}
+        self._extra_delta = {}
+        self._policy_delta = {}
+        self._manager_delta = _Delta()
+        self._last_policy_names = None
+        self._last_agents = None
+
+    def _slot(self, name):
+        slot = self._slots.get(name)
+        if slot is None:
+            slot = self._slots[name] = len(self.names)
+            self.names.append(name)
+            capacity = self._present.shape[1]
+            if slot >= capacity:
+                pad = ((0, 0), (0, capacity), (0, 0))
+                self._columns = {
+                    k: np.pad(v, pad, mode="constant", constant_values=np.nan)
+                    for k, v in self._columns.items()
+                }
+                self._present = np.pad(self._present, pad[:2], mode="constant")
+        return slot
+
+    def _put_column(self, frame, slot, name, key, value):
+        kind = _column_kind(value)
+        if kind is None or self.kinds.setdefault((name, key), kind) != kind:
+            return False
+        value = np.asarray(value, dtype=np.float64).reshape(-1)
+        if value.shape[0] != STATE_COLUMNS[key] or np.isnan(value).any():
+            return False
+        self._columns[key][frame, slot] = value
+        return True
+
+    def add_frame(self, frame_info):
+        i = self._length
+        self._episode_steps[i] = frame_info.episode_step
+        for name, state in frame_info.step_info.items():
+            slot = self._slot(name)
+            self._present[i, slot] = True
+            extra = {
+                k: v
+                for k, v in state.items() if not (k in STATE_COLUMNS and self._put_column(i, slot, name, k, v))
+            }
+            changed = self._extra_delta.setdefault(name, _Delta()).encode(extra)
+            if changed:
+                self._extras.setdefault(i, {})[name] = changed
+        for name, state in frame_info.policy_info.items():
+            changed = self._policy_delta.setdefault(name, _Delta()).encode(state)
+            if changed:
+                self._policies.setdefault(i, {})[name] = changed
+        policy_names = list(frame_info.policy_info.keys())
+        if policy_names != self._last_policy_names:
+            self._policy_names[i] = self._last_policy_names = policy_names
+        changed = self._manager_delta.encode(frame_info.manager_info)
+        if changed:
+            self._managers[i] = changed
+        agents = (frame_info.agents, frame_info._agent_to_object, frame_info._object_to_agent)
+        if agents != self._last_agents:
+            self._agents[i] = self._last_agents = agents
+        if frame_info.spawn_info or frame_info.policy_spawn_info or frame_info.clear_info:
+            self._events[i] = (frame_info.spawn_info, frame_info.policy_spawn_info, frame_info.clear_info)
+
+        self._length += 1
+        self.num_frames += 1
+        if self._length == self.chunk_frames:
+            self._flush_chunk()
+
+    def add_step(self, frame_infos):
+        """
+        Add the frames of one env step, i.e. one frame for env.reset() and decision_repeat frames for env.step()
+        """
+        for frame_info in frame_infos:
+            self.add_frame(frame_info)
+        self.step_sizes.append(len(frame_infos))
+
+    def _flush_chunk(self):
+        if self._length == 0:
+            return
+        length, num_slots = self._length, len(self.names)
+        columns = {k: v[:length, :num_slots] for k, v in self._columns.items()}
+        state_offset = self._write_block(
+            dict(
+                columns=columns,
+                present=self._present[:length, :num_slots],
+                episode_steps=self._episode_steps[:length],
+                extras=self._extras,
+                policies=self._policies,
+                policy_names=self._policy_names,
+                managers=self._managers,
+                agents=self._agents,
+            )
+        )
+        event_offset = self._write_block(self._events)
+        self.chunks.append((self._start, length, state_offset, event_offset))
+        self._new_chunk()
+
+    def flush(self):
+        """
+        Write the buffered frames and an index, after which the file can be read
+        """
+        self._flush_chunk()
+        index_offset = self._write_block(
+            dict(
+                header_offset=self.header_offset,
+                names=self.names,
+                kinds=self.kinds,
+                step_sizes=self.step_sizes,
+                chunks=self.chunks,
+                num_frames=self.num_frames,
+            )
+        )
+        self._file.write(_LENGTH.pack(index_offset))
+        self._file.write(MAGIC)
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+
+class EpisodeRecordReader:
+    """
+    Random access to an episode written by EpisodeRecordWriter. The file is memory-mapped, and seeking to a frame only
+    decodes the chunk containing it, so long episodes can be scrubbed, or split into frame ranges processed in parallel
+    """
+    def __init__(self, file_path):
+        self.file_path = file_path
+        with open(file_path, "rb") as file:
+            self._buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        footer = self._buffer[-(_LENGTH.size + len(MAGIC)):]
+        assert footer[_LENGTH.size:] == MAGIC, "{} is not a finished episode record".format(file_path)
+        index = self._read_block(_LENGTH.unpack(footer[:_LENGTH.size])[0])
+        self.names = index["names"]
+        self.kinds = index["kinds"]
+        self.step_sizes = index["step_sizes"]
+        self.chunks = index["chunks"]
+        self.num_frames = index["num_frames"]
+        self.header = self._read_block(index["header_offset"])
+        self._chunk_starts = [chunk[0] for chunk in self.chunks]
+        self._step_starts = [0]
+        for step_size in self.step_sizes:
+            self._step_starts.append(self._step_starts[-1] + step_size)
+        self._cached_chunk = (None, None)
+        self._events = None
+
+    def _read_block(self, offset):
+        length = _LENGTH.unpack(self._buffer[offset:offset + _LENGTH.size])[0]
+        offset += _LENGTH.size
+        return pickle.loads(zlib.decompress(memoryview(self._buffer)[offset:offset + length]))
+
+    @property
+    def num_steps(self):
+        return len(self.step_sizes)
+
+    def step_frame_range(self, step):
+        """
+        :return: [start, stop) of the frames recorded in an env step, step 0 is the reset
+        """
+        return self._step_starts[step], self._step_starts[step + 1]
+
+    def frames(self, start=0, stop=None):
+        """
+        Iterate the frames in [start, stop) as FrameInfo. Only the chunks containing these frames are decoded
+        """
+        stop = self.num_frames if stop is None else min(stop, self.num_frames)
+        if start >= stop:
+            return
+        for chunk_index in range(bisect.bisect_right(self._chunk_starts, start) - 1, len(self.chunks)):
+            if self.chunks[chunk_index][0] >= stop:
+                break
+            for frame in self._decode_chunk(chunk_index, start, stop):
+                yield frame
+
+    def frame(self, index):
+        return next(self.frames(index, index + 1))
+
+    def steps(self, start=0, stop=None):
+        """
+        Iterate the env steps in [start, stop) as lists of FrameInfo, like the "frame" list of a recorded episode
+        """
+        stop = self.num_steps if stop is None else min(stop, self.num_steps)
+        if start >= stop:
+            return
+        frames = self.frames(self._step_starts[start], self._step_starts[stop])
+        for step in range(start, stop):
+            yield [next(frames) for _ in range(self.step_sizes[step])]
+
+    def events(self):
+        """
+        :return: {frame index: (spawn_info, policy_spawn_info, clear_info)} of the whole episode
+        """
+        if self._events is None:
+            self._events = {}
+            for chunk_start, _, _, event_offset in self.chunks:
+                for i, events in self._read_block(event_offset).items():
+                    self._events[chunk_start + i] = events
+        return self._events
+
+    def alive_objects(self, index):
+        """
+        Objects spawned before a frame and not cleared yet, so that replay can start from this frame
+        :return: {name: spawn info}, {name: policy spawn info}
+        """
+        spawned, policies = {}, {}
+        for frame_index in sorted(i for i in self.events() if i < index):
+            spawn_info, policy_spawn_info, clear_info = self.events()[frame_index]
+            spawned.update(spawn_info)
+            policies.update(policy_spawn_info)
+            for name in clear_info:
+                spawned.pop(name, None)
+                policies.pop(name, None)
+        return spawned, policies
+
+    def _load_chunk(self, chunk_index):
+        if self._cached_chunk[0] != chunk_index:
+            _, _, state_offset, event_offset = self.chunks[chunk_index]
+            self._cached_chunk = (chunk_index, (self._read_block(state_offset), self._read_block(event_offset)))
+        return self._cached_chunk[1]
+
+    def _decode_chunk(self, chunk_index, start, stop):
+        from metaurban.manager.record_manager import FrameInfo
+        chunk_start, length, _, _ = self.chunks[chunk_index]
+        chunk, events = self._load_chunk(chunk_index)
+        extras, policies, managers = {}, {}, {}
+        policy_names, agents = [], ([], {}, {})
+        columns = chunk["columns"]
+        for i in range(min(length, stop - chunk_start)):
+            for name, changed in chunk["extras"].get(i, {}).items():
+                _Delta.apply(extras.setdefault(name, {}), changed)
+            for name, changed in chunk["policies"].get(i, {}).items():
+                _Delta.apply(policies.setdefault(name, {}), changed)
+            _Delta.apply(managers, chunk["managers"].get(i, {}))
+            policy_names = chunk["policy_names"].get(i, policy_names)
+            agents = chunk["agents"].get(i, agents)
+            if chunk_start + i < start:
+                continue
+
+            frame = FrameInfo(int(chunk["episode_steps"][i]))
+            for slot in np.flatnonzero(chunk["present"][i]):
+                name = self.names[slot]
+                state = dict(extras.get(name, {}))
+                for key in STATE_COLUMNS:
+                    value = columns[key][i, slot]
+                    if not np.isnan(value[0]):
+                        state[key] = _restore(self.kinds[(name, key)], value)
+                frame.step_info[name] = state
+            frame.policy_info = {name: dict(policies.get(name, {})) for name in policy_names}
+            frame.manager_info = dict(managers)
+            frame.agents = list(agents[0])
+            frame._agent_to_object = dict(agents[1])
+            frame._object_to_agent = dict(agents[2])
+            if i in events:
+                frame.spawn_info, frame.policy_spawn_info, frame.clear_info = events[i]
+            yield frame
+
+    def to_episode_info(self):
+        """
+        The episode in the format of RecordManager.get_episode_metadata(), with all frames in memory
+        """
+        episode_info = dict(self.header)
+        episode_info["frame"] = list(self.steps())
+        return episode_info
+
+    def close(self):
+        self._cached_chunk = (None, None)
+        self._buffer.close()
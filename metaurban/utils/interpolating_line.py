@@ -7,13 +7,32 @@ from metaurban.utils.math import norm, get_vertical_vector
 
 class InterpolatingLine:
     """
-    This class provides point set with interpolating function
+    This class provides point set with interpolating function.
+    Segments are kept both as a list of dicts (segment_property) and as arrays, so that a longitudinal position is
+    mapped to its segment with a binary search over the accumulated segment lengths.
     """
     def __init__(self, points):
         points = np.asarray(points)[..., :2]
         self.segment_property, self._start_points, self._end_points = self._get_properties(points)
         self._distance_b_a = self._end_points - self._start_points
-        self.length = sum([seg["length"] for seg in self.segment_property])
+        self._build_segment_arrays()
+        self.length = float(self._accumulate_lengths[-1])
+
+    def _build_segment_arrays(self):
+        self._lengths = np.array([seg["length"] for seg in self.segment_property], dtype=float)
+        # accumulated length at the end of each segment, summed in order as the original loops did
+        self._accumulate_lengths = np.cumsum(self._lengths)
+        self._directions = np.array([seg["direction"] for seg in self.segment_property], dtype=float).reshape(-1, 2)
+        lateral_directions = [seg["lateral_direction"] for seg in self.segment_property]
+        self._lateral_directions = np.array(lateral_directions, dtype=float).reshape(-1, 2)
+        self._headings = np.array([seg["heading"] for seg in self.segment_property], dtype=float)
+
+    def _segment_index(self, longitudinal):
+        """
+        Index of the first segment with accumulated length + 0.1 >= longitudinal, or the last segment
+        """
+        index = np.searchsorted(self._accumulate_lengths + 0.1, longitudinal, side="left")
+        return np.minimum(index, len(self._lengths) - 1)
 
     def position(self, longitudinal: float, lateral: float) -> np.ndarray:
         return self.get_point(longitudinal, lateral)
@@ -51,16 +70,13 @@ class InterpolatingLine:
         min_dists = self.min_lineseg_dist(position, self._start_points, self._end_points, self._distance_b_a)
         target_segment_idx = np.argmin(min_dists)
 
-        long = 0
-        for idx, seg in enumerate(self.segment_property):
-            if idx != target_segment_idx:
-                long += seg["length"]
-            else:
-                delta_x = position[0] - seg["start_point"][0]
-                delta_y = position[1] - seg["start_point"][1]
-                long += delta_x * seg["direction"][0] + delta_y * seg["direction"][1]
-                lateral = delta_x * seg["lateral_direction"][0] + delta_y * seg["lateral_direction"][1]
-                return long, lateral
+        seg = self.segment_property[target_segment_idx]
+        long = self._accumulate_lengths[target_segment_idx - 1] if target_segment_idx > 0 else 0
+        delta_x = position[0] - seg["start_point"][0]
+        delta_y = position[1] - seg["start_point"][1]
+        long += delta_x * seg["direction"][0] + delta_y * seg["direction"][1]
+        lateral = delta_x * seg["lateral_direction"][0] + delta_y * seg["lateral_direction"][1]
+        return long, lateral
 
         # deprecated content
         # Four elements:
@@ -168,42 +184,76 @@ class InterpolatingLine:
         """
         Get point on this line by interpolating
         """
-        accumulate_len = 0
-        for seg in self.segment_property:
-            accumulate_len += seg["length"]
-            if accumulate_len + 0.1 >= longitudinal:
-                break
+        index = self._segment_index(longitudinal)
+        seg = self.segment_property[index]
+        accumulate_len = self._accumulate_lengths[index]
         if lateral is not None:
             return (seg["start_point"] + (longitudinal - accumulate_len + seg["length"]) *
                     seg["direction"]) + lateral * seg["lateral_direction"]
         else:
             return seg["start_point"] + (longitudinal - accumulate_len + seg["length"]) * seg["direction"]
 
+    def get_points(self, longitudinals, laterals=None):
+        """
+        Batched get_point
+        :param longitudinals: array of K longitudinal positions
+        :param laterals: None, a scalar or an array of K lateral positions
+        :return: (K, 2) points
+        """
+        longitudinals = np.asarray(longitudinals, dtype=float).reshape(-1)
+        index = self._segment_index(longitudinals)
+        offset = longitudinals - self._accumulate_lengths[index] + self._lengths[index]
+        points = self._start_points[index] + offset[:, None] * self._directions[index]
+        if laterals is not None:
+            laterals = np.broadcast_to(np.asarray(laterals, dtype=float), longitudinals.shape)
+            points = points + laterals[:, None] * self._lateral_directions[index]
+        return points
+
     def get_heading_theta(self, longitudinal: float) -> float:
         """
         In rad
         """
-        accumulate_len = 0
-
         assert len(self.segment_property) > 0
+        index = np.searchsorted(self._accumulate_lengths, longitudinal, side="right")
+        return self.segment_property[min(index, len(self.segment_property) - 1)]["heading"]
 
-        for seg in self.segment_property:
-            accumulate_len += seg["length"]
-            if accumulate_len > longitudinal:
-                return seg["heading"]
+    def get_heading_thetas(self, longitudinals):
+        """
+        Batched get_heading_theta, in rad
+        :param longitudinals: array of K longitudinal positions
+        :return: (K,) headings
+        """
+        index = np.searchsorted(self._accumulate_lengths, np.asarray(longitudinals, dtype=float), side="right")
+        return self._headings[np.minimum(index, len(self._headings) - 1)]
 
-        return seg["heading"]
+    def local_coordinates_batch(self, positions):
+        """
+        Batched local_coordinates
+        :param positions: (K, 2) positions
+        :return: (K,) longitudinal and (K,) lateral positions
+        """
+        positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+        a, b = self._start_points, self._end_points
+        d = self._distance_b_a / np.hypot(self._distance_b_a[:, 0], self._distance_b_a[:, 1])[:, None]
+        # (K, S) point-to-segment distances, same as min_lineseg_dist for each position
+        d_pa = positions[:, None, :] - a[None]
+        s = -(d_pa * d[None]).sum(axis=-1)
+        t = ((positions[:, None, :] - b[None]) * d[None]).sum(axis=-1)
+        h = np.maximum(np.maximum(s, t), 0)
+        c = d_pa[..., 0] * d[None, :, 1] - d_pa[..., 1] * d[None, :, 0]
+        index = np.argmin(np.hypot(h, c), axis=1)
+
+        previous_lengths = np.concatenate([[0.], self._accumulate_lengths])[index]
+        delta = positions - self._start_points[index]
+        longs = previous_lengths + (delta * self._directions[index]).sum(axis=1)
+        laterals = (delta * self._lateral_directions[index]).sum(axis=1)
+        return longs, laterals
 
     def segment(self, longitudinal: float):
         """
         Return the segment piece on this lane of current position
         """
-        accumulate_len = 0
-        for index, seg in enumerate(self.segment_property):
-            accumulate_len += seg["length"]
-            if accumulate_len + 0.1 >= longitudinal:
-                return self.segment_property[index]
-        return self.segment_property[index]
+        return self.segment_property[self._segment_index(longitudinal)]
 
     def lateral_direction(self, longitude):
         lane_segment = self.segment(longitude)
@@ -213,17 +263,15 @@ class InterpolatingLine:
     def destroy(self):
         del self.segment_property
         self.segment_property = []
+        self._build_segment_arrays()
         self.length = None
 
     def get_polyline(self, interval=2, lateral=0):
         """
         This method will return the center line of this Lane in a discrete vector representation
         """
-        ret = []
-        for i in np.arange(0, self.length, interval):
-            ret.append(self.position(i, lateral))
-        ret.append(self.position(self.length, lateral))
-        return np.array(ret)
+        longitudinals = np.append(np.arange(0, self.length, interval), self.length)
+        return self.get_points(longitudinals, lateral)
 
     @staticmethod
     def min_lineseg_dist(p, a, b, d_ba=None):
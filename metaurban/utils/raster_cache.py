@@ -0,0 +1,88 @@
+import hashlib
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+
+class RasterCache:
+    """
+    LRU cache of numpy rasters, e.g. the height maps and semantic maps used by the terrain. The memory held by the
+    cached arrays is bounded by max_bytes, and arrays larger than this bound are never kept in memory. With a cache_dir,
+    persistent entries are also saved as .npy files, and entries not in memory are memory-mapped from these files.
+    """
+    def __init__(self, max_bytes, cache_dir=None):
+        self.max_bytes = max_bytes
+        self.cache_dir = os.path.abspath(os.path.expanduser(cache_dir)) if cache_dir else None
+        if self.cache_dir is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        self._arrays = OrderedDict()
+        self._bytes = 0
+
+    @staticmethod
+    def make_key(*args):
+        """
+        A string key from hashable arguments whose repr is stable across processes, e.g. numbers, strings, tuples
+        """
+        return hashlib.sha1(repr(args).encode("utf-8")).hexdigest()
+
+    def _file(self, key):
+        return os.path.join(self.cache_dir, key + ".npy")
+
+    def get(self, key):
+        """
+        :return: the cached array, which should not be modified, or None
+        """
+        array = self._arrays.get(key)
+        if array is not None:
+            self._arrays.move_to_end(key)
+            return array
+        if self.cache_dir is not None and os.path.exists(self._file(key)):
+            array = np.load(self._file(key), mmap_mode="r")
+            if array.nbytes <= self.max_bytes:
+                array = self._insert(key, np.array(array))
+            return array
+        return None
+
+    def put(self, key, array, persistent=False):
+        """
+        Cache an array
+        :param key: string key, see make_key()
+        :param array: numpy array. It is marked read-only, as the cached array is returned without copy
+        :param persistent: save the array to cache_dir. Only use it for keys which identify the content across
+        processes, i.e. not for keys containing object ids
+        :return: the array
+        """
+        if persistent and self.cache_dir is not None and not os.path.exists(self._file(key)):
+            tmp_file = "{}.{}.tmp.npy".format(self._file(key)[:-len(".npy")], os.getpid())
+            np.save(tmp_file, array)
+            os.replace(tmp_file, self._file(key))
+        if array.nbytes <= self.max_bytes:
+            self._insert(key, array)
+        return array
+
+    def _insert(self, key, array):
+        array.flags.writeable = False
+        old = self._arrays.pop(key, None)
+        if old is not None:
+            self._bytes -= old.nbytes
+        while self._arrays and self._bytes + array.nbytes > self.max_bytes:
+            _, evicted = self._arrays.popitem(last=False)
+            self._bytes -= evicted.nbytes
+        self._arrays[key] = array
+        self._bytes += array.nbytes
+        return array
+
+    def clear(self):
+        """
+        Drop the arrays in memory, the files in cache_dir are kept
+        """
+        self._arrays.clear()
+        self._bytes = 0
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    def __len__(self):
+        return len(self._arrays)
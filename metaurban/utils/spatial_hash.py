@@ -0,0 +1,90 @@
+import math
+
+import numpy as np
+
+
+class SpatialHash:
+    """
+    A uniform 2D grid of buckets for finding objects near a point. Entries are moved between buckets only when they
+    cross a cell border, so keeping the hash up to date costs one dict lookup per moved object.
+    """
+    def __init__(self, cell_size=20.0):
+        assert cell_size > 0, "cell_size should be positive"
+        self.cell_size = float(cell_size)
+        self._cells = {}
+        # key -> [cell, x, y, extent]
+        self._entries = {}
+        self._max_extent = 0.0
+
+    def _cell(self, x, y):
+        return int(math.floor(x / self.cell_size)), int(math.floor(y / self.cell_size))
+
+    def update(self, key, position, extent=0.0):
+        """
+        Insert an entry, or move it to a new position
+        :param key: hashable identifier of the entry
+        :param position: 2d position of the entry's center
+        :param extent: radius of a circle around the center that covers the entry
+        """
+        x, y = float(position[0]), float(position[1])
+        cell = self._cell(x, y)
+        entry = self._entries.get(key)
+        if entry is None:
+            self._entries[key] = [cell, x, y, extent]
+            self._cells.setdefault(cell, set()).add(key)
+        else:
+            if entry[0] != cell:
+                self._remove_from_cell(key, entry[0])
+                self._cells.setdefault(cell, set()).add(key)
+            entry[:] = cell, x, y, extent
+        self._max_extent = max(self._max_extent, extent)
+
+    def remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._remove_from_cell(key, entry[0])
+
+    def _remove_from_cell(self, key, cell):
+        bucket = self._cells[cell]
+        bucket.discard(key)
+        if not bucket:
+            del self._cells[cell]
+
+    def query(self, position, radius):
+        """
+        Entries whose covering circle intersects the circle (position, radius)
+        :return: list of keys, (K, 2) array of their positions and (K,) array of their extents
+        """
+        x, y = float(position[0]), float(position[1])
+        reach = radius + self._max_extent
+        min_x, min_y = self._cell(x - reach, y - reach)
+        max_x, max_y = self._cell(x + reach, y + reach)
+        keys = []
+        if (max_x - min_x + 1) * (max_y - min_y + 1) > len(self._cells):
+            for (cell_x, cell_y), bucket in self._cells.items():
+                if min_x <= cell_x <= max_x and min_y <= cell_y <= max_y:
+                    keys.extend(bucket)
+        else:
+            for cell_x in range(min_x, max_x + 1):
+                for cell_y in range(min_y, max_y + 1):
+                    keys.extend(self._cells.get((cell_x, cell_y), ()))
+        if not keys:
+            return [], np.zeros((0, 2)), np.zeros((0, ))
+        entries = np.array([self._entries[key][1:] for key in keys], dtype=float)
+        dist_square = (entries[:, 0] - x)**2 + (entries[:, 1] - y)**2
+        hit = dist_square <= (radius + entries[:, 2])**2
+        return [key for key, h in zip(keys, hit) if h], entries[hit, :2], entries[hit, 2]
+
+    def clear(self):
+        self._cells.clear()
+        self._entries.clear()
+        self._max_extent = 0.0
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def keys(self):
+        return self._entries.keys()